@@ -16,12 +16,104 @@ class Settings(BaseSettings):
     supabase_service_key: str = ""
     supabase_jwt_secret: str = ""
 
+    # Auth — JWKS background refresh interval and verified-token LRU size (0 = off)
+    jwks_refresh_seconds: int = 600
+    auth_token_cache_size: int = 1024
+
     # AI APIs
     gemini_api_key: str = ""
 
+    # Gemini model ladder — comma-separated, cheapest/fastest first. Each lease is
+    # attempted on the first tier and escalates only when validation fails.
+    gemini_model_ladder: str = "gemini-2.5-flash-lite,gemini-2.5-flash"
+
+    # Context cache for the static extraction instructions
+    gemini_prompt_cache: bool = True
+    gemini_prompt_cache_ttl_seconds: int = 3600
+
+    # Batch extraction (bulk backfills) — leases packed per request and prompt budget
+    gemini_batch_size: int = 8
+    gemini_batch_max_chars: int = 200_000
+
+    # Gemini cassette — "record" saves every response to the JSON-lines file,
+    # "replay" answers from it offline (latency "" | "recorded" | seconds, and
+    # a fraction of replayed calls failed with 503)
+    gemini_cassette_mode: str = ""
+    gemini_cassette_path: str = "gemini_cassette.jsonl"
+    gemini_cassette_latency: str = ""
+    gemini_cassette_error_rate: float = 0.0
+
     # CORS — comma-separated origins supported (e.g. "https://app.vercel.app,http://localhost:5173")
     frontend_url: str = "http://localhost:5173"
 
+    # Renewal detection — reuse a prior lease's fields when most paragraphs match
+    renewal_detection: bool = True
+    renewal_similarity_threshold: float = 0.6
+    renewal_max_changed_fields: int = 8
+
+    # Near-duplicate detection (MinHash/LSH) — optionally reuse the earlier extraction
+    # when no paragraph that differs between the two texts touches a field
+    near_duplicate_threshold: float = 0.95
+    near_duplicate_reuse: bool = False
+
+    # DOCX text extraction — main document part size (uncompressed XML) from
+    # which it is streamed rather than parsed whole, trading ~1.5x CPU for
+    # flat memory (a whole parse peaks at ~14x the XML size)
+    docx_streaming_min_mb: int = 4
+
+    # PDF text extraction — page count at which pages are split across worker
+    # processes, and how many workers to use (0 = one per CPU)
+    pdf_parallel_min_pages: int = 60
+    pdf_extraction_workers: int = 0
+
+    # Progressive PDF reading — extract pages in windows and stop once the
+    # field locator has found every required field
+    pdf_progressive: bool = True
+    pdf_progressive_window_pages: int = 3
+
+    # Pipeline retries — failed uploads resume from their last checkpoint;
+    # the wait before the next automatic retry doubles each attempt
+    pipeline_auto_retry: bool = True
+    pipeline_max_retries: int = 3
+    pipeline_retry_backoff_seconds: int = 300
+
+    # Idempotent uploads — how long a duplicate request waits for the original
+    # upload (running in another process) before returning 409
+    idempotency_wait_seconds: int = 120
+
+    # Admission control — per-user token buckets per endpoint class, and a cap
+    # on lease upload bytes in flight per process (counted as they arrive,
+    # once the upload is authenticated; one user may hold at most
+    # rate_limit_upload_burst full-size files of it).
+    # Backend "supabase" shares the buckets across workers via the
+    # take_rate_limit_token RPC.
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"
+    rate_limit_upload_per_minute: float = 6
+    rate_limit_upload_burst: float = 3
+    rate_limit_read_per_minute: float = 120
+    rate_limit_read_burst: float = 60
+    upload_inflight_max_mb: int = 50
+
+    # Metrics — bearer token required by GET /metrics (empty = no auth, e.g.
+    # when only reachable from the private network)
+    metrics_token: str = ""
+    # Directory where each worker of a multi-worker server writes its metric
+    # values, so /metrics can report all of them (set by gunicorn.conf.py)
+    metrics_multiproc_dir: str = ""
+
+    # Tracing — spans are exported (Zipkin v2 JSON) to a JSON-lines file and/or
+    # a collector URL; with neither set only trace ids are kept for the logs
+    trace_export_path: str = ""
+    trace_collector_url: str = ""
+    trace_sample_rate: float = 1.0
+
+    # Admin API — comma-separated Supabase user ids allowed to use /api/admin
+    admin_user_ids: str = ""
+
+    # On-demand profiling — where captured profiles are kept for download
+    profile_dir: str = "profiles"
+
     # Welcome Pack template path — override via TEMPLATE_PATH env var in Docker
     template_path: str = _DEFAULT_TEMPLATE_PATH
 
@@ -32,5 +124,15 @@ class Settings(BaseSettings):
         """Parse frontend_url into a list of origins (supports comma-separated)."""
         return [origin.strip() for origin in self.frontend_url.split(",") if origin.strip()]
 
+    @property
+    def admin_users(self) -> set[str]:
+        """Parse admin_user_ids into a set of user ids."""
+        return {user_id.strip() for user_id in self.admin_user_ids.split(",") if user_id.strip()}
+
+    @property
+    def gemini_models(self) -> list[str]:
+        """Parse gemini_model_ladder into an ordered list of model names."""
+        return [model.strip() for model in self.gemini_model_ladder.split(",") if model.strip()]
+
 
 settings = Settings()
@@ -1,36 +1,155 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
+from app.middleware import auth, rate_limit
 from app.middleware.auth import get_current_user
+from app.routers import admin as admin_router
 from app.routers import lease as lease_router
 from app.routers import welcome_pack as welcome_pack_router
+from app.services import gemini, lease_events, metrics, text_extraction, tracing
+from app.services.lease_service import lease_service
 
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    format="%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s",
 )
+for handler in logging.getLogger().handlers:
+    handler.addFilter(tracing.TraceIdFilter())
 logger = logging.getLogger(__name__)
 
+PROMPT_CACHE_REFRESH_INTERVAL = 120  # seconds — below prompt_cache.REFRESH_MARGIN
+PIPELINE_RETRY_POLL_INTERVAL = 60  # seconds
+METRICS_FLUSH_INTERVAL = 5  # seconds
+
+
+async def _refresh_prompt_cache_forever() -> None:
+    """Keep the extraction instruction caches alive between uploads."""
+    while True:
+        await asyncio.sleep(PROMPT_CACHE_REFRESH_INTERVAL)
+        try:
+            await asyncio.to_thread(gemini.refresh_prompt_cache)
+        except Exception:
+            logger.exception("Prompt cache refresh failed")
+
+
+async def _refresh_jwks_forever() -> None:
+    """Pick up rotated signing keys before a token signed with one arrives."""
+    while True:
+        await asyncio.sleep(settings.jwks_refresh_seconds)
+        try:
+            await asyncio.to_thread(auth.refresh_jwks)
+        except Exception:
+            logger.exception("JWKS refresh failed")
+
+
+async def _flush_metrics_forever() -> None:
+    """Write this worker's metric values for the worker answering /metrics."""
+    while True:
+        await asyncio.sleep(METRICS_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(metrics.write_snapshot)
+        except Exception:
+            logger.exception("Metrics snapshot failed")
+
+
+async def _retry_failed_uploads_forever() -> None:
+    """Resume failed uploads from their last checkpoint, with backoff."""
+    while True:
+        await asyncio.sleep(PIPELINE_RETRY_POLL_INTERVAL)
+        try:
+            resumed = await lease_service.retry_failed_uploads()
+            if resumed:
+                logger.info("Retry worker resumed %d failed upload(s)", resumed)
+        except Exception:
+            logger.exception("Retry worker pass failed")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background: list[asyncio.Task] = []
+
+    if settings.supabase_url:
+        try:
+            keys = await asyncio.to_thread(auth.refresh_jwks)
+            logger.info("JWKS loaded (%d signing keys)", keys)
+        except Exception as e:
+            logger.warning("JWKS prefetch failed — keys will be fetched on first use: %s", e)
+        background.append(asyncio.create_task(_refresh_jwks_forever()))
+
+    if settings.supabase_url and settings.supabase_service_key and settings.pipeline_auto_retry:
+        background.append(asyncio.create_task(_retry_failed_uploads_forever()))
+
+    if settings.gemini_api_key and settings.gemini_prompt_cache:
+        try:
+            await asyncio.to_thread(gemini.warm_prompt_cache)
+        except Exception:
+            logger.exception("Prompt cache warm-up failed — extraction will send prompts inline")
+        background.append(asyncio.create_task(_refresh_prompt_cache_forever()))
+
+    if settings.metrics_multiproc_dir:
+        background.append(asyncio.create_task(_flush_metrics_forever()))
+
+    yield
+
+    for task in background:
+        task.cancel()
+    text_extraction.shutdown_pool()
+    try:
+        await lease_events.flush()
+    except Exception:
+        logger.exception("Failed to flush lease events on shutdown")
+    await asyncio.to_thread(tracing.flush)
+    # Final values, kept by the master (mark_process_dead) after this worker exits
+    await asyncio.to_thread(metrics.write_snapshot)
+
+
 app = FastAPI(
     title="Acme Lease Processor API",
     description="AI-powered lease extraction and Tenant Welcome Pack generation",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
+# Innermost, so its 413/429 responses still get CORS headers and a trace
+app.add_middleware(rate_limit.UploadBodyLimit)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id", "Retry-After"],
 )
 
 
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """Root span per request; the trace id is returned in X-Trace-Id."""
+    with tracing.start_trace(
+        f"{request.method} {request.url.path}",
+        trace_id=request.headers.get("x-trace-id"),
+        **{"http.method": request.method, "http.path": request.url.path},
+    ) as root:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            root.name = f"{request.method} {route.path}"  # group by route, not by upload id
+        root.set_tag("http.status_code", response.status_code)
+        if response.status_code >= 500:
+            root.set_tag("error", str(response.status_code))
+        response.headers["X-Trace-Id"] = root.trace_id
+        return response
+
+
 app.include_router(lease_router.router)
 app.include_router(welcome_pack_router.router)
+app.include_router(admin_router.router)
 
 
 @app.get("/api/health")
@@ -41,3 +160,12 @@ async def health_check():
 @app.get("/api/auth/me")
 async def get_me(user_id: str = Depends(get_current_user)):
     return {"user_id": user_id}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: str | None = Header(default=None)):
+    """Prometheus scrape endpoint (every worker's metrics, see services/metrics.py)."""
+    if settings.metrics_token and authorization != f"Bearer {settings.metrics_token}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    body = await asyncio.to_thread(metrics.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
@@ -1,27 +1,127 @@
+"""
+Supabase JWT verification.
+
+ES256 tokens are checked against the project's JWKS. The key set is fetched
+at startup, refreshed in the background every settings.jwks_refresh_seconds
+and cached by kid; a token signed with a kid we haven't seen (key rotation)
+triggers an immediate refetch, at most once per JWKS_MIN_REFETCH_INTERVAL so
+made-up kids can't force a fetch per request.
+
+Verified tokens are kept in a bounded LRU keyed by their SHA-256 until they
+expire, so repeat requests from the same session skip signature checks. Each
+entry remembers the kid that signed it, so a rotation evicts only the tokens
+signed with a retired key.
+"""
+
+import asyncio
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
 
 import httpx
 import jwt
-from jwt import PyJWKClient, PyJWKClientError
+from jwt import PyJWKClientError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.config import settings
+from app.services import metrics
 
 logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
-# Cache the JWKS client (fetches public keys from Supabase)
-_jwks_client: PyJWKClient | None = None
+JWKS_FETCH_TIMEOUT = 5.0  # seconds
+JWKS_MIN_REFETCH_INTERVAL = 30.0  # seconds between on-demand refetches for unknown kids
+
+# ---------------------------------------------------------------------------
+# JWKS key cache
+# ---------------------------------------------------------------------------
+_signing_keys: dict[str, jwt.PyJWK] = {}  # kid → key
+_jwks_fetched_at = 0.0  # time.monotonic() of the last successful fetch
+_jwks_lock = threading.Lock()
+
+
+def refresh_jwks(min_interval: float = 0.0) -> int:
+    """
+    Fetch the project's JWKS and replace the key cache. Skipped if the last
+    fetch was less than `min_interval` seconds ago. Returns the key count.
+
+    Keys missing from the new set are dropped, and so are verified tokens
+    cached under them.
+    """
+    global _signing_keys, _jwks_fetched_at
+    with _jwks_lock:
+        if _jwks_fetched_at and time.monotonic() - _jwks_fetched_at < min_interval:
+            return len(_signing_keys)
+        response = httpx.get(
+            f"{settings.supabase_url}/auth/v1/.well-known/jwks.json",
+            timeout=JWKS_FETCH_TIMEOUT,
+        )
+        response.raise_for_status()
+        key_set = jwt.PyJWKSet.from_dict(response.json())
+        keys = {key.key_id: key for key in key_set.keys if key.key_id}
+        retired = _signing_keys.keys() - keys.keys()
+        _signing_keys = keys
+        _jwks_fetched_at = time.monotonic()
+
+    if retired:
+        with _verified_lock:
+            stale = [token_hash for token_hash, entry in _verified.items() if entry[2] in retired]
+            for token_hash in stale:
+                del _verified[token_hash]
+        logger.info(f"JWKS rotated — retired key(s): {sorted(retired)}, evicted {len(stale)} cached token(s)")
+    return len(keys)
+
 
+async def _get_signing_key(kid: str | None) -> jwt.PyJWK:
+    key = _signing_keys.get(kid) if kid else None
+    if key is None and kid:
+        # Unknown kid — the keys may have rotated since the last refresh
+        try:
+            await asyncio.to_thread(refresh_jwks, JWKS_MIN_REFETCH_INTERVAL)
+        except Exception as e:
+            logger.warning(f"JWKS refresh failed: {e}")
+        key = _signing_keys.get(kid)
+    if key is None:
+        raise PyJWKClientError(f'Unable to find a signing key that matches: "{kid}"')
+    return key
 
-def _get_jwks_client() -> PyJWKClient:
-    global _jwks_client
-    if _jwks_client is None:
-        jwks_url = f"{settings.supabase_url}/auth/v1/.well-known/jwks.json"
-        _jwks_client = PyJWKClient(jwks_url)
-    return _jwks_client
+
+# ---------------------------------------------------------------------------
+# Verified token cache
+# ---------------------------------------------------------------------------
+_verified: OrderedDict[str, tuple[str, float, str | None]] = OrderedDict()  # sha256(token) → (user_id, exp, kid)
+_verified_lock = threading.Lock()
+
+
+def _cached_user_id(token_hash: str) -> str | None:
+    with _verified_lock:
+        entry = _verified.get(token_hash)
+        if entry is None:
+            return None
+        user_id, exp, _ = entry
+        if exp <= time.time():
+            del _verified[token_hash]
+            return None  # verified again below, which reports the expiry
+        _verified.move_to_end(token_hash)
+        return user_id
+
+
+def _remember(token_hash: str, payload: dict, kid: str | None) -> None:
+    """Cache a verified token. kid is None for HS256 tokens, which no rotation retires."""
+    exp = payload.get("exp")
+    if settings.auth_token_cache_size <= 0 or not isinstance(exp, (int, float)):
+        return
+    with _verified_lock:
+        if kid is not None and kid not in _signing_keys:
+            return  # retired while this token was being verified
+        _verified[token_hash] = (payload["sub"], exp, kid)
+        _verified.move_to_end(token_hash)
+        while len(_verified) > settings.auth_token_cache_size:
+            _verified.popitem(last=False)
 
 
 async def get_current_user(
@@ -32,14 +132,21 @@ async def get_current_user(
     Supports both ES256 (new Supabase projects) and HS256 (legacy).
     """
     token = credentials.credentials
+    token_hash = hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    user_id = _cached_user_id(token_hash)
+    metrics.CACHE_LOOKUPS.inc(cache="auth_token", result="hit" if user_id else "miss")
+    if user_id:
+        return user_id
 
     try:
         # First try ES256 via JWKS (newer Supabase projects)
         header = jwt.get_unverified_header(token)
+        kid = None
 
         if header.get("alg") == "ES256":
-            jwks_client = _get_jwks_client()
-            signing_key = jwks_client.get_signing_key_from_jwt(token)
+            kid = header.get("kid")
+            signing_key = await _get_signing_key(kid)
             payload = jwt.decode(
                 token,
                 signing_key.key,
@@ -79,4 +186,15 @@ async def get_current_user(
             detail="Token missing user ID",
         )
 
+    _remember(token_hash, payload, kid)
+    return user_id
+
+
+async def require_admin(user_id: str = Depends(get_current_user)) -> str:
+    """FastAPI dependency for the admin API: the user must be in settings.admin_users."""
+    if user_id not in settings.admin_users:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
     return user_id
@@ -0,0 +1,288 @@
+"""
+Admission control for the lease endpoints.
+
+Each user gets a token bucket per endpoint class — "upload" (uploads and
+retries, which run the Gemini pipeline) and "read" (history, detail, audit,
+downloads) — so one user scripting uploads can't starve everyone else. Rejected requests
+get 429 with a Retry-After header.
+
+Lease upload bodies are admitted against a cap on bytes in flight in this
+process, and a smaller one per user, by UploadBodyLimit: an ASGI middleware
+that authenticates the upload, then counts its bytes as they stream through
+to FastAPI's multipart parser and stops the read as soon as a cap (or the
+per-request size limit) is exceeded. The bytes stay counted until the
+response is sent, since the pipeline holds the file in memory. Retries have
+no body but load the stored file, so limit_uploads counts them at the
+maximum file size.
+
+Buckets live in memory by default. With RATE_LIMIT_BACKEND=supabase they
+are kept in Postgres (take_rate_limit_token, migration 009) so limits hold
+across workers and nodes; if the database can't be reached the in-memory
+bucket is used instead. The in-flight byte cap is always per process — it
+protects this worker's memory.
+"""
+
+import asyncio
+import logging
+import math
+import time
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+from app.middleware.auth import get_current_user, security
+from app.services import metrics
+from app.services import supabase as db
+from app.services.lease_service import MAX_FILE_SIZE
+
+logger = logging.getLogger(__name__)
+
+MAX_BUCKETS = 10_000  # idle buckets are pruned beyond this
+INFLIGHT_RETRY_AFTER = 5  # seconds suggested when the in-flight byte cap is reached
+MAX_BODY_SIZE = MAX_FILE_SIZE + 64 * 1024  # largest file plus multipart framing
+BODY_METHODS = ("POST", "PUT", "PATCH")
+UPLOAD_PATH = "/api/lease/upload"  # the only route whose body counts against the in-flight caps
+BUSY_DETAIL = "Server busy processing other uploads — try again shortly"
+
+
+class TokenBucket:
+    """Refills at `rate` tokens per second up to `burst`; each request takes one."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def take(self, now: float) -> float:
+        """Take a token. Returns 0 if allowed, else seconds until one is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def is_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated_at) * self.rate >= self.burst
+
+
+_buckets: dict[tuple[str, str], TokenBucket] = {}
+_inflight_bytes = 0
+_inflight_by_user: dict[str, int] = {}
+
+REJECTED = metrics.Counter("rate_limit_rejections_total", "Requests rejected with 429", ("reason",))
+metrics.Gauge("upload_inflight_bytes", "Upload request bytes admitted and not yet finished", function=lambda: _inflight_bytes)
+
+
+def _limits(endpoint_class: str) -> tuple[float, float]:
+    """(tokens per second, burst) for an endpoint class."""
+    if endpoint_class == "upload":
+        return settings.rate_limit_upload_per_minute / 60, settings.rate_limit_upload_burst
+    return settings.rate_limit_read_per_minute / 60, settings.rate_limit_read_burst
+
+
+def _take_local(user_id: str, endpoint_class: str) -> float:
+    now = time.monotonic()
+    bucket = _buckets.get((user_id, endpoint_class))
+    if bucket is None:
+        if len(_buckets) >= MAX_BUCKETS:
+            # A full bucket behaves exactly like a new one, so it's safe to drop
+            for key in [key for key, b in _buckets.items() if b.is_full(now)]:
+                del _buckets[key]
+        bucket = _buckets[(user_id, endpoint_class)] = TokenBucket(*_limits(endpoint_class))
+    return bucket.take(now)
+
+
+async def _take(user_id: str, endpoint_class: str) -> float:
+    if settings.rate_limit_backend == "supabase":
+        rate, burst = _limits(endpoint_class)
+        try:
+            return await asyncio.to_thread(
+                db.take_rate_limit_token, f"{user_id}:{endpoint_class}", rate, burst,
+            )
+        except Exception as e:
+            logger.warning("Shared rate limit unavailable, using local bucket: %s", e)
+    return _take_local(user_id, endpoint_class)
+
+
+def _retry_after_header(retry_after: float) -> dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+
+def _too_many_requests(detail: str, retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers=_retry_after_header(retry_after),
+    )
+
+
+def _admit_bytes(size: int, own: int, user_id: str) -> bool:
+    """Count `size` more bytes of a request by `user_id` that already holds `own` bytes in flight."""
+    global _inflight_bytes
+    cap = settings.upload_inflight_max_mb * 1024 * 1024
+    user_bytes = _inflight_by_user.get(user_id, 0)
+    # One request is always admitted, however large, when nothing else is in flight
+    if _inflight_bytes - own and _inflight_bytes + size > cap:
+        return False
+    if user_bytes - own and user_bytes + size > settings.rate_limit_upload_burst * MAX_BODY_SIZE:
+        return False
+    _inflight_bytes += size
+    _inflight_by_user[user_id] = user_bytes + size
+    return True
+
+
+def _release_bytes(size: int, user_id: str | None) -> None:
+    global _inflight_bytes
+    if not size:
+        return
+    _inflight_bytes -= size
+    remaining = _inflight_by_user.pop(user_id, 0) - size
+    if remaining:
+        _inflight_by_user[user_id] = remaining
+
+
+def _content_length(scope) -> int | None:
+    for name, value in scope.get("headers", ()):
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Dependencies — use in place of get_current_user
+# ---------------------------------------------------------------------------
+
+async def limit_reads(user_id: str = Depends(get_current_user)) -> str:
+    """Authenticate and admit a read request. Returns the user_id."""
+    if settings.rate_limit_enabled:
+        retry_after = await _take(user_id, "read")
+        if retry_after:
+            REJECTED.inc(reason="read_rate")
+            raise _too_many_requests("Too many requests — slow down", retry_after)
+    return user_id
+
+
+async def limit_uploads(request: Request, user_id: str = Depends(get_current_user)):
+    """
+    Authenticate and admit an upload/retry. Yields the user_id.
+
+    Upload bodies were already counted against the in-flight cap by
+    UploadBodyLimit; a retry, which loads its file from storage instead,
+    counts as MAX_FILE_SIZE until the response is sent.
+    """
+    if not settings.rate_limit_enabled:
+        yield user_id
+        return
+
+    size = 0 if request.scope.get("state", {}).get("inflight_body_bytes") else MAX_FILE_SIZE
+    if size and not _admit_bytes(size, 0, user_id):
+        REJECTED.inc(reason="inflight_bytes")
+        raise _too_many_requests(BUSY_DETAIL, INFLIGHT_RETRY_AFTER)
+    try:
+        retry_after = await _take(user_id, "upload")
+        if retry_after:
+            REJECTED.inc(reason="upload_rate")
+            raise _too_many_requests("Upload rate limit reached — try again later", retry_after)
+        yield user_id
+    finally:
+        _release_bytes(size, user_id)
+
+
+# ---------------------------------------------------------------------------
+# Middleware — request body bytes
+# ---------------------------------------------------------------------------
+
+class UploadBodyLimit:
+    """
+    ASGI middleware admitting lease upload bodies against the in-flight byte
+    caps, and any request body against MAX_BODY_SIZE, as the chunks are
+    received — before any of the body is parsed.
+
+    Chunks are passed straight through to the app (the multipart parser
+    spools them), not buffered here; a chunk over a limit makes receive()
+    raise a 413/429 HTTPException, which FastAPI re-raises from its body
+    parsing. Uploads are authenticated before their first byte is counted,
+    so anonymous clients can't hold the cap, and one user may hold at most
+    rate_limit_upload_burst full-size bodies of it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in BODY_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        declared = _content_length(scope)
+        if declared is not None and declared > MAX_BODY_SIZE:
+            await _error_response(_too_large())(scope, receive, send)
+            return
+
+        user_id = None
+        if scope["method"] == "POST" and scope["path"] == UPLOAD_PATH:
+            try:
+                # The verified token is cached, so the route's own check is a hit
+                user_id = await get_current_user(await security(Request(scope)))
+            except HTTPException as e:
+                await _error_response(e)(scope, receive, send)
+                return
+        counting = user_id is not None and settings.rate_limit_enabled
+        received = counted = 0
+        rejection: HTTPException | None = None
+        response_started = False
+
+        async def counting_receive():
+            nonlocal received, counted, rejection
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            size = len(message.get("body", b""))
+            received += size
+            if received > MAX_BODY_SIZE:
+                rejection = _too_large()
+                raise rejection
+            if counting:
+                if not _admit_bytes(size, counted, user_id):
+                    REJECTED.inc(reason="inflight_bytes")
+                    rejection = _too_many_requests(BUSY_DETAIL, INFLIGHT_RETRY_AFTER)
+                    raise rejection
+                counted += size
+                scope["state"]["inflight_body_bytes"] = counted
+            return message
+
+        async def tracking_send(message):
+            nonlocal response_started
+            response_started = response_started or message["type"] == "http.response.start"
+            await send(message)
+
+        scope.setdefault("state", {})["inflight_body_bytes"] = 0
+        try:
+            await self.app(scope, counting_receive, tracking_send)
+        except HTTPException as e:
+            # Normally answered by FastAPI's exception handler; this covers a
+            # body read outside it
+            if e is not rejection or response_started:
+                raise
+            await _error_response(e)(scope, receive, send)
+        finally:
+            _release_bytes(counted, user_id)
+
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB.",
+    )
+
+
+def _error_response(error: HTTPException) -> JSONResponse:
+    return JSONResponse({"detail": error.detail}, status_code=error.status_code, headers=error.headers)
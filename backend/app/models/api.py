@@ -1,6 +1,8 @@
 """Pydantic response models for API endpoints."""
 
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 
 class LeaseUploadResponse(BaseModel):
@@ -8,6 +10,8 @@ class LeaseUploadResponse(BaseModel):
     status: str
     extracted_data: dict
     welcome_pack_url: str | None = None
+    duplicate_of: str | None = None  # upload_id of a near-duplicate lease, if any
+    replayed: bool = False  # True when an earlier identical upload's result was returned
 
     model_config = {"json_schema_extra": {
         "examples": [{
@@ -51,9 +55,53 @@ class LeaseDetailResponse(BaseModel):
     status: str
     created_at: str
     error_message: str | None = None
+    failed_stage: str | None = None  # pipeline stage a failed upload stopped at
+    retry_count: int = 0
     extracted_data: dict | None = None
     welcome_pack_url: str | None = None
 
 
+class ExtractionAuditResponse(BaseModel):
+    upload_id: str
+    raw_ai_response: dict  # raw Gemini output, model, attempts and pipeline metadata
+    created_at: str
+
+
+class ProfilingTriggerRequest(BaseModel):
+    count: int = Field(default=1, ge=1, le=100)  # pipeline runs to profile
+    mode: Literal["deterministic", "sampling"] = "deterministic"
+    user_id: str | None = None  # only this user's uploads
+    upload_id: str | None = None  # only this upload (retries)
+    sample_interval_ms: int = Field(default=5, ge=1, le=1000)
+    expires_in_minutes: int = Field(default=60, ge=1, le=24 * 60)
+
+
+class ProfilingTrigger(BaseModel):
+    remaining: int
+    mode: str
+    user_id: str | None = None
+    upload_id: str | None = None
+    sample_interval_ms: int
+    expires_at: float
+
+
+class ProfileInfo(BaseModel):
+    profile_id: str
+    mode: str
+    user_id: str
+    upload_id: str
+    file_name: str
+    file_hash: str | None = None  # SHA-256 of the lease file that was processed
+    created_at: str
+    duration_s: float
+    sections: list[dict]  # profiled functions and their wall time
+    samples: int = 0
+
+
+class ProfilingStatusResponse(BaseModel):
+    trigger: ProfilingTrigger | None = None
+    profiles: list[ProfileInfo]
+
+
 class ErrorResponse(BaseModel):
     detail: str
@@ -0,0 +1,82 @@
+"""
+Pre-fork server support — hooks called from gunicorn.conf.py.
+
+With preload_app the master imports app.main (settings, FastAPI app, PyMuPDF,
+python-docx, google-genai and the compiled prompts/regexes) once, then forks
+the workers, which share those pages copy-on-write. preload() runs in the
+master just before the first fork; after_fork() runs first thing in every
+worker and drops the per-process state inherited from the master, so each
+worker builds its own Supabase/Gemini HTTP pools, PDF process pool, event
+buffer, trace exporter thread and metrics. Nothing is carried over except
+read-only data.
+"""
+
+import asyncio
+import gc
+import logging
+import queue
+import threading
+
+from google import genai
+
+from app.middleware import auth, rate_limit
+from app.services import (
+    docgen,
+    gemini,
+    lease_events,
+    metrics,
+    profiling,
+    prompt_cache,
+    supabase,
+    text_extraction,
+    tracing,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def preload() -> None:
+    """Master, before fork: load shared read-only state and freeze the heap."""
+    template = docgen.load_template()
+    logger.info("Preloaded Welcome Pack template (%d bytes)", len(template))
+    # Objects surviving to here are never freed; keeping them out of the
+    # collector stops every worker's GC passes from dirtying the shared pages
+    gc.collect()
+    gc.freeze()
+
+
+def after_fork() -> None:
+    """Worker, right after fork: reset every per-process singleton."""
+    # Clients hold sockets and connection pools — one set per worker
+    supabase._client = None
+    if isinstance(gemini._client, genai.Client):
+        gemini._client = None  # a stand-in installed with use_client() is kept
+    text_extraction._pool = None
+
+    # Buffers, caches and the locks guarding them
+    lease_events._buffer = []
+    lease_events._lock = asyncio.Lock()
+    lease_events._flush_task = None
+    auth._signing_keys = {}
+    auth._jwks_fetched_at = 0.0
+    auth._jwks_lock = threading.Lock()
+    auth._verified.clear()
+    auth._verified_lock = threading.Lock()
+    prompt_cache._entries.clear()
+    prompt_cache._lock = threading.Lock()
+    rate_limit._buckets.clear()
+    rate_limit._inflight_bytes = 0
+    rate_limit._inflight_by_user.clear()
+
+    # Threads do not survive fork — the exporter is restarted on first use
+    tracing._queue = queue.SimpleQueue()
+    tracing._wakeup = threading.Event()
+    tracing._write_lock = threading.Lock()
+    tracing._worker = None
+    tracing._worker_lock = threading.Lock()
+
+    profiling._trigger = None
+    profiling._running = 0
+    profiling._trigger_lock = threading.Lock()
+
+    metrics.reset()
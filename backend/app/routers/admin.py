@@ -0,0 +1,85 @@
+"""Admin router — on-demand profiling of live pipeline runs."""
+
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.middleware.auth import require_admin
+from app.models.api import (
+    ProfilingTriggerRequest,
+    ProfilingStatusResponse,
+    ProfilingTrigger,
+    ProfileInfo,
+    ErrorResponse,
+)
+from app.services import profiling
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+ADMIN_RESPONSES = {403: {"model": ErrorResponse, "description": "Not an admin"}}
+
+
+def _status() -> ProfilingStatusResponse:
+    trigger = profiling.current_trigger()
+    return ProfilingStatusResponse(
+        trigger=ProfilingTrigger(**vars(trigger)) if trigger else None,
+        profiles=[ProfileInfo(**profile) for profile in profiling.list_profiles()],
+    )
+
+
+@router.get("/profiling", response_model=ProfilingStatusResponse, responses=ADMIN_RESPONSES)
+async def get_profiling_status(admin_id: str = Depends(require_admin)):
+    """The armed profiling trigger (if any) and the stored profiles."""
+    return _status()
+
+
+@router.post("/profiling", response_model=ProfilingStatusResponse, responses=ADMIN_RESPONSES)
+async def arm_profiling(
+    request: ProfilingTriggerRequest,
+    admin_id: str = Depends(require_admin),
+):
+    """
+    Profile the next `count` pipeline runs (uploads and retries), optionally
+    only those of `user_id` or `upload_id`. Replaces any armed trigger.
+    """
+    profiling.arm(
+        count=request.count,
+        mode=request.mode,
+        user_id=request.user_id,
+        upload_id=request.upload_id,
+        sample_interval_ms=request.sample_interval_ms,
+        expires_in_s=request.expires_in_minutes * 60,
+    )
+    logger.info("Profiling armed by %s", admin_id)
+    return _status()
+
+
+@router.delete("/profiling", response_model=ProfilingStatusResponse, responses=ADMIN_RESPONSES)
+async def disarm_profiling(admin_id: str = Depends(require_admin)):
+    """Cancel the armed profiling trigger."""
+    profiling.disarm()
+    return _status()
+
+
+@router.get(
+    "/profiling/{profile_id}",
+    responses={**ADMIN_RESPONSES, 404: {"model": ErrorResponse, "description": "Not found"}},
+)
+async def download_profile(profile_id: str, admin_id: str = Depends(require_admin)):
+    """Download a stored profile (.prof for deterministic, .folded for sampling)."""
+    found = profiling.get_profile(profile_id)
+    if not found or not found[1].is_file():
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found",
+        )
+    metadata, path = found
+    return FileResponse(
+        path,
+        media_type="application/octet-stream",
+        filename=f"{metadata['upload_id']}-{path.name}",
+        headers={"X-File-Hash": metadata.get("file_hash") or ""},
+    )
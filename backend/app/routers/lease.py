@@ -1,14 +1,16 @@
 """Lease upload router — thin layer over LeaseService."""
 
 import logging
+import re
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile, status
 
-from app.middleware.auth import get_current_user
+from app.middleware.rate_limit import limit_reads, limit_uploads
 from app.models.api import (
     LeaseUploadResponse,
     LeaseHistoryItem,
     LeaseDetailResponse,
+    ExtractionAuditResponse,
     ErrorResponse,
 )
 from app.services.lease_service import lease_service, LeaseProcessingError
@@ -18,21 +20,38 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/lease", tags=["lease"])
 
+# Also keeps the key safe to embed in a PostgREST or= filter
+IDEMPOTENCY_KEY_PATTERN = re.compile(r"[A-Za-z0-9_.:-]{1,255}")
+
 
 @router.post(
     "/upload",
     response_model=LeaseUploadResponse,
     responses={
-        422: {"model": ErrorResponse, "description": "Invalid file type"},
+        409: {"model": ErrorResponse, "description": "Duplicate upload still processing"},
+        422: {"model": ErrorResponse, "description": "Invalid file type or Idempotency-Key"},
         413: {"model": ErrorResponse, "description": "File too large"},
+        429: {"model": ErrorResponse, "description": "Rate limited or server busy (see Retry-After)"},
         500: {"model": ErrorResponse, "description": "Processing failed"},
     },
 )
 async def upload_lease(
     file: UploadFile,
-    user_id: str = Depends(get_current_user),
+    user_id: str = Depends(limit_uploads),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
 ):
-    """Upload a lease file and extract all 14 fields via the AI pipeline."""
+    """
+    Upload a lease file and extract all 14 fields via the AI pipeline.
+
+    Retries are safe: a repeat of the same Idempotency-Key (or the same file)
+    returns the original upload's result instead of processing it again.
+    """
+    if idempotency_key is not None and not IDEMPOTENCY_KEY_PATTERN.fullmatch(idempotency_key):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key must be 1-255 characters of letters, digits, '-', '_', '.' or ':'",
+        )
+
     # Determine file type from extension
     file_name = file.filename or "unknown"
     extension = file_name.rsplit(".", 1)[-1].lower() if "." in file_name else ""
@@ -46,6 +65,7 @@ async def upload_lease(
             file_name=file_name,
             file_bytes=file_bytes,
             file_type=extension,
+            idempotency_key=idempotency_key,
         )
         return result
 
@@ -60,6 +80,42 @@ async def upload_lease(
                 status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
                 detail=e.message,
             )
+        if e.stage == "idempotency":
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=e.message,
+            )
+        if e.stage == "conflict":
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.message)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Processing failed: {e.message}",
+        )
+
+
+@router.post(
+    "/{upload_id}/retry",
+    response_model=LeaseUploadResponse,
+    responses={
+        404: {"model": ErrorResponse, "description": "Not found"},
+        409: {"model": ErrorResponse, "description": "Not failed, retry in progress, or file never stored"},
+        429: {"model": ErrorResponse, "description": "Rate limited or server busy (see Retry-After)"},
+        500: {"model": ErrorResponse, "description": "Processing failed"},
+    },
+)
+async def retry_lease(
+    upload_id: str,
+    user_id: str = Depends(limit_uploads),
+):
+    """Resume a failed upload from its first incomplete stage."""
+    try:
+        return await lease_service.resume_lease(upload_id, user_id)
+
+    except LeaseProcessingError as e:
+        if e.stage == "not_found":
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=e.message)
+        if e.stage == "conflict":
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=e.message)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Processing failed: {e.message}",
@@ -69,9 +125,12 @@ async def upload_lease(
 @router.get(
     "/history",
     response_model=list[LeaseHistoryItem],
+    responses={
+        429: {"model": ErrorResponse, "description": "Rate limited (see Retry-After)"},
+    },
 )
 async def get_lease_history(
-    user_id: str = Depends(get_current_user),
+    user_id: str = Depends(limit_reads),
 ):
     """List all lease uploads for the current user, most recent first."""
     uploads = db.list_lease_uploads(user_id)
@@ -99,11 +158,12 @@ async def get_lease_history(
     response_model=LeaseDetailResponse,
     responses={
         404: {"model": ErrorResponse, "description": "Not found"},
+        429: {"model": ErrorResponse, "description": "Rate limited (see Retry-After)"},
     },
 )
 async def get_lease_detail(
     upload_id: str,
-    user_id: str = Depends(get_current_user),
+    user_id: str = Depends(limit_reads),
 ):
     """Get full details for a single lease upload."""
     lease = db.get_lease_upload(upload_id, user_id)
@@ -135,6 +195,42 @@ async def get_lease_detail(
         status=lease["status"],
         created_at=lease["created_at"],
         error_message=lease.get("error_message"),
+        failed_stage=lease.get("failed_stage"),
+        retry_count=lease.get("retry_count") or 0,
         extracted_data=extracted_dict,
         welcome_pack_url=welcome_pack_url,
     )
+
+
+@router.get(
+    "/{upload_id}/audit",
+    response_model=ExtractionAuditResponse,
+    responses={
+        404: {"model": ErrorResponse, "description": "Not found"},
+        429: {"model": ErrorResponse, "description": "Rate limited (see Retry-After)"},
+    },
+)
+async def get_lease_audit(
+    upload_id: str,
+    user_id: str = Depends(limit_reads),
+):
+    """Get the raw AI response recorded for a lease upload's extraction."""
+    lease = db.get_lease_upload(upload_id, user_id)
+    if not lease:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Lease upload not found",
+        )
+
+    audit = db.get_extraction_audit(upload_id)
+    if not audit:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No extraction audit recorded for this upload",
+        )
+
+    return ExtractionAuditResponse(
+        upload_id=upload_id,
+        raw_ai_response=audit["raw_ai_response"],
+        created_at=audit["created_at"],
+    )
@@ -5,7 +5,7 @@ import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import Response
 
-from app.middleware.auth import get_current_user
+from app.middleware.rate_limit import limit_reads
 from app.models.api import ErrorResponse
 from app.services import supabase as db
 
@@ -22,11 +22,12 @@ DOCX_CONTENT_TYPE = (
     "/download/{upload_id}",
     responses={
         404: {"model": ErrorResponse, "description": "Not found"},
+        429: {"model": ErrorResponse, "description": "Rate limited (see Retry-After)"},
     },
 )
 async def download_welcome_pack(
     upload_id: str,
-    user_id: str = Depends(get_current_user),
+    user_id: str = Depends(limit_reads),
 ):
     """Download the generated Welcome Pack .docx for a lease upload."""
     # Check lease belongs to this user
@@ -20,6 +20,7 @@ from docx import Document
 from docx.oxml.ns import qn
 
 from app.config import settings
+from app.services import profiling, tracing
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +30,20 @@ logger = logging.getLogger(__name__)
 
 TEMPLATE_PATH = Path(settings.template_path)
 
+# Template file contents, read once per process — or once in the pre-fork
+# master (app/prefork.py) so every worker shares the same pages
+_template_bytes: bytes | None = None
+
+
+def load_template() -> bytes:
+    """The Welcome Pack template as bytes, read from TEMPLATE_PATH on first use."""
+    global _template_bytes
+    if _template_bytes is None:
+        if not TEMPLATE_PATH.exists():
+            raise FileNotFoundError(f"Welcome Pack template not found at {TEMPLATE_PATH}")
+        _template_bytes = TEMPLATE_PATH.read_bytes()
+    return _template_bytes
+
 # ---------------------------------------------------------------------------
 # Field name → template placeholder mapping
 # ---------------------------------------------------------------------------
@@ -218,6 +233,8 @@ def _remove_special_conditions_section(doc: Document) -> None:
 # Main generation function
 # ---------------------------------------------------------------------------
 
+@tracing.traced("docgen.generate_welcome_pack")
+@profiling.profiled
 def generate_welcome_pack(extracted_data: dict) -> bytes:
     """
     Generate a Welcome Pack .docx from extracted lease data.
@@ -228,10 +245,7 @@ def generate_welcome_pack(extracted_data: dict) -> bytes:
     Returns:
         The generated .docx file as bytes.
     """
-    if not TEMPLATE_PATH.exists():
-        raise FileNotFoundError(f"Welcome Pack template not found at {TEMPLATE_PATH}")
-
-    doc = Document(str(TEMPLATE_PATH))
+    doc = Document(io.BytesIO(load_template()))
 
     # Step 1: Handle special_conditions — remove section or keep it
     special_conditions = extracted_data.get("special_conditions")
@@ -0,0 +1,85 @@
+"""
+Local field locator — finds where the lease fields live without calling Gemini.
+
+Used by progressive PDF extraction: pages are read in windows and reading
+stops once every field in REQUIRED_FIELDS has been located in the text read
+so far. A field counts as located when its label is followed by a value
+(e.g. "Tenant | Raj Patel", "Bond ... $4,983.34"); the locator does not
+extract values itself — that is still Gemini's job.
+
+Special conditions are located once their section is closed (a later
+heading follows it) or declared empty ("Nil", "No special conditions"), so
+a section that runs onto the next page is never cut off.
+"""
+
+import re
+
+from app.services.lease_diff import DATE_PATTERN
+
+# Label followed by a separator, then a value on the same or the next line
+_VALUE = r"\s*(?:[:|]\s*|\n\s*)\S"
+# Parties named in prose: "Emma Whitfield (hereinafter referred to as the Tenant)"
+_REFERRED_TO_AS = r"|\b(?:referred to as|called)\s+(?:the\s+)?[\"“]?"
+
+_LOCATORS: dict[str, re.Pattern] = {
+    field: re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    for field, pattern in {
+        "tenant_name": (
+            r"^(?:\d+\s*\|\s*)?(?:tenants?|lessees?)(?:\s*\(s\))?(?:\s+names?)?" + _VALUE
+            + _REFERRED_TO_AS + r"(?:tenants?|lessees?)\b"
+        ),
+        "property_address": (
+            r"^(?:\d+\s*\|\s*)?(?:property address|premises|address)" + _VALUE
+            + r"|\b(?:VIC|NSW|QLD|SA|WA|TAS|ACT|NT)\s+\d{4}\b"
+        ),
+        "lease_start_date": r"\b(?:commence\w*|start)\b[^\n]{0,40}?(?:\n\s*)?(?:" + DATE_PATTERN + ")",
+        "lease_end_date": r"\b(?:expir\w*|end(?:s|ing)?)\b[^\n]{0,40}?(?:\n\s*)?(?:" + DATE_PATTERN + ")",
+        "rent_amount": r"\brent\b[^\n]{0,60}?(?:\n\s*)?\$\s?\d",
+        "bond_amount": r"\bbond\b[^\n]{0,60}?(?:\n\s*)?\$\s?\d",
+        "landlord_name": (
+            r"^(?:\d+\s*\|\s*)?(?:landlord|lessor)(?:'s)?(?:\s+names?)?" + _VALUE
+            + _REFERRED_TO_AS + r"(?:landlord|lessor)\b"
+        ),
+        "property_manager_email": r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+",
+        "property_manager_phone": r"(?:\+61|\(0\d\)|\b0\d)[\d ()]{7,14}\d",
+    }.items()
+}
+
+_SPECIAL_CONDITIONS = re.compile(r"^.{0,40}\bspecial conditions?\b.*$", re.IGNORECASE | re.MULTILINE)
+_NO_SPECIAL_CONDITIONS = re.compile(r"\bnil\b|\bnone\b|\bno special conditions\b|\bnot applicable\b", re.IGNORECASE)
+# A later section heading: "12. GENERAL PROVISIONS", "Clause 11 — Signatures",
+# "Part D — Execution" or a short all-caps line such as "OBLIGATIONS"
+_HEADING = re.compile(
+    r"^(?:(?:(?i:part)\s+[A-Za-z]|(?i:clause)\s+\d+|\d+\.)\s*[—–:-]?\s*[A-Z][\w ,&/()'’-]{2,50}"
+    r"|[A-Z][A-Z &/()—–-]{3,40})$",
+    re.MULTILINE,
+)
+
+# Fields whose location must be known before reading can stop. Occupants,
+# pets, parking and the manager's name may legitimately be absent from a
+# lease, so waiting for them would mean reading every page.
+REQUIRED_FIELDS = [*_LOCATORS, "special_conditions"]
+
+
+def _special_conditions_closed(text: str) -> bool:
+    for match in _SPECIAL_CONDITIONS.finditer(text):
+        following = text[match.end():].lstrip("\n").split("\n", 2)
+        if _NO_SPECIAL_CONDITIONS.search(match.group(0)) or _NO_SPECIAL_CONDITIONS.search(following[0]):
+            return True
+        if _HEADING.search(text, match.end()):
+            return True
+    return False
+
+
+def locate_fields(text: str) -> set[str]:
+    """Fields in REQUIRED_FIELDS whose label and value appear in `text`."""
+    located = {field for field, pattern in _LOCATORS.items() if pattern.search(text)}
+    if _special_conditions_closed(text):
+        located.add("special_conditions")
+    return located
+
+
+def unresolved_fields(text: str) -> list[str]:
+    """REQUIRED_FIELDS not yet located in `text`, in declaration order."""
+    located = locate_fields(text)
+    return [field for field in REQUIRED_FIELDS if field not in located]
@@ -1,23 +1,33 @@
 """
-Gemini 2.0 Flash service for structured lease field extraction.
+Gemini service for structured lease field extraction.
 
 Sends extracted lease text to Gemini and returns validated JSON with all 14 fields.
-Includes defensive JSON parsing, post-extraction validation, and retry with
-correction prompt.
+Includes defensive JSON parsing, post-extraction validation, a configurable
+model ladder (cheap tier first, escalate on failed checks), and retry with
+correction prompt on the final tier.
 """
 
+import asyncio
 import json
 import logging
 import re
+import time
 from datetime import datetime
 
 from google import genai
 
 from app.config import settings
 from app.models.lease import ExtractedLeaseData
+from app.services import gemini_cassette, metrics, prompt_cache, tracing
 
 logger = logging.getLogger(__name__)
 
+REQUEST_SECONDS = metrics.Histogram("gemini_request_seconds", "Gemini generate_content latency", ("model",))
+REQUESTS = metrics.Counter("gemini_requests_total", "Gemini generate_content calls", ("model", "outcome"))
+TOKENS = metrics.Counter("gemini_tokens_total", "Gemini tokens by type (prompt, cached, output)", ("model", "type"))
+RETRIES = metrics.Counter("gemini_retries_total", "Correction-prompt retries on the final tier", ("model",))
+ESCALATIONS = metrics.Counter("gemini_escalations_total", "Leases escalated past a model tier", ("model",))
+
 # ---------------------------------------------------------------------------
 # Gemini client setup
 # ---------------------------------------------------------------------------
@@ -27,10 +37,23 @@ _client = None
 def _get_client():
     global _client
     if _client is None:
-        _client = genai.Client(api_key=settings.gemini_api_key)
+        mode = settings.gemini_cassette_mode
+        real = None if mode == "replay" else genai.Client(api_key=settings.gemini_api_key)
+        _client = gemini_cassette.from_settings(real) if mode else real
     return _client
 
 
+def use_client(client) -> None:
+    """
+    Install a client in place of the real Gemini client.
+
+    Anything exposing `models.generate_content(model=..., contents=...)` works,
+    which lets benchmarks and local runs swap in a stand-in without network.
+    """
+    global _client
+    _client = client
+
+
 # ---------------------------------------------------------------------------
 # Prompts
 # ---------------------------------------------------------------------------
@@ -81,6 +104,44 @@ Please fix only the problematic fields and return the corrected full JSON object
 Do not change fields that were correct.
 Return ONLY the JSON object. No markdown fences. No explanation."""
 
+# Static instruction block of EXTRACTION_PROMPT (everything before the lease text).
+# When a prompt cache is live this is served from the cache and only
+# LEASE_TEXT_PROMPT is sent per request.
+EXTRACTION_INSTRUCTIONS = EXTRACTION_PROMPT.split("LEASE AGREEMENT TEXT:")[0].format()
+
+LEASE_TEXT_PROMPT = """LEASE AGREEMENT TEXT:
+{lease_text}"""
+
+BATCH_EXTRACTION_PROMPT = """You will receive {count} Australian residential lease agreements. Each one starts with a "=== LEASE <n> ===" marker.
+
+Extract the fields from each lease independently, following the instructions below. Return ONLY a valid JSON array containing exactly {count} objects — one per lease, in the same order — and add a "lease_index" key to each object holding that lease's <n> as an integer. No markdown, no explanation, no extra text.
+
+INSTRUCTIONS FOR EACH LEASE:
+
+{instructions}
+LEASE AGREEMENTS:
+
+{leases}"""
+
+PARTIAL_EXTRACTION_PROMPT = """You are a precise document extraction assistant specialising in Australian residential lease agreements.
+
+This lease is a renewal or amendment of a lease we have already processed. Only the sections below changed. Re-extract ONLY the following {count} fields from these sections. Return ONLY a valid JSON object with exactly these keys — no markdown, no explanation, no extra text.
+
+FIELDS TO EXTRACT:
+
+{field_specs}
+
+Previously extracted values for these fields (keep a value if the changed sections do not alter it):
+{prior_values}
+
+Apply the same rules as a full extraction: dates as 'DD Month YYYY', rent with its frequency, special_conditions as JSON null when there are none, exact terminology from the lease, and never invent data.
+
+CHANGED SECTIONS OF THE LEASE:
+{sections}"""
+
+# Per-field instructions, parsed from the FIELDS TO EXTRACT block of EXTRACTION_PROMPT
+FIELD_SPECS: dict[str, str] = dict(re.findall(r'^  "(\w+)": "(.*)",?$', EXTRACTION_INSTRUCTIONS, re.MULTILINE))
+
 # ---------------------------------------------------------------------------
 # Required keys
 # ---------------------------------------------------------------------------
@@ -97,16 +158,27 @@ REQUIRED_KEYS = [
 # Defensive JSON parser
 # ---------------------------------------------------------------------------
 
-def _parse_llm_response(raw: str) -> dict:
-    """Strip markdown fences if present, then parse JSON."""
+def _strip_fences(raw: str) -> str:
+    """Remove leading/trailing markdown code fences from an LLM response."""
     cleaned = re.sub(r"^```(?:json)?\s*", "", raw.strip())
-    cleaned = re.sub(r"\s*```$", "", cleaned)
+    return re.sub(r"\s*```$", "", cleaned)
 
+
+def _parse_llm_response(raw: str) -> dict:
+    """Strip markdown fences if present, then parse JSON."""
     try:
-        data = json.loads(cleaned)
+        data = json.loads(_strip_fences(raw))
     except json.JSONDecodeError as e:
         raise ValueError(f"LLM returned invalid JSON: {e}\nRaw: {raw[:500]}")
 
+    return _normalize_fields(data)
+
+
+def _normalize_fields(data: dict) -> dict:
+    """Check all required keys are present and normalise nulls and dates."""
+    if not isinstance(data, dict):
+        raise ValueError(f"LLM response is not a JSON object: {type(data).__name__}")
+
     missing = [k for k in REQUIRED_KEYS if k not in data]
     if missing:
         raise ValueError(f"LLM response missing fields: {missing}")
@@ -118,8 +190,8 @@ def _parse_llm_response(raw: str) -> dict:
 
     # Normalize dates: strip leading zeros (e.g., "01 June 2026" → "1 June 2026")
     for date_field in ("lease_start_date", "lease_end_date"):
-        val = data.get(date_field, "")
-        if val and val[0] == "0":
+        val = data.get(date_field)
+        if isinstance(val, str) and val and val[0] == "0":
             data[date_field] = val.lstrip("0")
 
     return data
@@ -139,7 +211,7 @@ def _validate_fields(fields: dict) -> list[str]:
         if val:
             try:
                 datetime.strptime(val, "%d %B %Y")
-            except ValueError:
+            except (ValueError, TypeError):
                 warnings.append(f"{date_field} '{val}' is not in 'DD Month YYYY' format")
 
     try:
@@ -147,70 +219,205 @@ def _validate_fields(fields: dict) -> list[str]:
         end = datetime.strptime(fields["lease_end_date"], "%d %B %Y")
         if end <= start:
             warnings.append("lease_end_date is before or equal to lease_start_date")
-    except (ValueError, KeyError):
+    except (ValueError, KeyError, TypeError):
         pass
 
-    # Rent frequency
-    rent = fields.get("rent_amount", "")
-    if "per" not in rent.lower():
+    # Rent frequency (a model can return null for any field)
+    rent = fields.get("rent_amount") or ""
+    if "per" not in str(rent).lower():
         warnings.append(f"rent_amount '{rent}' may be missing frequency (per month/fortnight)")
 
     # Bond format
-    bond = fields.get("bond_amount", "")
-    if not bond.startswith("$"):
+    bond = fields.get("bond_amount") or ""
+    if not str(bond).startswith("$"):
         warnings.append(f"bond_amount '{bond}' does not start with '$'")
 
     return warnings
 
 
 # ---------------------------------------------------------------------------
-# Main extraction function
+# Local cross-checks against the source text
 # ---------------------------------------------------------------------------
 
-async def extract_fields(lease_text: str) -> dict:
+def _cross_check_fields(fields: dict, lease_text: str) -> list[str]:
     """
-    Send lease text to Gemini 2.0 Flash and return validated extracted fields.
+    Check that verbatim fields actually appear in the lease text.
 
-    Returns a dict with all 14 fields + 'raw_ai_response' for auditability.
+    Cheap model tiers occasionally hallucinate contact details or amounts that
+    still pass format validation — these checks catch that without another call.
     """
-    client = _get_client()
+    warnings: list[str] = []
+    haystack = " ".join(lease_text.split()).lower()
 
-    # First attempt
-    prompt = EXTRACTION_PROMPT.format(lease_text=lease_text)
-    logger.info("Sending lease text to Gemini for extraction (%d chars)", len(lease_text))
+    email = str(fields.get("property_manager_email") or "")
+    if email and email.lower() not in haystack:
+        warnings.append(f"property_manager_email '{email}' not found in lease text")
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt,
-    )
-    raw_text = response.text
-    logger.info("Gemini response received (%d chars)", len(raw_text))
+    for name in str(fields.get("tenant_name") or "").split(" & "):
+        name = " ".join(name.split())
+        if name and name.lower() not in haystack:
+            warnings.append(f"tenant_name part '{name}' not found in lease text")
 
-    fields = _parse_llm_response(raw_text)
+    bond_digits = re.sub(r"\.00$", "", str(fields.get("bond_amount") or "").lstrip("$"))
+    if bond_digits and bond_digits not in haystack and bond_digits.replace(",", "") not in haystack:
+        warnings.append(f"bond_amount '{fields.get('bond_amount')}' not found in lease text")
 
-    # Validate
-    warnings = _validate_fields(fields)
+    occupants = fields.get("num_occupants") or ""
+    if not str(occupants).strip().isdigit():
+        warnings.append(f"num_occupants '{occupants}' is not an integer")
 
-    # Retry once if validation fails
-    if warnings:
-        logger.warning("Extraction validation warnings: %s", warnings)
-        correction = CORRECTION_PROMPT.format(
-            warnings="\n".join(f"- {w}" for w in warnings),
-            previous_json=json.dumps(fields, indent=2),
+    return warnings
+
+
+# ---------------------------------------------------------------------------
+# Main extraction function
+# ---------------------------------------------------------------------------
+
+def _usage(response) -> dict:
+    """Pull token counts off a response (absent on stand-in clients)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt_tokens": usage.prompt_token_count,
+        "cached_tokens": usage.cached_content_token_count,
+        "output_tokens": usage.candidates_token_count,
+    }
+
+
+@tracing.traced("gemini.generate_content")
+async def _generate(
+    client, model: str, contents: str, cached_content: str | None = None
+) -> tuple[str, float, dict]:
+    """
+    Call Gemini and return (response text, latency in seconds, token usage).
+
+    The client call blocks for the whole model round trip, so it runs in a
+    thread — the event loop keeps serving other requests meanwhile.
+    """
+    kwargs: dict = {}
+    if cached_content:
+        kwargs["config"] = {"cached_content": cached_content}
+
+    start = time.perf_counter()
+    try:
+        response = await asyncio.to_thread(
+            client.models.generate_content,
+            model=model,
+            contents=contents,
+            **kwargs,
         )
-        retry_response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=correction,
+    except Exception:
+        REQUESTS.inc(model=model, outcome="error")
+        raise
+    latency = time.perf_counter() - start
+    usage = _usage(response)
+    tracing.set_tags(model=model, **{key: value for key, value in usage.items() if value})
+    REQUESTS.inc(model=model, outcome="ok")
+    REQUEST_SECONDS.observe(latency, model=model)
+    for kind in ("prompt", "cached", "output"):
+        if usage.get(f"{kind}_tokens"):
+            TOKENS.inc(usage[f"{kind}_tokens"], model=model, type=kind)
+    return response.text, latency, usage
+
+
+def warm_prompt_cache() -> None:
+    """Create the instruction caches for every model tier (called on startup)."""
+    prompt_cache.warm(_get_client(), settings.gemini_models, EXTRACTION_INSTRUCTIONS)
+
+
+def refresh_prompt_cache() -> None:
+    """Extend instruction caches that are close to expiry."""
+    prompt_cache.refresh_all(_get_client(), settings.gemini_models, EXTRACTION_INSTRUCTIONS)
+
+
+@tracing.traced("gemini.extract_fields")
+async def extract_fields(lease_text: str) -> dict:
+    """
+    Send lease text up the Gemini model ladder and return validated extracted fields.
+
+    Each lease starts on the cheapest tier in settings.gemini_models. A tier's
+    answer is accepted when it parses, passes _validate_fields and the local
+    cross-checks; otherwise the lease escalates to the next tier. The final
+    tier keeps the original behaviour: one correction retry on validation
+    warnings, then accept.
+
+    Returns a dict with all 14 fields + 'raw_ai_response' for auditability.
+    """
+    client = _get_client()
+    models = settings.gemini_models
+    if not models:
+        raise ValueError("GEMINI_MODEL_LADDER is empty — configure at least one model")
+    prompt = EXTRACTION_PROMPT.format(lease_text=lease_text)
+    attempts: list[dict] = []
+
+    for tier, model in enumerate(models):
+        is_last = tier == len(models) - 1
+        logger.info(
+            "Sending lease text to %s for extraction (tier %d/%d, %d chars)",
+            model, tier + 1, len(models), len(lease_text),
         )
-        retry_text = retry_response.text
-        logger.info("Gemini retry response received (%d chars)", len(retry_text))
+
+        cached_content = prompt_cache.get_cached_content(model, EXTRACTION_INSTRUCTIONS)
+        if settings.gemini_prompt_cache:
+            metrics.CACHE_LOOKUPS.inc(cache="gemini_prompt", result="hit" if cached_content else "miss")
+        contents = LEASE_TEXT_PROMPT.format(lease_text=lease_text) if cached_content else prompt
+
+        raw_text, latency, usage = await _generate(client, model, contents, cached_content)
+        logger.info("Gemini response received from %s (%d chars, %.1fs)", model, len(raw_text), latency)
+        attempt = {
+            "model": model,
+            "tier": tier,
+            "latency_s": round(latency, 3),
+            "cached_prompt": bool(cached_content),
+            "usage": usage,
+        }
+        attempts.append(attempt)
 
         try:
-            retry_fields = _parse_llm_response(retry_text)
-            fields.update(retry_fields)
-            raw_text = retry_text
+            fields = _parse_llm_response(raw_text)
         except ValueError as e:
-            logger.warning("Retry parse failed, using original: %s", e)
+            attempt["warnings"] = [str(e)[:200]]
+            if is_last:
+                raise
+            logger.warning("Tier %s returned unparseable output, escalating: %s", model, e)
+            ESCALATIONS.inc(model=model)
+            continue
+
+        warnings = _validate_fields(fields)
+        cross_warnings = _cross_check_fields(fields, lease_text)
+        attempt["warnings"] = warnings + cross_warnings
+
+        if not warnings and not cross_warnings:
+            break
+
+        if not is_last:
+            logger.warning("Tier %s failed checks, escalating: %s", model, warnings + cross_warnings)
+            ESCALATIONS.inc(model=model)
+            continue
+
+        if cross_warnings:
+            logger.warning("Cross-check warnings on final tier %s: %s", model, cross_warnings)
+
+        # Final tier: retry once with a correction prompt if validation fails
+        if warnings:
+            logger.warning("Extraction validation warnings: %s", warnings)
+            correction = CORRECTION_PROMPT.format(
+                warnings="\n".join(f"- {w}" for w in warnings),
+                previous_json=json.dumps(fields, indent=2),
+            )
+            retry_text, retry_latency, _ = await _generate(client, model, correction)
+            RETRIES.inc(model=model)
+            metrics.PIPELINE_STAGE_SECONDS.observe(retry_latency, stage="gemini_retry")
+            logger.info("Gemini retry response received (%d chars, %.1fs)", len(retry_text), retry_latency)
+            attempt["retry_latency_s"] = round(retry_latency, 3)
+
+            try:
+                retry_fields = _parse_llm_response(retry_text)
+                fields.update(retry_fields)
+                raw_text = retry_text
+            except ValueError as e:
+                logger.warning("Retry parse failed, using original: %s", e)
 
     # Pydantic validation
     validated = ExtractedLeaseData(**fields)
@@ -222,6 +429,265 @@ async def extract_fields(lease_text: str) -> dict:
         logger.info("special_conditions present — section will be included")
 
     result = validated.model_dump()
-    result["raw_ai_response"] = {"raw_text": raw_text, "parsed": fields}
+    result["raw_ai_response"] = {
+        "raw_text": raw_text,
+        "parsed": fields,
+        "model": model,
+        "escalated": tier > 0,
+        "attempts": attempts,
+    }
+
+    return result
+
+
+# ---------------------------------------------------------------------------
+# Batch extraction (bulk backfills)
+# ---------------------------------------------------------------------------
+
+_BATCH_JOB_DONE_STATES = {"JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"}
+
+
+def _compact_text(text: str) -> str:
+    """Collapse runs of whitespace and drop blank lines to shrink the prompt."""
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def _pack_batches(texts: list[str]) -> list[list[int]]:
+    """Greedily group text indices under the batch size and character budget."""
+    batches: list[list[int]] = []
+    current: list[int] = []
+    current_chars = 0
+    for i, text in enumerate(texts):
+        if current and (
+            len(current) >= settings.gemini_batch_size
+            or current_chars + len(text) > settings.gemini_batch_max_chars
+        ):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(i)
+        current_chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _build_batch_prompt(texts: list[str]) -> str:
+    leases = "\n\n".join(f"=== LEASE {n} ===\n{text}" for n, text in enumerate(texts, start=1))
+    return BATCH_EXTRACTION_PROMPT.format(
+        count=len(texts),
+        instructions=EXTRACTION_INSTRUCTIONS,
+        leases=leases,
+    )
+
+
+def _demux_batch_response(raw: str, count: int) -> dict[int, dict]:
+    """
+    Split a JSON array response into {lease_index: item}.
+
+    Items with a missing, out-of-range or duplicate lease_index are dropped so
+    the corresponding lease falls back to single-lease extraction.
+    """
+    try:
+        data = json.loads(_strip_fences(raw))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Batch response is not valid JSON: {e}")
+    if not isinstance(data, list):
+        raise ValueError(f"Batch response is not a JSON array: {type(data).__name__}")
+
+    items: dict[int, dict] = {}
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        index = item.pop("lease_index", None)
+        if isinstance(index, int) and 1 <= index <= count and index not in items:
+            items[index] = item
+    return items
+
+
+async def _run_batch_job(client, model: str, prompts: list[str], poll_interval: float) -> list[str]:
+    """Submit packed prompts as one provider batch job and wait for the results."""
+    job = await asyncio.to_thread(
+        client.batches.create,
+        model=model,
+        src=[{"contents": [{"role": "user", "parts": [{"text": p}]}]} for p in prompts],
+        config={"display_name": f"lease-backfill-{len(prompts)}-requests"},
+    )
+    logger.info("Submitted Gemini batch job %s (%d requests)", job.name, len(prompts))
+
+    while getattr(job.state, "name", job.state) not in _BATCH_JOB_DONE_STATES:
+        await asyncio.sleep(poll_interval)
+        job = await asyncio.to_thread(client.batches.get, name=job.name)
+
+    state = getattr(job.state, "name", job.state)
+    if state != "JOB_STATE_SUCCEEDED":
+        raise RuntimeError(f"Gemini batch job {job.name} finished in state {state}")
+
+    return [
+        (r.response.text if r.response is not None else "") or ""
+        for r in job.dest.inlined_responses
+    ]
+
+
+@tracing.traced("gemini.extract_fields_batch")
+async def extract_fields_batch(
+    lease_texts: list[str],
+    use_batch_job: bool = False,
+    poll_interval: float = 30.0,
+) -> list[dict | None]:
+    """
+    Extract fields for many leases with as few Gemini calls as possible.
+
+    Lease texts are compacted and packed several per request on the first
+    model tier (or submitted as one provider batch job when use_batch_job is
+    set). Each item of the JSON array response is run through the same
+    parsing, validation and cross-checks as extract_fields; only items that
+    fail are re-extracted one at a time via extract_fields.
+
+    Returns results in input order, each shaped like extract_fields' output.
+    An entry is None if even the single-lease fallback failed.
+    """
+    if not settings.gemini_models:
+        raise ValueError("GEMINI_MODEL_LADDER is empty — configure at least one model")
+
+    client = _get_client()
+    model = settings.gemini_models[0]
+    compacted = [_compact_text(text) for text in lease_texts]
+    batches = _pack_batches(compacted)
+    prompts = [_build_batch_prompt([compacted[i] for i in batch]) for batch in batches]
+
+    logger.info(
+        "Batch extraction: %d leases packed into %d request(s) on %s",
+        len(lease_texts), len(prompts), model,
+    )
+
+    if use_batch_job:
+        raw_texts = await _run_batch_job(client, model, prompts, poll_interval)
+    else:
+        raw_texts = []
+        for prompt in prompts:
+            raw_text, latency, _ = await _generate(client, model, prompt)
+            logger.info("Batch response received (%d chars, %.1fs)", len(raw_text), latency)
+            raw_texts.append(raw_text)
+
+    results: list[dict | None] = [None] * len(lease_texts)
+    for batch, raw_text in zip(batches, raw_texts):
+        try:
+            items = _demux_batch_response(raw_text, len(batch))
+        except ValueError as e:
+            logger.warning("Batch of %d unusable, falling back to single calls: %s", len(batch), e)
+            continue
+
+        for position, index in enumerate(batch, start=1):
+            item = items.get(position)
+            if item is None:
+                continue
+            try:
+                fields = _normalize_fields(item)
+                warnings = _validate_fields(fields) + _cross_check_fields(fields, lease_texts[index])
+                if warnings:
+                    logger.warning("Batch item %d failed checks: %s", index, warnings)
+                    continue
+                validated = ExtractedLeaseData(**fields)
+            except Exception as e:
+                # Any bad item only sends that lease to the single-lease fallback
+                logger.warning("Batch item %d invalid: %s", index, e)
+                continue
+
+            result = validated.model_dump()
+            result["raw_ai_response"] = {
+                "raw_text": json.dumps(item),
+                "parsed": fields,
+                "model": model,
+                "escalated": False,
+                "batch": {"size": len(batch), "position": position},
+            }
+            results[index] = result
+
+    fallback = [i for i, result in enumerate(results) if result is None]
+    if fallback:
+        logger.info("Batch extraction: %d/%d leases need single-lease fallback", len(fallback), len(lease_texts))
+    for index in fallback:
+        try:
+            results[index] = await extract_fields(lease_texts[index])
+        except Exception:
+            logger.exception("Single-lease fallback failed for lease %d", index)
+
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Partial re-extraction (renewals / amendments)
+# ---------------------------------------------------------------------------
+
+@tracing.traced("gemini.extract_changed_fields")
+async def extract_changed_fields(
+    lease_text: str,
+    sections: list[str],
+    field_names: list[str],
+    prior_fields: dict,
+) -> dict:
+    """
+    Re-extract only `field_names` from the changed sections of a renewal.
 
+    Unchanged fields are carried over from `prior_fields`; no Gemini call
+    is made when `field_names` is empty. The merged result must pass
+    _validate_fields and the cross-checks against the full new lease text,
+    otherwise ValueError is raised and the caller should fall back to
+    extract_fields.
+
+    Returns the same shape as extract_fields.
+    """
+    if not settings.gemini_models:
+        raise ValueError("GEMINI_MODEL_LADDER is empty — configure at least one model")
+
+    client = _get_client()
+    model = settings.gemini_models[0]
+    prompt = PARTIAL_EXTRACTION_PROMPT.format(
+        count=len(field_names),
+        field_specs="\n".join(f'  "{name}": "{FIELD_SPECS.get(name, "")}"' for name in field_names),
+        prior_values=json.dumps({name: prior_fields.get(name) for name in field_names}, indent=2),
+        sections="\n".join(sections),
+    )
+    logger.info(
+        "Renewal: re-extracting %s from %d changed paragraph(s)",
+        field_names or "no fields", len(sections),
+    )
+
+    attempts: list[dict] = []
+    raw_text = ""
+    changed: dict = {}
+    if field_names:
+        raw_text, latency, usage = await _generate(client, model, prompt)
+        logger.info("Gemini partial response received (%d chars, %.1fs)", len(raw_text), latency)
+        attempts.append({"model": model, "tier": 0, "latency_s": round(latency, 3), "usage": usage})
+
+        try:
+            changed = json.loads(_strip_fences(raw_text))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"LLM returned invalid JSON: {e}\nRaw: {raw_text[:500]}")
+        if not isinstance(changed, dict):
+            raise ValueError("Partial extraction did not return a JSON object")
+    missing = [name for name in field_names if name not in changed]
+    if missing:
+        raise ValueError(f"Partial extraction missing fields: {missing}")
+
+    merged = {key: prior_fields.get(key) for key in REQUIRED_KEYS}
+    merged.update({name: changed[name] for name in field_names})
+    fields = _normalize_fields(merged)
+
+    warnings = _validate_fields(fields) + _cross_check_fields(fields, lease_text)
+    if warnings:
+        raise ValueError(f"Merged renewal fields failed checks: {warnings}")
+
+    validated = ExtractedLeaseData(**fields)
+    result = validated.model_dump()
+    result["raw_ai_response"] = {
+        "raw_text": raw_text,
+        "parsed": fields,
+        "model": model if field_names else None,
+        "escalated": False,
+        "attempts": attempts,
+        "reextracted_fields": field_names,
+    }
     return result
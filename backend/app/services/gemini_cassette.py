@@ -0,0 +1,202 @@
+"""
+Record/replay cassette for Gemini generate_content calls.
+
+GEMINI_CASSETTE_MODE=record wraps the real client: every call goes to
+Gemini as usual and the response (text, token usage, latency) is appended
+to GEMINI_CASSETTE_PATH as one JSON line, keyed by a hash of the model and
+the full prompt. GEMINI_CASSETTE_MODE=replay answers from that file
+instead — no network or API key — so prompt, parser and validation changes
+can be evaluated against hundreds of recorded leases in seconds.
+
+A prompt that was never recorded raises CassetteMiss (the model, key and
+prompt size are in the message and kept in Cassette.misses) rather than
+falling through to the real API, so an edited prompt shows up as misses
+instead of silently costing money. Replay can also add latency (the
+recorded one or a fixed value) and fail a fraction of calls with a 503, to
+exercise timeouts and the pipeline's retry path.
+
+The prompt cache and provider batch jobs are not supported: prompt_cache
+sends the instructions inline while a cassette is active, so each key
+covers everything the model saw.
+"""
+
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+from google.genai import errors
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("record", "replay")
+USAGE_FIELDS = ("prompt_token_count", "cached_content_token_count", "candidates_token_count")
+
+
+class CassetteMiss(LookupError):
+    """Replay was asked for a prompt that is not in the cassette."""
+
+
+def request_key(model: str, contents: str) -> str:
+    """Stable key for one generate_content request."""
+    return hashlib.sha256(f"{model}\n{contents}".encode()).hexdigest()[:32]
+
+
+# ---------------------------------------------------------------------------
+# Cassette file
+# ---------------------------------------------------------------------------
+
+class Cassette:
+    """Recorded responses by request key, backed by a JSON-lines file."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.entries: dict[str, dict] = {}
+        self.hits = 0
+        self.recorded = 0
+        self.misses: list[dict] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Cassette":
+        """Read an existing cassette (a missing file is an empty cassette). Later lines win."""
+        cassette = cls(path)
+        if cassette.path.exists():
+            with open(cassette.path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        cassette.entries[entry["key"]] = entry
+        return cassette
+
+    def get(self, model: str, contents: str) -> dict:
+        key = request_key(model, contents)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses.append({"key": key, "model": model, "prompt_chars": len(contents)})
+            else:
+                self.hits += 1
+        if entry is None:
+            raise CassetteMiss(
+                f"No recording for {model} prompt {key} ({len(contents)} chars) in {self.path} — "
+                "the prompt changed or this lease was never recorded; re-run with GEMINI_CASSETTE_MODE=record"
+            )
+        return entry
+
+    def add(self, model: str, contents: str, text: str, usage: dict, latency: float) -> None:
+        entry = {
+            "key": request_key(model, contents),
+            "model": model,
+            "prompt_chars": len(contents),
+            "text": text,
+            "usage": usage,
+            "latency_s": round(latency, 3),
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            self.entries[entry["key"]] = entry
+            self.recorded += 1
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+    def summary(self) -> str:
+        return (
+            f"{self.hits} hit(s), {len(self.misses)} miss(es), {self.recorded} recorded "
+            f"({len(self.entries)} entries in {self.path})"
+        )
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class _Unsupported:
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        raise NotImplementedError(f"Gemini {self._name} are not available through the cassette")
+
+
+class CassetteClient:
+    """
+    Drop-in for genai.Client's `models.generate_content`.
+
+    mode "record" calls `inner` and saves each response; mode "replay" serves
+    from the cassette. `latency` is "" (none), "recorded" or seconds;
+    `error_rate` is the fraction of replayed calls that fail with a 503.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        mode: str = "replay",
+        inner=None,
+        latency: str = "",
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown Gemini cassette mode {mode!r} — expected one of {', '.join(MODES)}")
+        if mode == "record" and inner is None:
+            raise ValueError("Recording a Gemini cassette needs a real client")
+        self.cassette = cassette
+        self.mode = mode
+        self.inner = inner
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+        self.caches = _Unsupported("context caches")
+        self.batches = _Unsupported("batch jobs")
+
+    def generate_content(self, *, model: str, contents: str, config=None):
+        if self.mode == "record":
+            return self._record(model, contents, config)
+
+        entry = self.cassette.get(model, contents)
+        if self.latency:
+            time.sleep(entry["latency_s"] if self.latency == "recorded" else float(self.latency))
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise errors.ServerError(
+                503, {"error": {"code": 503, "message": "Injected by the Gemini cassette", "status": "UNAVAILABLE"}}
+            )
+        return SimpleNamespace(
+            text=entry["text"],
+            usage_metadata=SimpleNamespace(**{field: entry["usage"].get(field) for field in USAGE_FIELDS}),
+        )
+
+    def _record(self, model: str, contents: str, config):
+        kwargs = {"config": config} if config else {}
+        start = time.perf_counter()
+        response = self.inner.models.generate_content(model=model, contents=contents, **kwargs)
+        latency = time.perf_counter() - start
+        meta = getattr(response, "usage_metadata", None)
+        usage = {field: getattr(meta, field, None) for field in USAGE_FIELDS}
+        self.cassette.add(model, contents, response.text or "", usage, latency)
+        return response
+
+
+def from_settings(inner=None) -> CassetteClient:
+    """CassetteClient configured from the GEMINI_CASSETTE_* settings."""
+    cassette = Cassette.load(settings.gemini_cassette_path)
+    logger.info(
+        "Gemini cassette: %s %s (%d entries)",
+        settings.gemini_cassette_mode, cassette.path, len(cassette.entries),
+    )
+    return CassetteClient(
+        cassette,
+        mode=settings.gemini_cassette_mode,
+        inner=inner,
+        latency=settings.gemini_cassette_latency,
+        error_rate=settings.gemini_cassette_error_rate,
+    )
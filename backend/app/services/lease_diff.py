@@ -0,0 +1,175 @@
+"""
+Paragraph fingerprinting and diffing for lease renewals and amendments.
+
+A renewal is usually the previous lease with new dates and rent. Each
+paragraph of the extracted text is fingerprinted so a prior lease for the
+same tenant/property can be found by overlap, then the two texts are diffed
+paragraph by paragraph to work out which of the 14 fields could have changed.
+"""
+
+import difflib
+import hashlib
+import re
+
+DATE_PATTERN = (
+    r"\b\d{1,2}(?:st|nd|rd|th)?\s+(?:jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)[a-z]*,?\s+\d{4}\b"
+    r"|\b\d{1,2}/\d{1,2}/\d{2,4}\b"
+)
+
+# Label/keyword patterns that place a paragraph in scope for a field. Kept
+# tight (labels rather than any mention) because words like "tenant" and
+# "landlord" appear in nearly every clause.
+FIELD_PATTERNS: dict[str, re.Pattern] = {
+    field: re.compile(pattern, re.IGNORECASE)
+    for field, pattern in {
+        "tenant_name": r"^(?:\d+\s*\|\s*)?(?:tenants?|lessees?)\s*(?:[:|]|$)",
+        "property_address": (
+            r"(?:property address|premises)\s*[:|]|^(?:\d+\s*\|\s*)?address\s*\|"
+            r"|\b(?:VIC|NSW|QLD|SA|WA|TAS|ACT|NT)\s+\d{4}\b"
+        ),
+        "lease_start_date": DATE_PATTERN + r"|\bcommence",
+        "lease_end_date": DATE_PATTERN + r"|\bexpir|\bterm\s*[:|]",
+        "rent_amount": r"\brent\b|\bper\s+(?:week|fortnight|month)\b",
+        "bond_amount": r"\bbond\b",
+        "num_occupants": r"\boccupants?\b|\breside\b",
+        "pet_permission": r"\bpets?\b|\banimals?\b|\bcats?\b|\bdogs?\b",
+        "parking": r"\bparking\b|\bcar\s*(?:park|space)|\bgarage\b",
+        "special_conditions": r"\bspecial conditions?\b|^\([a-z]{1,3}\)",
+        "landlord_name": r"^(?:\d+\s*\|\s*)?(?:landlord|lessor)\s*(?:[:|]|$)",
+        "property_manager_name": r"\bcontact\s*:|\bproperty manager\b",
+        "property_manager_email": r"@",
+        "property_manager_phone": r"\+61|\bphone\b|\b0\d(?:\s?\d){8}\b",
+    }.items()
+}
+
+# Prior values outside this length range are matched by pattern only — short
+# ones ("1", "Nil") appear everywhere, long ones rarely survive verbatim
+_MIN_VALUE_MATCH_LEN = 5
+_MAX_VALUE_MATCH_LEN = 80
+
+
+def split_paragraphs(text: str) -> list[str]:
+    """Split extracted lease text into non-empty paragraphs (one per line)."""
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def paragraph_hash(paragraph: str) -> str:
+    """Whitespace- and case-insensitive fingerprint of a single paragraph."""
+    normalized = " ".join(paragraph.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def fingerprint(text: str) -> list[str]:
+    """Ordered paragraph fingerprints for a lease text."""
+    return [paragraph_hash(p) for p in split_paragraphs(text)]
+
+
+def probe_sample(hashes: list[str], limit: int = 200) -> list[str]:
+    """Evenly spaced distinct subset of fingerprints, small enough for a lookup query."""
+    distinct = list(dict.fromkeys(hashes))
+    if len(distinct) <= limit:
+        return distinct
+    step = len(distinct) / limit
+    return [distinct[int(i * step)] for i in range(limit)]
+
+
+def similarity(a: list[str], b: list[str]) -> float:
+    """Jaccard similarity of two fingerprint lists."""
+    set_a, set_b = set(a), set(b)
+    if not set_a and not set_b:
+        return 1.0
+    return len(set_a & set_b) / len(set_a | set_b)
+
+
+def diff_paragraphs(prior_text: str, new_text: str, context: int = 1) -> dict:
+    """
+    Diff two lease texts at paragraph granularity.
+
+    Returns a dict with:
+      - inserted: paragraphs only present in the new text
+      - removed: paragraphs only present in the prior text
+      - sections: inserted paragraphs plus `context` neighbours on each side
+        (and the neighbours of pure deletions), in new-text order — this is
+        what gets sent to the model
+    """
+    prior = split_paragraphs(prior_text)
+    new = split_paragraphs(new_text)
+    matcher = difflib.SequenceMatcher(
+        a=[paragraph_hash(p) for p in prior],
+        b=[paragraph_hash(p) for p in new],
+        autojunk=False,
+    )
+
+    section_indices: set[int] = set()
+    inserted: list[str] = []
+    removed: list[str] = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        removed.extend(prior[i1:i2])
+        inserted.extend(new[j1:j2])
+        section_indices.update(range(max(0, j1 - context), min(len(new), j2 + context)))
+
+    return {
+        "inserted": inserted,
+        "removed": removed,
+        "sections": [new[i] for i in sorted(section_indices)],
+    }
+
+
+def _normalize(value: str) -> str:
+    return " ".join(value.lower().replace(",", " ").split())
+
+
+def mentions(text: str, value) -> bool:
+    """Whether `value` appears in `text`, ignoring case, whitespace and commas."""
+    return isinstance(value, str) and bool(value.strip()) and _normalize(value) in _normalize(text)
+
+
+def same_tenancy(prior_fields: dict, text: str) -> bool:
+    """
+    Whether `text` names the prior lease's tenant(s) and property.
+
+    Leases drawn up from the same template score well above the similarity
+    threshold, so a close match alone does not make a renewal. Every tenant
+    name and the street line of the address (up to the first comma — the
+    suburb and postcode are often in separate table rows) must appear in
+    the new text.
+    """
+    tenant = prior_fields.get("tenant_name")
+    address = prior_fields.get("property_address")
+    if not isinstance(tenant, str) or not isinstance(address, str):
+        return False
+    names = [name for name in re.split(r",|&|\band\b", tenant) if name.strip()]
+    street = address.split(",")[0]
+    return bool(names) and all(mentions(text, value) for value in [*names, street])
+
+
+def affected_fields(diff: dict, prior_fields: dict) -> list[str]:
+    """
+    Fields that may have changed between the prior and new lease text.
+
+    A field is affected when a changed paragraph matches its label pattern
+    or contains its prior value. Changed paragraphs that match no field at
+    all are treated as possible special conditions.
+    """
+    changed = diff["inserted"] + diff["removed"]
+    affected: set[str] = set()
+
+    for paragraph in changed:
+        lowered = " ".join(paragraph.lower().split())
+        matched = False
+        for field, pattern in FIELD_PATTERNS.items():
+            value = prior_fields.get(field)
+            value_hit = (
+                isinstance(value, str)
+                and _MIN_VALUE_MATCH_LEN <= len(value) <= _MAX_VALUE_MATCH_LEN
+                and " ".join(value.lower().split()) in lowered
+            )
+            if value_hit or pattern.search(paragraph):
+                affected.add(field)
+                matched = True
+        if not matched:
+            affected.add("special_conditions")
+
+    return [field for field in FIELD_PATTERNS if field in affected]
@@ -0,0 +1,167 @@
+"""
+Pipeline stage events — the append-only lease_events log.
+
+Each pipeline stage records one event (stage, resulting status, duration).
+Events are buffered in memory and inserted in a single batch FLUSH_DELAY
+seconds after the first one, off the request's critical path, so stages
+that finish close together share one round trip. A trigger on lease_events
+applies the latest event of each upload to lease_uploads.status.
+
+Failed events are followed by an awaited flush() so the final status is
+persisted before the pipeline returns; a completing upload instead take()s
+its pending events and writes them with its results in one transaction.
+
+A failed insert is retried on a backoff timer (not just when the next event
+arrives) while the database is unreachable. When the database rejects the
+batch itself, e.g. a foreign-key violation for a deleted upload, rows are
+retried one at a time and the ones it still rejects are logged and dropped,
+so one bad row can't hold back every later event.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from app.services import metrics, tracing
+from app.services import supabase as db
+
+logger = logging.getLogger(__name__)
+
+FLUSH_DELAY = 0.2      # seconds events wait so adjacent transitions share one insert
+MAX_BUFFERED = 10_000  # events kept while the database is unreachable
+RETRY_DELAY = 1.0      # seconds before retrying a failed insert, doubled per failure
+RETRY_MAX_DELAY = 60.0
+
+_buffer: list[dict] = []
+_lock = asyncio.Lock()
+_flush_task: asyncio.Task | None = None
+
+STAGE_FAILURES = metrics.Counter("lease_pipeline_failures_total", "Pipeline failures by stage", ("stage",))
+DROPPED = metrics.Counter("lease_events_dropped_total", "Stage events never written", ("reason",))
+metrics.Gauge("lease_events_buffered", "Stage events waiting to be written", function=lambda: len(_buffer))
+
+
+def event(
+    upload_id: str,
+    user_id: str,
+    stage: str,
+    status: str | None,
+    duration_s: float | None = None,
+    error: str | None = None,
+) -> dict:
+    """A lease_events row. status None records a duration without changing the upload's status."""
+    if status == "failed":
+        STAGE_FAILURES.inc(stage=stage)
+    elif duration_s is not None:
+        metrics.PIPELINE_STAGE_SECONDS.observe(duration_s, stage=stage)
+    if duration_s is not None:
+        tracing.record(f"stage.{stage}", duration_s, error=error, status=status or "-")
+    return {
+        "lease_upload_id": upload_id,
+        "user_id": user_id,
+        "stage": stage,
+        "status": status,
+        "duration_ms": round(duration_s * 1000) if duration_s is not None else None,
+        "error_message": error,
+        "occurred_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def record(
+    upload_id: str,
+    user_id: str,
+    stage: str,
+    status: str | None,
+    duration_s: float | None = None,
+    error: str | None = None,
+) -> None:
+    """Buffer one stage event and schedule a background flush."""
+    _buffer.append(event(upload_id, user_id, stage, status, duration_s, error))
+    _trim_and_schedule()
+
+
+def requeue(events: list[dict]) -> None:
+    """Put events returned by take() back in the buffer (their write failed)."""
+    _buffer[:0] = events
+    _trim_and_schedule()
+
+
+def _trim_and_schedule() -> None:
+    if len(_buffer) > MAX_BUFFERED:
+        DROPPED.inc(len(_buffer) - MAX_BUFFERED, reason="buffer_full")
+        del _buffer[: len(_buffer) - MAX_BUFFERED]
+        logger.warning("lease_events buffer full — dropped oldest events")
+    _schedule_flush()
+
+
+def _schedule_flush() -> None:
+    global _flush_task
+    if _flush_task is not None and not _flush_task.done():
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # no event loop (scripts) — written by the next flush()
+    _flush_task = loop.create_task(_flush_later())
+
+
+async def _flush_later() -> None:
+    """Flush after FLUSH_DELAY, then keep retrying with backoff until the buffer is empty."""
+    delay, retry_delay = FLUSH_DELAY, RETRY_DELAY
+    while True:
+        await asyncio.sleep(delay)
+        try:
+            await flush()
+            # Events recorded while the insert ran saw this task still
+            # running and didn't schedule their own flush
+            delay, retry_delay = FLUSH_DELAY, RETRY_DELAY
+        except Exception as e:
+            logger.warning("Failed to write %d lease events, retrying in %.1fs: %s", len(_buffer), retry_delay, e)
+            delay, retry_delay = retry_delay, min(retry_delay * 2, RETRY_MAX_DELAY)
+        if not _buffer:
+            return
+
+
+async def flush() -> None:
+    """
+    Insert every buffered event in one batch. Events stay buffered if the
+    database can't be reached; if it rejects the batch, rows are inserted
+    one at a time and the rows it rejects are dropped.
+    """
+    async with _lock:
+        if not _buffer:
+            return
+        rows = _buffer[:]
+        del _buffer[:len(rows)]
+        try:
+            await asyncio.to_thread(db.insert_lease_events, rows)
+            return
+        except Exception as e:
+            if not db.is_rejected_row(e):
+                _buffer[:0] = rows
+                raise
+            logger.warning("Batch of %d lease events rejected, inserting one at a time: %s", len(rows), e)
+
+        # In order, so the status trigger still sees each upload's latest event last
+        for i, row in enumerate(rows):
+            try:
+                await asyncio.to_thread(db.insert_lease_events, [row])
+            except Exception as e:
+                if not db.is_rejected_row(e):
+                    _buffer[:0] = rows[i:]
+                    raise
+                DROPPED.inc(reason="rejected")
+                logger.error("Dropped lease event rejected by the database (%s): %s", e, row)
+
+
+async def take(upload_id: str) -> list[dict]:
+    """
+    Remove and return the buffered events of one upload, for the caller to
+    write itself (finalize_lease_upload writes them with the final status).
+    Waits for a flush in progress so no earlier event can land afterwards.
+    """
+    async with _lock:
+        taken = [row for row in _buffer if row["lease_upload_id"] == upload_id]
+        if taken:
+            _buffer[:] = [row for row in _buffer if row["lease_upload_id"] != upload_id]
+        return taken
@@ -1,24 +1,61 @@
 """
 LeaseService — orchestrates the full lease processing pipeline.
 
-Pipeline stages (status updated in Supabase at each step):
-  uploaded → extracting → extracted → generating → complete
-
-On failure at any stage, status is set to 'failed' with an error_message.
+Pipeline stages (each recorded as a lease_events row; a trigger derives
+lease_uploads.status from the latest event):
+  uploaded → extracting → generating → complete
+
+The lease file is uploaded to storage while its text is extracted, and
+awaited together with the Welcome Pack upload. Everything produced after
+the Gemini call — extracted_data, welcome_packs and the 'complete' status —
+is written by one finalize_lease_upload RPC, so a completed upload never
+has partial rows.
+
+On failure at any stage, status is set to 'failed' with an error_message
+and the failed stage. The pipeline checkpoints its outputs — storage path
+(lease_uploads.file_path), extracted text + hash (lease_texts) and, when a
+later stage fails, the parsed fields (extracted_data) — so resume_lease
+can pick up from the first incomplete stage without repeating the Gemini
+call.
 """
 
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
 import logging
 import time
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
 
+from app.config import settings
+from app.models.lease import ExtractedLeaseData
+from app.services import field_locator, lease_diff, lease_events, metrics, near_duplicates, profiling, tracing
 from app.services import supabase as db
-from app.services.text_extraction import extract_text
-from app.services.gemini import extract_fields
+from app.services.text_extraction import extract_text, iter_pdf_windows
+from app.services.gemini import extract_changed_fields, extract_fields
 from app.services.docgen import generate_welcome_pack
 
 logger = logging.getLogger(__name__)
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
 ALLOWED_TYPES = {"pdf", "docx"}
+CONTENT_TYPES = {
+    "pdf": "application/pdf",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+PENDING_PATH_SEGMENT = "/pending/"  # file_path placeholder on rows created before the file was stored
+IDEMPOTENCY_POLL_INTERVAL = 1.0  # seconds between status checks of a duplicate in flight elsewhere
+
+EXTRACTED_FIELD_KEYS = list(ExtractedLeaseData.model_fields)
+
+UPLOADS_IN_FLIGHT = metrics.Gauge("lease_uploads_in_flight", "Uploads running the pipeline in this process")
+REPLAYED = metrics.Counter("lease_uploads_replayed_total", "Duplicate uploads answered from an earlier upload")
+
+# What the model writes for a required field it could not find. "Not permitted"
+# and "Not included" are real answers (pets, parking), so they are not listed.
+PLACEHOLDER_VALUES = {"", "n/a", "unknown", "not specified", "not stated", "not provided", "not found"}
 
 
 class LeaseProcessingError(Exception):
@@ -30,143 +67,508 @@ class LeaseProcessingError(Exception):
         super().__init__(message)
 
 
+def _is_placeholder(value) -> bool:
+    return value is None or str(value).strip().rstrip(".").lower() in PLACEHOLDER_VALUES
+
+
 class LeaseService:
     """Orchestrates lease upload → extraction → docgen → complete pipeline."""
 
+    def __init__(self):
+        self._resuming: set[str] = set()  # upload_ids with a resume in progress
+        # (user_id, "content"|"key", value) → (future, content_hash) of in-flight uploads
+        self._inflight: dict[tuple[str, str, str], tuple[asyncio.Future, str]] = {}
+
     async def process_lease(
         self,
         user_id: str,
         file_name: str,
         file_bytes: bytes,
         file_type: str,
+        idempotency_key: str | None = None,
     ) -> dict:
         """
         Run the full processing pipeline for a single lease.
 
+        Idempotent per user: a request with the same Idempotency-Key, or the
+        same file content, attaches to the earlier upload instead of
+        processing it again. Concurrent duplicates in this process share one
+        pipeline run; duplicates of a completed upload get its stored result
+        (replayed=True).
+
         Returns a dict with upload_id, status, extracted_data, and welcome_pack_url.
         """
+        # ------------------------------------------------------------------
+        # Stage 1: Validate
+        # ------------------------------------------------------------------
+        self._validate(file_name, file_bytes, file_type)
+        content_hash = hashlib.sha256(file_bytes).hexdigest()
+
+        keys = [(user_id, "content", content_hash)]
+        if idempotency_key:
+            keys.append((user_id, "key", idempotency_key))
+        for key in keys:
+            if key in self._inflight:
+                future, inflight_hash = self._inflight[key]
+                if inflight_hash != content_hash:
+                    raise LeaseProcessingError(
+                        "Idempotency-Key was already used for a different file", stage="idempotency",
+                    )
+                logger.info("[%s] Duplicate request — attaching to in-flight upload", file_name)
+                REPLAYED.inc()
+                return {**await asyncio.shield(future), "replayed": True}
+
+        future = asyncio.get_running_loop().create_future()
+        for key in keys:
+            self._inflight[key] = (future, content_hash)
+        UPLOADS_IN_FLIGHT.inc()
+        try:
+            result = await self._process_once(
+                user_id, file_name, file_bytes, file_type, content_hash, idempotency_key,
+            )
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # mark retrieved when nobody else was waiting
+            raise
+        finally:
+            UPLOADS_IN_FLIGHT.dec()
+            for key in keys:
+                self._inflight.pop(key, None)
+
+    async def _process_once(
+        self,
+        user_id: str,
+        file_name: str,
+        file_bytes: bytes,
+        file_type: str,
+        content_hash: str,
+        idempotency_key: str | None,
+    ) -> dict:
+        """Attach to an earlier upload of the same file/key, or process a new one."""
+        existing = db.find_lease_upload(user_id, content_hash, idempotency_key)
+        if existing:
+            return await self._attach_to_upload(existing, user_id, file_bytes, content_hash, idempotency_key)
+
         upload_id: str | None = None
         pipeline_start = time.time()
+        stage = "storage"
 
         try:
             # ------------------------------------------------------------------
-            # Stage 1: Validate
+            # Stage 2: Create DB record + store file → status: uploaded
             # ------------------------------------------------------------------
-            self._validate(file_name, file_bytes, file_type)
+            # The id is generated here so the row is created with its final
+            # storage path — no follow-up update once the file is stored
+            new_upload_id = str(uuid4())
+            storage_path = db.lease_file_path(user_id, new_upload_id, file_name)
+            try:
+                record = db.create_lease_upload(
+                    user_id=user_id,
+                    file_name=file_name,
+                    file_type=file_type,
+                    file_path=storage_path,
+                    file_size=len(file_bytes),
+                    content_hash=content_hash,
+                    idempotency_key=idempotency_key,
+                    upload_id=new_upload_id,
+                )
+            except Exception as e:
+                # Another process inserted the same upload first — attach to it
+                existing = db.find_lease_upload(user_id, content_hash, idempotency_key)
+                if db.is_unique_violation(e) and existing:
+                    return await self._attach_to_upload(
+                        existing, user_id, file_bytes, content_hash, idempotency_key,
+                    )
+                raise
+            upload_id = record["id"]
 
-            # ------------------------------------------------------------------
-            # Stage 2: Store file + create DB record → status: uploaded
-            # ------------------------------------------------------------------
-            logger.info("[%s] Stage 1/6: Storing file in Supabase Storage", file_name)
-            stage_start = time.time()
+        except LeaseProcessingError:
+            raise
+        except Exception as e:
+            await self._mark_failed(file_name, upload_id, user_id, stage, e)
+            raise LeaseProcessingError(message=str(e), stage=stage)
 
-            file_path_stub = f"{user_id}/pending/{file_name}"
-            record = db.create_lease_upload(
+        with profiling.session(user_id, upload_id, file_name, content_hash):
+            return await self._run_stages(
+                upload_id=upload_id,
                 user_id=user_id,
                 file_name=file_name,
                 file_type=file_type,
-                file_path=file_path_stub,
-                file_size=len(file_bytes),
-            )
-            upload_id = record["id"]
-
-            content_type = (
-                "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                if file_type == "docx"
-                else "application/pdf"
-            )
-            storage_path = db.upload_lease_file(
-                user_id=user_id,
-                upload_id=upload_id,
-                file_name=file_name,
+                storage_path=storage_path,
                 file_bytes=file_bytes,
-                content_type=content_type,
+                checkpoints={},
+                pipeline_start=pipeline_start,
+                file_stored=self._store_file(upload_id, user_id, file_name, file_type, file_bytes),
             )
-            # Update the record with the real storage path
-            db.get_client().table("lease_uploads").update(
-                {"file_path": storage_path}
-            ).eq("id", upload_id).execute()
 
+    def _store_file(
+        self, upload_id: str, user_id: str, file_name: str, file_type: str, file_bytes: bytes,
+    ) -> asyncio.Task:
+        """
+        Upload the lease file in the background; _run_stages awaits it with
+        the Welcome Pack upload. A failure there leaves failed_stage='storage'.
+        """
+        logger.info("[%s] Stage 1/5: Storing file in Supabase Storage", file_name)
+        stage_start = time.time()
+        # Submitted now rather than when the task first runs — text
+        # extraction doesn't yield to the event loop. run_in_executor doesn't
+        # copy the context the way to_thread does, so the span needs it passed.
+        upload = asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, functools.partial(
+            db.upload_lease_file,
+            user_id=user_id,
+            upload_id=upload_id,
+            file_name=file_name,
+            file_bytes=file_bytes,
+            content_type=CONTENT_TYPES[file_type],
+        ))
+
+        async def store() -> None:
+            storage_path = await upload
+            # Checkpoint: file stored. Runs alongside other stages, so it
+            # records its duration without changing the status.
+            lease_events.record(upload_id, user_id, "storage", None, time.time() - stage_start)
             logger.info(
-                "[%s] Stage 1/6 complete — stored at %s (%.1fs)",
+                "[%s] Stage 1/5 complete — stored at %s (%.1fs)",
                 file_name, storage_path, time.time() - stage_start,
             )
 
-            # ------------------------------------------------------------------
-            # Stage 3: Text extraction + AI extraction → status: extracting
-            # ------------------------------------------------------------------
-            db.update_lease_status(upload_id, user_id, "extracting")
-            logger.info("[%s] Stage 2/6: Extracting text from %s", file_name, file_type.upper())
-            stage_start = time.time()
-
-            lease_text = extract_text(file_bytes, file_type)
-            logger.info(
-                "[%s] Text extraction complete (%d chars, %.1fs)",
-                file_name, len(lease_text), time.time() - stage_start,
-            )
+        return asyncio.create_task(store())
 
-            logger.info("[%s] Stage 3/6: Sending to Gemini 2.5 Flash for field extraction", file_name)
-            stage_start = time.time()
+    async def _attach_to_upload(
+        self,
+        upload: dict,
+        user_id: str,
+        file_bytes: bytes,
+        content_hash: str,
+        idempotency_key: str | None,
+    ) -> dict:
+        """
+        Return the result of an earlier upload of the same request.
 
-            extracted = await extract_fields(lease_text)
-            logger.info(
-                "[%s] AI extraction complete (%.1fs)",
-                file_name, time.time() - stage_start,
+        Completed uploads return their stored result, failed ones are resumed
+        from their last checkpoint (storing the file again if it never
+        reached storage), and uploads still running elsewhere are polled
+        until they finish (up to settings.idempotency_wait_seconds).
+        """
+        if idempotency_key and upload.get("idempotency_key") == idempotency_key \
+                and upload.get("content_hash") != content_hash:
+            raise LeaseProcessingError(
+                "Idempotency-Key was already used for a different file", stage="idempotency",
             )
-
-            # ------------------------------------------------------------------
-            # Stage 4: Save extracted data → status: extracted
-            # ------------------------------------------------------------------
-            logger.info("[%s] Stage 4/6: Saving extracted data to DB", file_name)
-            stage_start = time.time()
-
-            raw_ai_response = extracted.pop("raw_ai_response", {})
-            extracted_record = db.save_extracted_data(
-                lease_upload_id=upload_id,
-                fields=extracted,
-                raw_ai_response=raw_ai_response,
+        logger.info(
+            "[%s] Duplicate upload of %s (status: %s) — not processing again",
+            upload["file_name"], upload["id"], upload["status"],
+        )
+
+        deadline = time.time() + settings.idempotency_wait_seconds
+        while upload["status"] not in ("complete", "failed"):
+            if time.time() >= deadline:
+                raise LeaseProcessingError(
+                    f"Upload {upload['id']} is still processing — try again shortly", stage="conflict",
+                )
+            await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+            upload = db.get_lease_upload(upload["id"], user_id) or upload
+
+        if upload["status"] == "failed":
+            result = await self.resume_lease(upload["id"], user_id, file_bytes=file_bytes)
+        else:
+            result = self._stored_result(upload["id"])
+        REPLAYED.inc()
+        return {**result, "replayed": True}
+
+    def _stored_result(self, upload_id: str) -> dict:
+        """Rebuild the upload response for a completed upload from its checkpoints."""
+        saved_fields = db.get_extracted_data(upload_id) or {}
+        pack = db.get_welcome_pack(upload_id)
+        return {
+            "upload_id": upload_id,
+            "status": "complete",
+            "extracted_data": {key: saved_fields.get(key) for key in EXTRACTED_FIELD_KEYS},
+            "welcome_pack_url": db.get_welcome_pack_download_url(pack["file_path"]) if pack else None,
+        }
+
+    async def resume_lease(self, upload_id: str, user_id: str, file_bytes: bytes | None = None) -> dict:
+        """
+        Resume a failed upload from its first incomplete stage.
+
+        Stages whose checkpoint exists are skipped: a stored text is reused
+        instead of re-downloading and re-extracting the file, and saved
+        extracted_data is reused instead of calling Gemini again. If the
+        original file never reached storage, `file_bytes` (the same file,
+        uploaded again) is stored first.
+
+        Raises LeaseProcessingError with stage:
+          - "not_found" if the upload does not exist for this user
+          - "conflict" if it is not failed, already being resumed, or the
+            original file never reached storage and `file_bytes` is not given
+        """
+        lease = db.get_lease_upload(upload_id, user_id)
+        if not lease:
+            raise LeaseProcessingError("Lease upload not found", stage="not_found")
+        if lease["status"] != "failed":
+            raise LeaseProcessingError(
+                f"Lease upload is '{lease['status']}' — only failed uploads can be retried",
+                stage="conflict",
+            )
+        never_stored = lease.get("failed_stage") == "storage"
+        if (never_stored and file_bytes is None) or PENDING_PATH_SEGMENT in lease["file_path"]:
+            raise LeaseProcessingError(
+                "The original file was never stored — please upload it again",
+                stage="conflict",
             )
+        if upload_id in self._resuming:
+            raise LeaseProcessingError("A retry is already in progress", stage="conflict")
 
-            db.update_lease_status(upload_id, user_id, "extracted")
+        self._resuming.add(upload_id)
+        try:
+            # Claim the row so a concurrent worker/process can't resume it too
+            if not db.claim_failed_upload(upload_id, user_id, lease.get("retry_count") or 0):
+                raise LeaseProcessingError("A retry is already in progress", stage="conflict")
+
+            checkpoints = {
+                "lease_text": db.get_lease_text(upload_id),
+                "extracted": db.get_extracted_data(upload_id),
+                "welcome_pack": db.get_welcome_pack(upload_id),
+            }
             logger.info(
-                "[%s] Stage 4/6 complete — data saved (%.1fs)",
-                file_name, time.time() - stage_start,
+                "[%s] Resuming upload %s (retry %d) — checkpoints: %s",
+                lease["file_name"], upload_id, (lease.get("retry_count") or 0) + 1,
+                [name for name, value in checkpoints.items() if value] or "none",
             )
+            with profiling.session(user_id, upload_id, lease["file_name"], lease.get("content_hash")):
+                return await self._run_stages(
+                    upload_id=upload_id,
+                    user_id=user_id,
+                    file_name=lease["file_name"],
+                    file_type=lease["file_type"],
+                    storage_path=lease["file_path"],
+                    file_bytes=file_bytes,
+                    checkpoints=checkpoints,
+                    pipeline_start=time.time(),
+                    file_stored=self._store_file(
+                        upload_id, user_id, lease["file_name"], lease["file_type"], file_bytes,
+                    ) if never_stored else None,
+                )
+        finally:
+            self._resuming.discard(upload_id)
+
+    async def retry_failed_uploads(self) -> int:
+        """
+        Resume failed uploads that are due a retry (automatic retry worker).
 
-            # ------------------------------------------------------------------
-            # Stage 5: Generate Welcome Pack → status: generating
-            # ------------------------------------------------------------------
-            db.update_lease_status(upload_id, user_id, "generating")
-            logger.info("[%s] Stage 5/6: Generating Welcome Pack .docx", file_name)
-            stage_start = time.time()
+        Uploads are retried up to settings.pipeline_max_retries times, with
+        the wait doubling after each attempt. Returns the number resumed.
+        """
+        resumed = 0
+        now = datetime.now(timezone.utc)
+        for lease in db.list_retryable_uploads(settings.pipeline_max_retries):
+            retry_count = lease.get("retry_count") or 0
+            delay = timedelta(seconds=settings.pipeline_retry_backoff_seconds * 2 ** retry_count)
+            if datetime.fromisoformat(lease["updated_at"]) + delay > now:
+                continue
+            try:
+                with tracing.start_trace("lease.retry", upload_id=lease["id"]):
+                    await self.resume_lease(lease["id"], lease["user_id"])
+                resumed += 1
+            except LeaseProcessingError as e:
+                logger.warning("Automatic retry of upload %s failed: %s", lease["id"], e.message)
+        return resumed
+
+    async def _run_stages(
+        self,
+        upload_id: str,
+        user_id: str,
+        file_name: str,
+        file_type: str,
+        storage_path: str,
+        file_bytes: bytes | None,
+        checkpoints: dict,
+        pipeline_start: float,
+        file_stored: asyncio.Task | None = None,
+    ) -> dict:
+        """
+        Stages 3–5: text extraction, AI extraction, docgen, save + complete.
 
-            pack_bytes = generate_welcome_pack(extracted)
-            pack_file_name = f"Welcome_Pack_{extracted.get('tenant_name', 'Tenant').replace(' ', '_')}.docx"
+        `checkpoints` holds the lease_text / extracted / welcome_pack rows
+        already saved for this upload (empty for a fresh upload); each stage
+        with a checkpoint is skipped. `file_bytes` is None when resuming and
+        is downloaded from storage only if a stage needs it. `file_stored` is
+        the background upload of the lease file, if one is still running.
+        """
+        stage = "text_extraction"
+        unsaved: tuple[dict, dict] | None = None  # (fields, raw_ai_response) not yet in extracted_data
 
-            pack_storage_path = db.upload_welcome_pack_file(
-                user_id=user_id,
-                upload_id=upload_id,
-                file_name=pack_file_name,
-                file_bytes=pack_bytes,
-            )
-            db.save_welcome_pack(
-                lease_upload_id=upload_id,
-                file_path=pack_storage_path,
-                file_name=pack_file_name,
-            )
+        async def load_file() -> bytes:
+            nonlocal file_bytes
+            if file_bytes is None:
+                file_bytes = await asyncio.to_thread(db.download_lease_file, storage_path)
+            return file_bytes
 
-            logger.info(
-                "[%s] Stage 5/6 complete — Welcome Pack stored at %s (%.1fs)",
-                file_name, pack_storage_path, time.time() - stage_start,
-            )
+        try:
+            # ------------------------------------------------------------------
+            # Stage 3: Text extraction + AI extraction → status: extracting
+            # ------------------------------------------------------------------
+            duplicates: list[tuple[str, float]] = []
+            saved_fields = checkpoints.get("extracted")
+            if saved_fields:
+                extracted = {key: saved_fields.get(key) for key in EXTRACTED_FIELD_KEYS}
+                raw_ai_response = None
+                logger.info("[%s] Stages 2-3/5 skipped — extracted data already saved", file_name)
+            else:
+                progressive = None
+                saved_text = checkpoints.get("lease_text")
+                if saved_text:
+                    lease_text = saved_text["content"]
+                    paragraph_hashes = saved_text["paragraph_hashes"]
+                    minhash = saved_text.get("minhash") or await asyncio.to_thread(near_duplicates.signature, lease_text)
+                    duplicates = await asyncio.to_thread(near_duplicates.find, user_id, minhash, upload_id)
+                    logger.info("[%s] Stage 2/5 skipped — using stored text (%d chars)", file_name, len(lease_text))
+                else:
+                    logger.info("[%s] Stage 2/5: Extracting text from %s", file_name, file_type.upper())
+                    stage_start = time.time()
+
+                    # Parsing, and waiting on the PDF process pool, happen
+                    # in a thread so other requests keep being served
+                    if file_type == "pdf" and settings.pdf_progressive:
+                        lease_text, progressive = await asyncio.to_thread(
+                            self._read_pdf_progressively, file_name, await load_file(),
+                        )
+                    else:
+                        lease_text = await asyncio.to_thread(extract_text, await load_file(), file_type)
+                    text_extraction_s = time.time() - stage_start
+                    logger.info(
+                        "[%s] Text extraction complete (%d chars, %.1fs)",
+                        file_name, len(lease_text), text_extraction_s,
+                    )
+
+                    # Checkpoint: extracted text + fingerprints
+                    paragraph_hashes, duplicates = await asyncio.to_thread(
+                        self._checkpoint_text, upload_id, user_id, lease_text,
+                    )
+                    lease_events.record(upload_id, user_id, "text_extraction", "extracting", text_extraction_s)
+                if duplicates:
+                    logger.info(
+                        "[%s] Near-duplicate of upload %s (similarity %.2f)",
+                        file_name, duplicates[0][0], duplicates[0][1],
+                    )
+
+                stage = "ai_extraction"
+                logger.info("[%s] Stage 3/5: Sending to Gemini for field extraction", file_name)
+                stage_start = time.time()
+
+                # The renewal diff runs first: a renewal where only the dates
+                # and rent changed is similar enough to count as a near-duplicate
+                extracted = await self._extract_renewal(
+                    user_id, upload_id, file_name, lease_text, paragraph_hashes,
+                )
+                if extracted is None and duplicates and settings.near_duplicate_reuse:
+                    extracted = await asyncio.to_thread(self._reuse_extraction, file_name, lease_text, duplicates)
+                if extracted is None:
+                    extracted = await extract_fields(lease_text)
+                    if progressive and self._needs_remaining_pages(extracted, progressive):
+                        logger.info(
+                            "[%s] Extraction from first %d/%d pages incomplete — re-running on all pages",
+                            file_name, progressive["pages_read"], progressive["total_pages"],
+                        )
+                        lease_text = await asyncio.to_thread(extract_text, await load_file(), file_type)
+                        extracted = await extract_fields(lease_text)
+                        progressive["full_text_fallback"] = True
+                        # Resume, renewal diffs and near-duplicate lookups
+                        # should see the whole document, not the prefix
+                        await asyncio.to_thread(self._checkpoint_text, upload_id, user_id, lease_text, True)
+                if progressive:
+                    extracted["raw_ai_response"]["progressive"] = progressive
+                logger.info(
+                    "[%s] AI extraction complete (%.1fs)",
+                    file_name, time.time() - stage_start,
+                )
+                lease_events.record(upload_id, user_id, "ai_extraction", "generating", time.time() - stage_start)
+
+                # Saved with the Welcome Pack by finalize_lease_upload, or as
+                # a checkpoint by the failure handler below
+                raw_ai_response = extracted.pop("raw_ai_response", {})
+                unsaved = (extracted, raw_ai_response)
 
             # ------------------------------------------------------------------
-            # Stage 6: Complete → status: complete
+            # Stage 4: Generate + store Welcome Pack → status: generating
             # ------------------------------------------------------------------
-            db.update_lease_status(upload_id, user_id, "complete")
-            welcome_pack_url = db.get_welcome_pack_download_url(pack_storage_path)
+            stage = "docgen"
+            saved_pack = checkpoints.get("welcome_pack")
+            if saved_pack:
+                pack_storage_path = saved_pack["file_path"]
+                pack_file_name = saved_pack["file_name"]
+                logger.info("[%s] Stage 4/5 skipped — Welcome Pack already stored", file_name)
+                if file_stored:
+                    stage = "storage"
+                    await file_stored
+            else:
+                logger.info("[%s] Stage 4/5: Generating Welcome Pack .docx", file_name)
+                stage_start = time.time()
+
+                pack_bytes = generate_welcome_pack(extracted)
+                pack_file_name = f"Welcome_Pack_{extracted.get('tenant_name', 'Tenant').replace(' ', '_')}.docx"
+                lease_events.record(upload_id, user_id, "docgen", "generating", time.time() - stage_start)
+
+                # Both storage uploads in flight together (the lease file's
+                # may already be done)
+                stage = "pack_storage"
+                pack_stage_start = time.time()
+                pack_storage_path, stored = await asyncio.gather(
+                    asyncio.to_thread(
+                        db.upload_welcome_pack_file,
+                        user_id=user_id,
+                        upload_id=upload_id,
+                        file_name=pack_file_name,
+                        file_bytes=pack_bytes,
+                    ),
+                    file_stored or asyncio.sleep(0),
+                    return_exceptions=True,
+                )
+                if isinstance(stored, Exception):
+                    stage = "storage"
+                    raise stored
+                if isinstance(pack_storage_path, Exception):
+                    raise pack_storage_path
+
+                lease_events.record(upload_id, user_id, "pack_storage", None, time.time() - pack_stage_start)
+                logger.info(
+                    "[%s] Stage 4/5 complete — Welcome Pack stored at %s (%.1fs)",
+                    file_name, pack_storage_path, time.time() - stage_start,
+                )
 
+            # ------------------------------------------------------------------
+            # Stage 5: Save results → status: complete
+            # ------------------------------------------------------------------
+            stage = "complete"
+            logger.info("[%s] Stage 5/5: Saving extracted data, Welcome Pack and status", file_name)
             total_time = time.time() - pipeline_start
+            # This upload's buffered events are written in the same transaction
+            pending_events = await lease_events.take(upload_id)
+            complete_event = lease_events.event(upload_id, user_id, "complete", "complete", total_time)
+            try:
+                _, welcome_pack_url = await asyncio.gather(
+                    asyncio.to_thread(
+                        db.finalize_lease_upload,
+                        upload_id=upload_id,
+                        user_id=user_id,
+                        fields={key: extracted.get(key) for key in EXTRACTED_FIELD_KEYS},
+                        raw_ai_response=raw_ai_response,
+                        pack_path=pack_storage_path,
+                        pack_file_name=pack_file_name,
+                        events=[*pending_events, complete_event],
+                    ),
+                    asyncio.to_thread(db.get_welcome_pack_download_url, pack_storage_path),
+                )
+            except Exception:
+                lease_events.requeue(pending_events)
+                raise
+            unsaved = None
+
             logger.info(
                 "[%s] Pipeline complete — status: complete (%.1fs total)",
                 file_name, total_time,
@@ -177,21 +579,230 @@ class LeaseService:
                 "status": "complete",
                 "extracted_data": extracted,
                 "welcome_pack_url": welcome_pack_url,
+                "duplicate_of": duplicates[0][0] if duplicates else None,
             }
 
         except LeaseProcessingError:
             raise
         except Exception as e:
-            logger.exception("[%s] Pipeline failed: %s", file_name, e)
-            if upload_id:
+            if file_stored and stage != "storage":
+                # A file that never reached storage can't be resumed from —
+                # report that rather than the later stage
                 try:
-                    db.update_lease_status(upload_id, user_id, "failed", error_message=str(e))
+                    await file_stored
+                except Exception as storage_error:
+                    stage, e = "storage", storage_error
+            if unsaved:
+                # Checkpoint: parsed fields, so a retry skips the Gemini call
+                try:
+                    await asyncio.to_thread(db.save_extracted_data, lease_upload_id=upload_id, fields=unsaved[0])
+                    await asyncio.to_thread(db.save_extraction_audit, upload_id, user_id, unsaved[1])
                 except Exception:
-                    logger.exception("Failed to update status to 'failed'")
-            raise LeaseProcessingError(
-                message=str(e),
-                stage="unknown",
+                    logger.exception("[%s] Failed to checkpoint extracted data", file_name)
+            await self._mark_failed(file_name, upload_id, user_id, stage, e)
+            raise LeaseProcessingError(message=str(e), stage=stage)
+
+    async def _mark_failed(
+        self, file_name: str, upload_id: str | None, user_id: str, stage: str, error: Exception,
+    ) -> None:
+        logger.exception("[%s] Pipeline failed at %s: %s", file_name, stage, error)
+        if upload_id:
+            lease_events.record(upload_id, user_id, stage, "failed", error=str(error))
+            try:
+                await lease_events.flush()
+            except Exception:
+                logger.exception("Failed to update status to 'failed'")
+
+    @profiling.profiled
+    def _read_pdf_progressively(self, file_name: str, file_bytes: bytes) -> tuple[str, dict]:
+        """
+        Read a PDF in page windows until the field locator has found every
+        required field, so long annexures after the particulars are skipped.
+
+        Returns the text read so far (a prefix of the full extraction) and a
+        stats dict recorded in raw_ai_response["progressive"].
+        """
+        start = time.time()
+        windows: list[str] = []
+        unresolved = list(field_locator.REQUIRED_FIELDS)
+        pages_read = total_pages = 0
+        # closing() releases the parallel reader's temp file and pending
+        # windows as soon as we stop early
+        with contextlib.closing(iter_pdf_windows(file_bytes, settings.pdf_progressive_window_pages)) as reader:
+            for window_text, pages_read, total_pages in reader:
+                if window_text:
+                    windows.append(window_text)
+                unresolved = field_locator.unresolved_fields("\n\n".join(windows))
+                if not unresolved:
+                    break
+
+        elapsed = time.time() - start
+        per_page = elapsed / pages_read if pages_read else 0.0
+        stats = {
+            "pages_read": pages_read,
+            "total_pages": total_pages,
+            "unresolved_fields": unresolved,
+            "text_extraction_s": round(elapsed, 3),
+            "est_saved_s": round(per_page * (total_pages - pages_read), 3),
+            "full_text_fallback": False,
+        }
+        logger.info(
+            "[%s] Progressive read: %d/%d pages (%d field(s) unresolved, %.2fs, ~%.2fs saved)",
+            file_name, pages_read, total_pages, len(unresolved), elapsed, stats["est_saved_s"],
+        )
+        return "\n\n".join(windows), stats
+
+    def _checkpoint_text(
+        self, upload_id: str, user_id: str, lease_text: str, replace: bool = False
+    ) -> tuple[list[str], list[tuple[str, float]]]:
+        """
+        Fingerprint the extracted text, look up its near-duplicates and save
+        it with its MinHash band keys to lease_texts (replacing the stored
+        text when `replace` is set). Returns the paragraph hashes and this
+        user's near-duplicates. Blocking — run it in a thread.
+        """
+        paragraph_hashes = lease_diff.fingerprint(lease_text)
+        minhash = near_duplicates.signature(lease_text)
+        duplicates = near_duplicates.find(user_id, minhash, upload_id)
+        row = {
+            "content": lease_text,
+            "text_hash": hashlib.sha256(lease_text.encode("utf-8")).hexdigest(),
+            "paragraph_hashes": paragraph_hashes,
+            "minhash": minhash,
+            "minhash_bands": near_duplicates.band_keys(minhash),
+        }
+        if replace:
+            db.update_lease_text(lease_upload_id=upload_id, **row)
+        else:
+            db.save_lease_text(lease_upload_id=upload_id, user_id=user_id, **row)
+        return paragraph_hashes, duplicates
+
+    def _needs_remaining_pages(self, extracted: dict, progressive: dict) -> bool:
+        """True when an extraction from a partial read missed fields the locator expected."""
+        if progressive["pages_read"] >= progressive["total_pages"]:
+            return False
+        attempts = extracted.get("raw_ai_response", {}).get("attempts") or [{}]
+        if attempts[-1].get("warnings"):
+            return True
+        # ExtractedLeaseData requires these as strings, so a field the model
+        # could not find in the prefix comes back empty or as a placeholder
+        return any(
+            _is_placeholder(extracted.get(field))
+            for field in field_locator.REQUIRED_FIELDS
+            if field != "special_conditions"
+        )
+
+    def _reuse_extraction(
+        self, file_name: str, lease_text: str, duplicates: list[tuple[str, float]]
+    ) -> dict | None:
+        """
+        Copy the fields of the most similar earlier upload that has extracted
+        data, provided no paragraph that differs between the two texts could
+        hold a field value (MinHash similarity alone can't tell a re-export
+        from a renewal with new dates and rent).
+        """
+        for duplicate_id, score in duplicates:
+            prior = db.get_extracted_data(duplicate_id)
+            prior_text = db.get_lease_text(duplicate_id)
+            if not prior or not prior_text:
+                continue
+            diff = lease_diff.diff_paragraphs(prior_text["content"], lease_text)
+            changed_fields = lease_diff.affected_fields(diff, prior)
+            if changed_fields:
+                logger.info(
+                    "[%s] Near-duplicate upload %s differs in paragraphs touching %s — not reusing",
+                    file_name, duplicate_id, changed_fields,
+                )
+                continue
+            validated = ExtractedLeaseData(**{key: prior.get(key) for key in ExtractedLeaseData.model_fields})
+            logger.info("[%s] Reusing extraction from near-duplicate upload %s", file_name, duplicate_id)
+            result = validated.model_dump()
+            result["raw_ai_response"] = {
+                "reused_from": {"lease_upload_id": duplicate_id, "similarity": round(score, 3)},
+            }
+            return result
+        return None
+
+    async def _extract_renewal(
+        self,
+        user_id: str,
+        upload_id: str,
+        file_name: str,
+        lease_text: str,
+        paragraph_hashes: list[str],
+    ) -> dict | None:
+        """
+        Incremental extraction for renewals and amended leases.
+
+        Looks for a prior upload by this user whose paragraph fingerprints
+        mostly match and which names the same tenant and property, diffs the
+        two texts and re-extracts only the fields the changed paragraphs
+        touch, carrying the rest over from the prior extracted_data row.
+        Returns None whenever a full extraction should run instead (no
+        match, too many changes, or checks failed).
+        """
+        if not settings.renewal_detection:
+            return None
+
+        candidates = await asyncio.to_thread(
+            db.find_prior_lease_texts,
+            user_id=user_id,
+            paragraph_hashes=lease_diff.probe_sample(paragraph_hashes),
+            exclude_upload_id=upload_id,
+            limit=10,
+        )
+        scored = sorted(
+            ((lease_diff.similarity(paragraph_hashes, c["paragraph_hashes"]), c) for c in candidates),
+            key=lambda pair: pair[0],
+            reverse=True,
+        )
+        best, best_score, prior_fields = None, 0.0, None
+        for score, candidate in scored:
+            if score < settings.renewal_similarity_threshold:
+                break
+            fields = await asyncio.to_thread(db.get_extracted_data, candidate["lease_upload_id"])
+            if fields and lease_diff.same_tenancy(fields, lease_text):
+                best, best_score, prior_fields = candidate, score, fields
+                break
+            logger.info(
+                "[%s] Upload %s is similar (%.2f) but names a different tenant or property — not a renewal",
+                file_name, candidate["lease_upload_id"], score,
+            )
+
+        if best is None:
+            return None
+
+        diff = lease_diff.diff_paragraphs(best["content"], lease_text)
+        fields_to_update = lease_diff.affected_fields(diff, prior_fields)
+        # An address split across table rows never matches verbatim, so a
+        # change to its suburb or postcode could go unnoticed — re-extract it
+        if not lease_diff.mentions(lease_text, prior_fields.get("property_address")):
+            fields_to_update = [
+                field for field in lease_diff.FIELD_PATTERNS
+                if field in fields_to_update or field == "property_address"
+            ]
+        logger.info(
+            "[%s] Renewal of upload %s detected (similarity %.2f) — %d changed paragraph(s), fields: %s",
+            file_name, best["lease_upload_id"], best_score, len(diff["inserted"]), fields_to_update,
+        )
+        if len(fields_to_update) > settings.renewal_max_changed_fields:
+            logger.info("[%s] Too many fields changed — running full extraction", file_name)
+            return None
+
+        try:
+            extracted = await extract_changed_fields(
+                lease_text, diff["sections"], fields_to_update, prior_fields,
             )
+        except Exception as e:
+            logger.warning("[%s] Incremental extraction failed, running full extraction: %s", file_name, e)
+            return None
+
+        extracted["raw_ai_response"]["renewal_of"] = {
+            "lease_upload_id": best["lease_upload_id"],
+            "similarity": round(best_score, 3),
+            "changed_paragraphs": len(diff["inserted"]),
+        }
+        return extracted
 
     def _validate(self, file_name: str, file_bytes: bytes, file_type: str) -> None:
         """Validate file type and size before processing."""
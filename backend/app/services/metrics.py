@@ -0,0 +1,335 @@
+"""
+In-process metrics in the Prometheus text format, served at /metrics.
+
+Counters, gauges and histograms are registered at import time by the
+modules they measure and updated inline. Updates are a dict lookup and an
+add under a per-metric lock, and histograms use fixed buckets, so
+instrumenting a hot path costs well under a microsecond. Gauges can also
+be computed at scrape time from a callback (queue lengths and the like).
+
+Values are kept per process. Under a multi-worker server (gunicorn.conf.py)
+METRICS_MULTIPROC_DIR is set: each worker writes a snapshot of its values
+to <pid>.json there every few seconds (write_snapshot) and the worker that
+answers a scrape merges every snapshot — counters and histograms summed,
+gauges summed over live workers — so /metrics reports the whole server
+whichever worker serves it. When a worker exits the master keeps its
+counters and histograms (mark_process_dead), so totals never go backwards.
+Other workers' values are up to a flush interval old.
+"""
+
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds — from sub-millisecond DB calls up to multi-minute pipelines
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_registry: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def reset(self) -> None:
+        """Forget every recorded value (a forked worker starts from its own zero)."""
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict[tuple[str, ...], float]:
+        """Current values by label values."""
+        with self._lock:
+            return dict(self._values)
+
+    @staticmethod
+    def merge(snapshots: list[dict]) -> dict:
+        merged: dict = {}
+        for snap in snapshots:
+            for key, value in snap.items():
+                merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def _samples(self, values: dict) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values.items()]
+
+    def render(self, values: dict | None = None) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples(self.snapshot() if values is None else values))
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def reset(self) -> None:
+        super().reset()
+        self._values = {}
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, or is read from `function` at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        function: Callable[[], float] | None = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def reset(self) -> None:
+        super().reset()
+        self._values = {}
+
+    def value(self, **labels) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    def snapshot(self) -> dict[tuple[str, ...], float]:
+        if self._function is not None:
+            return {(): self._function()}
+        return super().snapshot()
+
+
+class Histogram(_Metric):
+    """Observations counted into fixed cumulative buckets, plus their sum."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key → [count per bucket (last = +Inf)..., sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def reset(self) -> None:
+        super().reset()
+        self._series = {}
+
+    def count(self, **labels) -> int:
+        series = self._series.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def snapshot(self) -> dict[tuple[str, ...], list[float]]:
+        with self._lock:
+            return {key: list(series) for key, series in self._series.items()}
+
+    @staticmethod
+    def merge(snapshots: list[dict]) -> dict:
+        merged: dict = {}
+        for snap in snapshots:
+            for key, series in snap.items():
+                total = merged.get(key)
+                merged[key] = list(series) if total is None else [a + b for a, b in zip(total, series)]
+        return merged
+
+    def _samples(self, values: dict) -> list[str]:
+        lines = []
+        for key, series in values.items():
+            cumulative = 0
+            for bound, n in zip((*self.buckets, float("inf")), series[:-1]):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+def timed(histogram: Histogram, label: str = "function"):
+    """Decorator: observe each call's duration, labelled with the function name."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **{label: fn.__name__})
+        return wrapper
+    return decorator
+
+
+def reset() -> None:
+    """Zero every registered metric (called in each pre-fork worker, see app/prefork.py)."""
+    for metric in _registry:
+        metric.reset()
+
+
+def render() -> str:
+    """Every registered metric in the Prometheus text exposition format."""
+    if not settings.metrics_multiproc_dir:
+        return "\n".join(metric.render() for metric in _registry) + "\n"
+
+    write_snapshot()
+    snapshots = _read_snapshots()
+    return "\n".join(
+        metric.render(metric.merge([snap.get(metric.name, {}) for snap in snapshots]))
+        for metric in _registry
+    ) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Multi-worker aggregation (METRICS_MULTIPROC_DIR)
+# ---------------------------------------------------------------------------
+
+def _encode(values: dict) -> list:
+    return [[list(key), value] for key, value in values.items()]
+
+
+def _decode(items: list) -> dict:
+    return {tuple(key): value for key, value in items}
+
+
+def write_snapshot() -> None:
+    """Write this process's values to <pid>.json in the multiproc dir (atomically)."""
+    directory = settings.metrics_multiproc_dir
+    if not directory:
+        return
+    data = {metric.name: _encode(metric.snapshot()) for metric in _registry}
+    path = Path(directory) / f"{os.getpid()}.json"
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, path)
+
+
+def _read_snapshots() -> list[dict[str, dict]]:
+    snapshots = []
+    for path in Path(settings.metrics_multiproc_dir).glob("*.json"):
+        try:
+            data = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping unreadable metrics snapshot %s: %s", path.name, e)
+            continue
+        snapshots.append({name: _decode(items) for name, items in data.items()})
+    return snapshots
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Master, after a worker exits: fold its counters and histograms into
+    dead.json (so totals don't drop) and discard its gauges.
+    """
+    directory = settings.metrics_multiproc_dir
+    path = Path(directory) / f"{pid}.json" if directory else None
+    if path is None or not path.exists():
+        return
+    dead_path = Path(directory) / "dead.json"
+    snapshots = [json.loads(p.read_text()) for p in (dead_path, path) if p.exists()]
+    data = {
+        metric.name: _encode(metric.merge([_decode(snap.get(metric.name, [])) for snap in snapshots]))
+        for metric in _registry
+        if not isinstance(metric, Gauge)
+    }
+    tmp = dead_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(data))
+    os.replace(tmp, dead_path)
+    path.unlink()
+
+
+def clear_multiproc_dir() -> None:
+    """Master, on startup: drop snapshots left by a previous server."""
+    directory = settings.metrics_multiproc_dir
+    if not directory:
+        return
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    for path in Path(directory).glob("*.json"):
+        path.unlink()
+
+
+# ---------------------------------------------------------------------------
+# Shared metrics — written by more than one module
+# ---------------------------------------------------------------------------
+PIPELINE_STAGE_SECONDS = Histogram(
+    "lease_pipeline_stage_seconds",
+    "Duration of each completed pipeline stage (stage=complete is the whole pipeline)",
+    ("stage",),
+)
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Cache lookups by cache and result (hit, miss)", ("cache", "result"))
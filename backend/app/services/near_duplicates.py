@@ -0,0 +1,113 @@
+"""
+Near-duplicate lease detection with MinHash + locality-sensitive hashing.
+
+The same lease often arrives more than once — exported to both PDF and DOCX,
+or re-scanned. Exact hashes miss these, so each extracted text is normalised
+(case, punctuation and page markers stripped), split into word shingles and
+reduced to a MinHash signature. Signatures are split into LSH bands, and each band is hashed to a key stored
+with the text in lease_texts.minhash_bands (migration 010). A lookup asks
+Postgres, through a GIN index, for this user's texts sharing any band key,
+then scores only those candidates. The index is shared by every worker
+and node, and nothing is loaded at startup.
+
+Band keys depend on the band layout, which is chosen from
+NEAR_DUPLICATE_THRESHOLD. After changing the threshold, run
+scripts/backfill_minhash_bands.py to re-key the stored texts.
+"""
+
+import hashlib
+import random
+import re
+import struct
+import zlib
+
+from app.config import settings
+from app.services import supabase as db
+
+NUM_PERM = 64
+SHINGLE_SIZE = 5
+_PRIME = (1 << 31) - 1  # Mersenne prime; hash values fit a Postgres INTEGER
+
+# Fixed seed so signatures are comparable across processes and restarts
+_rng = random.Random(20260401)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_PAGE_MARKER = re.compile(r"--- page \d+ ---")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+# ---------------------------------------------------------------------------
+# Signatures
+# ---------------------------------------------------------------------------
+
+def _shingles(text: str) -> set[int]:
+    """Hashed word shingles of the normalised text (format-independent)."""
+    normalized = _NON_WORD.sub(" ", _PAGE_MARKER.sub(" ", text.lower()))
+    words = normalized.split()
+    if len(words) < SHINGLE_SIZE:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        zlib.crc32(" ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8"))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+
+def signature(text: str) -> list[int]:
+    """MinHash signature of a lease text (NUM_PERM integers)."""
+    shingles = _shingles(text)
+    if not shingles:
+        return [_PRIME] * NUM_PERM
+    return [min((a * x + b) % _PRIME for x in shingles) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(a, b) -> float:
+    """Estimated Jaccard similarity from two signatures."""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+def _choose_bands(threshold: float) -> tuple[int, int]:
+    """
+    Pick (bands, rows) with bands * rows == NUM_PERM whose LSH threshold
+    (1/b)^(1/r) sits just below the similarity threshold, favouring recall.
+    """
+    options = [(NUM_PERM // r, r) for r in range(1, NUM_PERM + 1) if NUM_PERM % r == 0]
+    below = [(b, r) for b, r in options if (1 / b) ** (1 / r) <= threshold]
+    pool = below or options
+    return min(pool, key=lambda br: abs(threshold - (1 / br[0]) ** (1 / br[1])))
+
+
+# ---------------------------------------------------------------------------
+# LSH bands
+# ---------------------------------------------------------------------------
+
+BANDS, ROWS = _choose_bands(settings.near_duplicate_threshold)
+
+
+def band_keys(sig) -> list[int]:
+    """
+    One key per LSH band, stored in lease_texts.minhash_bands. Hashed with
+    BLAKE2 (not hash(), which is salted per process) into a signed 64-bit
+    integer for a BIGINT[] column.
+    """
+    keys = []
+    for band in range(BANDS):
+        chunk = sig[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(struct.pack(f"<{ROWS + 1}I", band, *chunk), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, "big", signed=True))
+    return keys
+
+
+def find(user_id: str, sig, exclude_upload_id: str, threshold: float | None = None) -> list[tuple[str, float]]:
+    """
+    This user's earlier uploads at or above the threshold, most similar first.
+    Blocking (a database round trip) — call it from a thread.
+    """
+    threshold = settings.near_duplicate_threshold if threshold is None else threshold
+    candidates = db.find_lease_texts_by_bands(user_id, band_keys(sig), exclude_upload_id)
+    scored = [
+        (row["lease_upload_id"], estimate_similarity(sig, row["minhash"]))
+        for row in candidates
+        if row.get("minhash") and len(row["minhash"]) == NUM_PERM
+    ]
+    matches = [(key, score) for key, score in scored if score >= threshold]
+    return sorted(matches, key=lambda m: m[1], reverse=True)
@@ -0,0 +1,335 @@
+"""
+On-demand profiling of live pipeline runs (admin API: /api/admin/profiling).
+
+An admin arms a trigger — profile the next N pipeline runs, optionally only
+those of one user or one upload id — and each matching run is profiled and
+stored in settings.profile_dir with the lease file's SHA-256, for download.
+
+Only the CPU-bound sections decorated with @profiled (text extraction,
+Welcome Pack generation) are profiled, in whichever thread runs them, so
+other requests sharing the event loop don't show up in the profile.
+Two modes:
+  - "deterministic": cProfile; saved as a .prof file (pstats format —
+    `python -m pstats`, snakeviz)
+  - "sampling": a thread samples the section's stack every
+    sample_interval_ms; saved as collapsed stacks (.folded — flamegraph.pl,
+    speedscope). Much lower overhead on long runs.
+
+While no trigger is armed, session() returns a shared no-op context manager
+and @profiled functions check a single module global before calling through.
+Triggers are per process: with several workers, arm each one (or run one
+worker while investigating).
+"""
+
+import cProfile
+import functools
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import uuid4
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_STORED_PROFILES = 50  # oldest profiles are deleted beyond this
+MODES = ("deterministic", "sampling")
+PROFILE_ID_LENGTH = 32
+
+
+@dataclass
+class Trigger:
+    """Which pipeline runs to profile next."""
+
+    remaining: int
+    mode: str = "deterministic"
+    user_id: str | None = None
+    upload_id: str | None = None
+    sample_interval_ms: int = 5
+    expires_at: float = 0.0  # time.time(); 0 = never
+
+    def matches(self, user_id: str, upload_id: str) -> bool:
+        return (
+            (self.user_id is None or self.user_id == user_id)
+            and (self.upload_id is None or self.upload_id == upload_id)
+        )
+
+
+@dataclass
+class _Session:
+    profile_id: str
+    mode: str
+    user_id: str
+    upload_id: str
+    file_name: str
+    file_hash: str | None
+    sample_interval_ms: int
+    started_at: float = field(default_factory=time.time)
+    sections: list[dict] = field(default_factory=list)
+    stats: pstats.Stats | None = None
+    stacks: Counter = field(default_factory=Counter)
+    threads: dict[int, int] = field(default_factory=dict)  # thread ident → nesting depth
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_trigger: Trigger | None = None
+_running = 0  # sessions in progress; @profiled is a plain call while 0
+_current: ContextVar[_Session | None] = ContextVar("profiling_session", default=None)
+_NO_SESSION = nullcontext()
+_trigger_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Trigger
+# ---------------------------------------------------------------------------
+
+def arm(
+    count: int,
+    mode: str = "deterministic",
+    user_id: str | None = None,
+    upload_id: str | None = None,
+    sample_interval_ms: int = 5,
+    expires_in_s: float = 3600,
+) -> Trigger:
+    """Profile the next `count` pipeline runs matching user_id/upload_id."""
+    global _trigger
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    trigger = Trigger(
+        remaining=count,
+        mode=mode,
+        user_id=user_id,
+        upload_id=upload_id,
+        sample_interval_ms=sample_interval_ms,
+        expires_at=time.time() + expires_in_s if expires_in_s else 0.0,
+    )
+    with _trigger_lock:
+        _trigger = trigger
+    logger.info("Profiling armed: %s", trigger)
+    return trigger
+
+
+def disarm() -> None:
+    global _trigger
+    with _trigger_lock:
+        _trigger = None
+
+
+def current_trigger() -> Trigger | None:
+    """The armed trigger, or None (expired triggers are disarmed here)."""
+    trigger = _trigger
+    if trigger and trigger.expires_at and trigger.expires_at <= time.time():
+        disarm()
+        return None
+    return trigger
+
+
+def _claim(user_id: str, upload_id: str) -> Trigger | None:
+    """Count this run against the armed trigger if it matches."""
+    global _trigger
+    trigger = current_trigger()
+    if trigger is None or not trigger.matches(user_id, upload_id):
+        return None
+    with _trigger_lock:
+        if _trigger is not trigger or trigger.remaining <= 0:
+            return None
+        trigger.remaining -= 1
+        if trigger.remaining == 0:
+            _trigger = None
+    return trigger
+
+
+# ---------------------------------------------------------------------------
+# Sessions
+# ---------------------------------------------------------------------------
+
+def session(user_id: str, upload_id: str, file_name: str, file_hash: str | None):
+    """Context manager around a pipeline run; profiles it if a trigger matches."""
+    if _trigger is None:
+        return _NO_SESSION
+    trigger = _claim(user_id, upload_id)
+    if trigger is None:
+        return _NO_SESSION
+    return _profile_session(_Session(
+        profile_id=uuid4().hex,
+        mode=trigger.mode,
+        user_id=user_id,
+        upload_id=upload_id,
+        file_name=file_name,
+        file_hash=file_hash,
+        sample_interval_ms=trigger.sample_interval_ms,
+    ))
+
+
+@contextmanager
+def _profile_session(current: _Session):
+    global _running
+    token = _current.set(current)
+    _running += 1
+    stop = threading.Event()
+    sampler = None
+    if current.mode == "sampling":
+        sampler = threading.Thread(target=_sample, args=(current, stop), name="profile-sampler", daemon=True)
+        sampler.start()
+    try:
+        yield current
+    finally:
+        _running -= 1
+        _current.reset(token)
+        stop.set()
+        if sampler is not None:
+            sampler.join()
+        try:
+            _save(current)
+        except Exception:
+            logger.exception("Failed to save profile %s", current.profile_id)
+
+
+def profiled(fn):
+    """Decorator for CPU-bound sections: profiled when called inside a profiling session."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _running:
+            return fn(*args, **kwargs)
+        current = _current.get()
+        if current is None:
+            return fn(*args, **kwargs)
+        return _run_section(current, fn, args, kwargs)
+    return wrapper
+
+
+def _run_section(current: _Session, fn, args, kwargs):
+    ident = threading.get_ident()
+    start = time.perf_counter()
+    profiler = None
+    if current.mode == "deterministic":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        with current.lock:
+            current.threads[ident] = current.threads.get(ident, 0) + 1
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        else:
+            with current.lock:
+                current.threads[ident] -= 1
+                if not current.threads[ident]:
+                    del current.threads[ident]
+        elapsed = time.perf_counter() - start
+        with current.lock:
+            current.sections.append({"function": fn.__qualname__, "seconds": round(elapsed, 6)})
+            if profiler is not None:
+                if current.stats is None:
+                    current.stats = pstats.Stats(profiler)
+                else:
+                    current.stats.add(profiler)
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _sample(current: _Session, stop: threading.Event) -> None:
+    interval = current.sample_interval_ms / 1000
+    while not stop.wait(interval):
+        with current.lock:
+            idents = list(current.threads)
+        if not idents:
+            continue
+        frames = sys._current_frames()
+        for ident in idents:
+            frame = frames.get(ident)
+            if frame is not None:
+                current.stacks[_collapse(frame)] += 1
+
+
+# ---------------------------------------------------------------------------
+# Storage
+# ---------------------------------------------------------------------------
+
+def _profile_dir() -> Path:
+    path = Path(settings.profile_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _save(current: _Session) -> None:
+    directory = _profile_dir()
+    if current.mode == "deterministic":
+        data_file = f"{current.profile_id}.prof"
+        if current.stats is not None:
+            current.stats.dump_stats(directory / data_file)
+        else:
+            (directory / data_file).write_bytes(b"")
+    else:
+        data_file = f"{current.profile_id}.folded"
+        (directory / data_file).write_text(
+            "".join(f"{stack} {count}\n" for stack, count in current.stacks.most_common()),
+            encoding="utf-8",
+        )
+
+    metadata = {
+        "profile_id": current.profile_id,
+        "mode": current.mode,
+        "user_id": current.user_id,
+        "upload_id": current.upload_id,
+        "file_name": current.file_name,
+        "file_hash": current.file_hash,
+        "created_at": datetime.fromtimestamp(current.started_at, timezone.utc).isoformat(),
+        "duration_s": round(time.time() - current.started_at, 3),
+        "sections": current.sections,
+        "samples": sum(current.stacks.values()),
+        "data_file": data_file,
+    }
+    (directory / f"{current.profile_id}.json").write_text(json.dumps(metadata, indent=2), encoding="utf-8")
+    logger.info(
+        "[%s] Saved %s profile %s (%d sections)",
+        current.file_name, current.mode, current.profile_id, len(current.sections),
+    )
+    _prune(directory)
+
+
+def _prune(directory: Path) -> None:
+    metadata_files = sorted(directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for stale in metadata_files[:-MAX_STORED_PROFILES]:
+        for path in directory.glob(f"{stale.stem}.*"):
+            path.unlink(missing_ok=True)
+
+
+def list_profiles() -> list[dict]:
+    """Metadata of stored profiles, newest first."""
+    directory = Path(settings.profile_dir)
+    if not directory.is_dir():
+        return []
+    profiles = [json.loads(path.read_text(encoding="utf-8")) for path in directory.glob("*.json")]
+    return sorted(profiles, key=lambda p: p["created_at"], reverse=True)
+
+
+def get_profile(profile_id: str) -> tuple[dict, Path] | None:
+    """(metadata, data file path) of a stored profile, or None."""
+    if len(profile_id) != PROFILE_ID_LENGTH or not profile_id.isalnum():
+        return None
+    metadata_path = Path(settings.profile_dir) / f"{profile_id}.json"
+    if not metadata_path.is_file():
+        return None
+    metadata = json.loads(metadata_path.read_text(encoding="utf-8"))
+    return metadata, metadata_path.parent / metadata["data_file"]
+
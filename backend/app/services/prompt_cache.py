@@ -0,0 +1,180 @@
+"""
+Gemini context cache for the static extraction instructions.
+
+The fixed instruction block of the extraction prompt is uploaded once per
+model as a cached context, so each request only sends the lease text.
+
+Lifecycle:
+  - created (or re-attached by display name) on startup via warm()
+  - TTL extended by refresh_all() — run from a background task more often
+    than REFRESH_MARGIN — when a cache is within REFRESH_MARGIN of expiry
+  - keyed by a hash of the instruction text, so editing the prompt
+    invalidates the old cache and the next refresh creates a new one
+
+Every caches.* call is a blocking network round trip, so they only happen
+in warm()/refresh_all(). The request path (get_cached_content) just reads
+_entries; a model whose cache is missing, stale or expired is sent inline
+until the next refresh.
+
+Gemini rejects caches below a minimum token count. When creation fails the
+model is marked unavailable for RETRY_AFTER seconds and callers fall back to
+sending the full prompt inline.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+REFRESH_MARGIN = 300  # seconds before expiry at which the TTL is extended
+RETRY_AFTER = 900     # seconds to wait before retrying a failed cache creation
+
+# model → {"name", "prompt_hash", "expires_at"} or {"failed_at", "prompt_hash"}
+_entries: dict[str, dict] = {}
+_lock = threading.Lock()
+
+
+def prompt_hash(instructions: str) -> str:
+    return hashlib.sha256(instructions.encode("utf-8")).hexdigest()[:16]
+
+
+def _display_name(model: str, digest: str) -> str:
+    return f"lease-extraction-{model}-{digest}"
+
+
+def _expires_at(cached) -> float:
+    expire_time = getattr(cached, "expire_time", None)
+    if isinstance(expire_time, datetime):
+        return expire_time.astimezone(timezone.utc).timestamp()
+    return time.time() + settings.gemini_prompt_cache_ttl_seconds
+
+
+def _find_existing(client, display_name: str):
+    """Re-attach to a cache created by an earlier process with the same prompt."""
+    try:
+        for cached in client.caches.list():
+            if cached.display_name == display_name and _expires_at(cached) - time.time() > REFRESH_MARGIN:
+                return cached
+    except Exception as e:
+        logger.warning("Could not list Gemini caches: %s", e)
+    return None
+
+
+def _create(client, model: str, instructions: str, digest: str) -> dict | None:
+    display_name = _display_name(model, digest)
+    cached = _find_existing(client, display_name)
+    if cached is not None:
+        logger.info("Reusing Gemini prompt cache %s for %s", cached.name, model)
+    else:
+        try:
+            cached = client.caches.create(
+                model=model,
+                config={
+                    "display_name": display_name,
+                    "system_instruction": instructions,
+                    "ttl": f"{settings.gemini_prompt_cache_ttl_seconds}s",
+                },
+            )
+        except Exception as e:
+            logger.warning("Prompt cache unavailable for %s, sending prompt inline: %s", model, e)
+            return {"failed_at": time.time(), "prompt_hash": digest}
+        logger.info("Created Gemini prompt cache %s for %s (hash %s)", cached.name, model, digest)
+
+    return {"name": cached.name, "prompt_hash": digest, "expires_at": _expires_at(cached)}
+
+
+def _refresh(client, entry: dict) -> None:
+    try:
+        cached = client.caches.update(
+            name=entry["name"],
+            config={"ttl": f"{settings.gemini_prompt_cache_ttl_seconds}s"},
+        )
+        entry["expires_at"] = _expires_at(cached)
+        logger.info("Refreshed Gemini prompt cache %s", entry["name"])
+    except Exception as e:
+        logger.warning("Failed to refresh prompt cache %s: %s", entry["name"], e)
+        entry["expires_at"] = 0.0
+
+
+def _delete(client, entry: dict) -> None:
+    try:
+        client.caches.delete(name=entry["name"])
+        logger.info("Deleted stale Gemini prompt cache %s", entry["name"])
+    except Exception as e:
+        logger.warning("Failed to delete prompt cache %s: %s", entry["name"], e)
+
+
+def get_cached_content(model: str, instructions: str) -> str | None:
+    """
+    Return the cache name holding `instructions` for `model`, or None.
+
+    Lookup only — never touches the network. None means the caller should
+    send the full prompt inline.
+    """
+    # A Gemini cassette keys on the full prompt, so the instructions go inline
+    if not settings.gemini_prompt_cache or settings.gemini_cassette_mode:
+        return None
+
+    entry = _entries.get(model)
+    if not entry or "name" not in entry or entry["prompt_hash"] != prompt_hash(instructions):
+        return None
+    if entry["expires_at"] <= time.time():
+        return None
+    return entry["name"]
+
+
+def _ensure(client, model: str, instructions: str) -> None:
+    """Create, refresh or replace the cache for `model` as needed (network calls)."""
+    digest = prompt_hash(instructions)
+    now = time.time()
+
+    with _lock:
+        entry = _entries.get(model)
+
+        if entry and entry["prompt_hash"] != digest:
+            if "name" in entry:
+                _delete(client, entry)
+            entry = None
+
+        if entry and "failed_at" in entry:
+            if now - entry["failed_at"] < RETRY_AFTER:
+                return
+            entry = None
+
+        if entry and entry["expires_at"] - now <= REFRESH_MARGIN:
+            _refresh(client, entry)
+            if entry["expires_at"] - now <= 0:
+                entry = None
+
+        if entry is None:
+            _entries[model] = _create(client, model, instructions, digest)
+
+
+def refresh_all(client, models: list[str], instructions: str) -> None:
+    """
+    Extend caches close to expiry, replace ones for an edited prompt and
+    retry failed creations. Safe to call periodically.
+    """
+    if not settings.gemini_prompt_cache or settings.gemini_cassette_mode:
+        return
+    for model in dict.fromkeys([*models, *_entries]):
+        _ensure(client, model, instructions)
+
+
+def warm(client, models: list[str], instructions: str) -> None:
+    """Create (or re-attach) caches for every model in the ladder."""
+    refresh_all(client, models, instructions)
+
+
+def invalidate(model: str | None = None) -> None:
+    """Forget cache entries so the next call re-resolves them."""
+    with _lock:
+        if model is None:
+            _entries.clear()
+        else:
+            _entries.pop(model, None)
@@ -5,15 +5,39 @@ Uses the service role key (bypasses RLS) but still filters by user_id
 in every query for defense-in-depth.
 """
 
+import base64
+import gzip
+import json
 import logging
-from uuid import UUID
+from datetime import datetime, timezone
+from uuid import UUID, uuid4
 
+from postgrest.exceptions import APIError
 from supabase import Client, create_client
 
 from app.config import settings
+from app.services import metrics, tracing
 
 logger = logging.getLogger(__name__)
 
+CALL_SECONDS = metrics.Histogram(
+    "supabase_call_seconds", "Latency of Supabase DB and Storage calls", ("function",),
+)
+
+
+def _instrumented(fn):
+    """Observe the call's latency and run it in a span named supabase.<function>."""
+    return tracing.traced(f"supabase.{fn.__name__}")(metrics.timed(CALL_SECONDS)(fn))
+
+
+# Parsed field columns of extracted_data — raw_ai_response is never selected
+# with them (it lives in extraction_audit)
+EXTRACTED_DATA_COLUMNS = (
+    "lease_upload_id, tenant_name, property_address, lease_start_date, lease_end_date, "
+    "rent_amount, bond_amount, num_occupants, pet_permission, parking, special_conditions, "
+    "landlord_name, property_manager_name, property_manager_email, property_manager_phone"
+)
+
 # ---------------------------------------------------------------------------
 # Singleton client
 # ---------------------------------------------------------------------------
@@ -31,25 +55,63 @@ def get_client() -> Client:
 # lease_uploads
 # ---------------------------------------------------------------------------
 
+@_instrumented
 def create_lease_upload(
     user_id: str,
     file_name: str,
     file_type: str,
     file_path: str,
     file_size: int,
+    content_hash: str | None = None,
+    idempotency_key: str | None = None,
+    upload_id: str | None = None,
 ) -> dict:
     data = {
+        "id": upload_id or str(uuid4()),
         "user_id": user_id,
         "file_name": file_name,
         "file_type": file_type,
         "file_path": file_path,
         "file_size": file_size,
         "status": "uploaded",
+        "content_hash": content_hash,
+        "idempotency_key": idempotency_key,
     }
     result = get_client().table("lease_uploads").insert(data).execute()
     return result.data[0]
 
 
+@_instrumented
+def find_lease_upload(
+    user_id: str, content_hash: str, idempotency_key: str | None = None
+) -> dict | None:
+    """Earlier upload by this user with the same idempotency key (preferred) or file content."""
+    query = get_client().table("lease_uploads").select("*").eq("user_id", user_id)
+    if idempotency_key:
+        query = query.or_(f"idempotency_key.eq.{idempotency_key},content_hash.eq.{content_hash}")
+    else:
+        query = query.eq("content_hash", content_hash)
+    rows = query.execute().data
+    if not rows:
+        return None
+    return next((row for row in rows if idempotency_key and row.get("idempotency_key") == idempotency_key), rows[0])
+
+
+def is_unique_violation(error: Exception) -> bool:
+    """True if a PostgREST error is a unique-constraint violation (concurrent insert)."""
+    return isinstance(error, APIError) and error.code == "23505"
+
+
+def is_rejected_row(error: Exception) -> bool:
+    """
+    True if a PostgREST error is the database rejecting the data itself —
+    SQLSTATE class 22 (data exception) or 23 (integrity constraint, e.g. a
+    foreign key) — so retrying the same row can never succeed.
+    """
+    return isinstance(error, APIError) and (error.code or "")[:2] in ("22", "23")
+
+
+@_instrumented
 def get_lease_upload(upload_id: str, user_id: str) -> dict | None:
     result = (
         get_client()
@@ -62,11 +124,12 @@ def get_lease_upload(upload_id: str, user_id: str) -> dict | None:
     return result.data[0] if result.data else None
 
 
+@_instrumented
 def list_lease_uploads(user_id: str) -> list[dict]:
     result = (
         get_client()
         .table("lease_uploads")
-        .select("*, extracted_data(*), welcome_packs(*)")
+        .select("*, extracted_data(tenant_name, property_address), welcome_packs(id)")
         .eq("user_id", user_id)
         .order("created_at", desc=True)
         .execute()
@@ -74,28 +137,110 @@ def list_lease_uploads(user_id: str) -> list[dict]:
     return result.data
 
 
-def update_lease_status(
-    upload_id: str, user_id: str, status: str, error_message: str | None = None
-) -> dict:
-    data: dict = {"status": status}
-    if error_message is not None:
-        data["error_message"] = error_message
+@_instrumented
+def claim_failed_upload(upload_id: str, user_id: str, retry_count: int) -> bool:
+    """
+    Move a failed upload back to 'uploaded' for a retry.
+
+    Conditional on the row still being failed with the retry_count the caller
+    read, so only one of several concurrent retries wins. Returns True if
+    this caller claimed it.
+    """
     result = (
         get_client()
         .table("lease_uploads")
-        .update(data)
+        .update({
+            "status": "uploaded",
+            "error_message": None,
+            "failed_stage": None,
+            "retry_count": retry_count + 1,
+            "last_retry_at": datetime.now(timezone.utc).isoformat(),
+        })
         .eq("id", upload_id)
         .eq("user_id", user_id)
+        .eq("status", "failed")
+        .eq("retry_count", retry_count)
         .execute()
     )
-    return result.data[0]
+    return bool(result.data)
+
+
+@_instrumented
+def list_retryable_uploads(max_retries: int, limit: int = 20) -> list[dict]:
+    """
+    Failed uploads (all users) eligible for an automatic retry, oldest first.
+
+    Excludes failures before the file was stored (nothing to resume from) and
+    rows without a recorded failed_stage.
+    """
+    result = (
+        get_client()
+        .table("lease_uploads")
+        .select("id, user_id, file_name, retry_count, updated_at")
+        .eq("status", "failed")
+        .lt("retry_count", max_retries)
+        .not_.in_("failed_stage", ["validation", "storage"])
+        .not_.like("file_path", "%/pending/%")
+        .order("updated_at")
+        .limit(limit)
+        .execute()
+    )
+    return result.data
+
+
+@_instrumented
+def list_completed_leases(offset: int, limit: int = 100, since: str | None = None) -> list[dict]:
+    """
+    Completed uploads (all users, newest first) with their stored lease text,
+    extracted fields and encoded audit payload. Read-only — used by
+    scripts/shadow_eval.py to replay production leases.
+    """
+    query = (
+        get_client()
+        .table("lease_uploads")
+        .select(
+            f"id, file_name, created_at, lease_texts(content), "
+            f"extracted_data({EXTRACTED_DATA_COLUMNS}), extraction_audit(payload)"
+        )
+        .eq("status", "complete")
+    )
+    if since:
+        query = query.gte("created_at", since)
+    result = query.order("created_at", desc=True).range(offset, offset + limit - 1).execute()
+    return result.data
+
+
+# ---------------------------------------------------------------------------
+# lease_events
+# ---------------------------------------------------------------------------
+
+@_instrumented
+def insert_lease_events(events: list[dict]) -> None:
+    """Append stage events in one insert (the status trigger runs once per batch)."""
+    get_client().table("lease_events").insert(events).execute()
+
+
+# ---------------------------------------------------------------------------
+# rate_limit_buckets
+# ---------------------------------------------------------------------------
+
+@_instrumented
+def take_rate_limit_token(key: str, rate: float, burst: float) -> float:
+    """Take a token from a shared bucket. Returns 0 if allowed, else seconds to wait."""
+    result = get_client().rpc("take_rate_limit_token", {
+        "p_key": key,
+        "p_rate": rate,
+        "p_burst": burst,
+    }).execute()
+    return float(result.data or 0)
 
 
 # ---------------------------------------------------------------------------
 # extracted_data
 # ---------------------------------------------------------------------------
 
-def save_extracted_data(lease_upload_id: str, fields: dict, raw_ai_response: dict) -> dict:
+@_instrumented
+def save_extracted_data(lease_upload_id: str, fields: dict) -> dict:
     data = {
         "lease_upload_id": lease_upload_id,
         "tenant_name": fields.get("tenant_name"),
@@ -112,16 +257,166 @@ def save_extracted_data(lease_upload_id: str, fields: dict, raw_ai_response: dic
         "property_manager_name": fields.get("property_manager_name"),
         "property_manager_email": fields.get("property_manager_email"),
         "property_manager_phone": fields.get("property_manager_phone"),
-        "raw_ai_response": raw_ai_response,
     }
     result = get_client().table("extracted_data").insert(data).execute()
     return result.data[0]
 
 
+@_instrumented
 def get_extracted_data(lease_upload_id: str) -> dict | None:
     result = (
         get_client()
         .table("extracted_data")
+        .select(EXTRACTED_DATA_COLUMNS)
+        .eq("lease_upload_id", lease_upload_id)
+        .execute()
+    )
+    return result.data[0] if result.data else None
+
+
+# ---------------------------------------------------------------------------
+# extraction_audit — raw Gemini responses, gzip + base64
+# ---------------------------------------------------------------------------
+
+def encode_audit_payload(raw_ai_response: dict) -> str:
+    raw = json.dumps(raw_ai_response, separators=(",", ":")).encode("utf-8")
+    return base64.b64encode(gzip.compress(raw, mtime=0)).decode("ascii")
+
+
+def decode_audit_payload(payload: str) -> dict:
+    return json.loads(gzip.decompress(base64.b64decode(payload)))
+
+
+def save_extraction_audit(lease_upload_id: str, user_id: str, raw_ai_response: dict) -> None:
+    save_extraction_audits([{
+        "lease_upload_id": lease_upload_id,
+        "user_id": user_id,
+        "payload": encode_audit_payload(raw_ai_response),
+    }])
+
+
+@_instrumented
+def save_extraction_audits(rows: list[dict]) -> None:
+    """Insert encoded audit rows; rows already saved for an upload are kept."""
+    (
+        get_client()
+        .table("extraction_audit")
+        .upsert(rows, on_conflict="lease_upload_id", ignore_duplicates=True)
+        .execute()
+    )
+
+
+@_instrumented
+def get_extraction_audit(lease_upload_id: str) -> dict | None:
+    """
+    The decoded audit payload as {"raw_ai_response", "created_at"}. Falls back
+    to extracted_data.raw_ai_response for rows not yet backfilled.
+    """
+    result = (
+        get_client()
+        .table("extraction_audit")
+        .select("payload, created_at")
+        .eq("lease_upload_id", lease_upload_id)
+        .execute()
+    )
+    if result.data:
+        row = result.data[0]
+        return {"raw_ai_response": decode_audit_payload(row["payload"]), "created_at": row["created_at"]}
+
+    legacy = (
+        get_client()
+        .table("extracted_data")
+        .select("raw_ai_response, created_at")
+        .eq("lease_upload_id", lease_upload_id)
+        .not_.is_("raw_ai_response", "null")
+        .execute()
+    )
+    return legacy.data[0] if legacy.data else None
+
+
+@_instrumented
+def list_unmoved_ai_responses(limit: int) -> list[dict]:
+    """extracted_data rows still holding raw_ai_response, with the owning user_id."""
+    result = (
+        get_client()
+        .table("extracted_data")
+        .select("lease_upload_id, raw_ai_response, lease_uploads(user_id)")
+        .not_.is_("raw_ai_response", "null")
+        .order("created_at")
+        .limit(limit)
+        .execute()
+    )
+    return result.data
+
+
+@_instrumented
+def clear_raw_ai_responses(lease_upload_ids: list[str]) -> None:
+    (
+        get_client()
+        .table("extracted_data")
+        .update({"raw_ai_response": None})
+        .in_("lease_upload_id", lease_upload_ids)
+        .execute()
+    )
+
+
+# ---------------------------------------------------------------------------
+# lease_texts
+# ---------------------------------------------------------------------------
+
+@_instrumented
+def save_lease_text(
+    lease_upload_id: str,
+    user_id: str,
+    content: str,
+    text_hash: str,
+    paragraph_hashes: list[str],
+    minhash: list[int] | None = None,
+    minhash_bands: list[int] | None = None,
+) -> dict:
+    data = {
+        "lease_upload_id": lease_upload_id,
+        "user_id": user_id,
+        "content": content,
+        "text_hash": text_hash,
+        "paragraph_hashes": paragraph_hashes,
+        "minhash": minhash,
+        "minhash_bands": minhash_bands,
+    }
+    result = get_client().table("lease_texts").insert(data).execute()
+    return result.data[0]
+
+
+@_instrumented
+def update_lease_text(
+    lease_upload_id: str,
+    content: str,
+    text_hash: str,
+    paragraph_hashes: list[str],
+    minhash: list[int] | None = None,
+    minhash_bands: list[int] | None = None,
+) -> None:
+    """Replace a checkpointed text (a progressive PDF read that went on to read every page)."""
+    (
+        get_client()
+        .table("lease_texts")
+        .update({
+            "content": content,
+            "text_hash": text_hash,
+            "paragraph_hashes": paragraph_hashes,
+            "minhash": minhash,
+            "minhash_bands": minhash_bands,
+        })
+        .eq("lease_upload_id", lease_upload_id)
+        .execute()
+    )
+
+
+@_instrumented
+def get_lease_text(lease_upload_id: str) -> dict | None:
+    result = (
+        get_client()
+        .table("lease_texts")
         .select("*")
         .eq("lease_upload_id", lease_upload_id)
         .execute()
@@ -129,10 +424,78 @@ def get_extracted_data(lease_upload_id: str) -> dict | None:
     return result.data[0] if result.data else None
 
 
+@_instrumented
+def find_prior_lease_texts(
+    user_id: str, paragraph_hashes: list[str], exclude_upload_id: str, limit: int = 5
+) -> list[dict]:
+    """Most recent lease texts for this user sharing any of the given paragraph hashes."""
+    if not paragraph_hashes:
+        return []
+    result = (
+        get_client()
+        .table("lease_texts")
+        .select("lease_upload_id, text_hash, content, paragraph_hashes")
+        .eq("user_id", user_id)
+        .neq("lease_upload_id", exclude_upload_id)
+        .ov("paragraph_hashes", paragraph_hashes)
+        .order("created_at", desc=True)
+        .limit(limit)
+        .execute()
+    )
+    return result.data
+
+
+@_instrumented
+def find_lease_texts_by_bands(
+    user_id: str, band_keys: list[int], exclude_upload_id: str, limit: int = 50
+) -> list[dict]:
+    """This user's lease texts sharing any MinHash band key (near-duplicate candidates)."""
+    if not band_keys:
+        return []
+    result = (
+        get_client()
+        .table("lease_texts")
+        .select("lease_upload_id, minhash")
+        .eq("user_id", user_id)
+        .neq("lease_upload_id", exclude_upload_id)
+        .ov("minhash_bands", band_keys)
+        .order("created_at", desc=True)
+        .limit(limit)
+        .execute()
+    )
+    return result.data
+
+
+@_instrumented
+def list_lease_signatures(after: str | None, limit: int = 1000) -> list[dict]:
+    """Page through MinHash signatures of all stored lease texts, by lease_upload_id after `after`."""
+    query = (
+        get_client()
+        .table("lease_texts")
+        .select("lease_upload_id, minhash, minhash_bands")
+        .not_.is_("minhash", "null")
+    )
+    if after:
+        query = query.gt("lease_upload_id", after)
+    return query.order("lease_upload_id").limit(limit).execute().data
+
+
+@_instrumented
+def set_minhash_bands(lease_upload_id: str, minhash_bands: list[int]) -> None:
+    (
+        get_client()
+        .table("lease_texts")
+        .update({"minhash_bands": minhash_bands})
+        .eq("lease_upload_id", lease_upload_id)
+        .execute()
+    )
+
+
 # ---------------------------------------------------------------------------
 # welcome_packs
 # ---------------------------------------------------------------------------
 
+@_instrumented
 def save_welcome_pack(lease_upload_id: str, file_path: str, file_name: str) -> dict:
     data = {
         "lease_upload_id": lease_upload_id,
@@ -143,6 +506,7 @@ def save_welcome_pack(lease_upload_id: str, file_path: str, file_name: str) -> d
     return result.data[0]
 
 
+@_instrumented
 def get_welcome_pack(lease_upload_id: str) -> dict | None:
     result = (
         get_client()
@@ -154,23 +518,61 @@ def get_welcome_pack(lease_upload_id: str) -> dict | None:
     return result.data[0] if result.data else None
 
 
+# ---------------------------------------------------------------------------
+# Pipeline finalisation
+# ---------------------------------------------------------------------------
+
+@_instrumented
+def finalize_lease_upload(
+    upload_id: str,
+    user_id: str,
+    fields: dict,
+    raw_ai_response: dict | None,
+    pack_path: str,
+    pack_file_name: str,
+    events: list[dict],
+) -> None:
+    """
+    Save extracted_data, the compressed extraction_audit payload (when
+    raw_ai_response is given), the welcome_packs row and the upload's final
+    stage events in one transaction (see 008_extraction_audit.sql).
+    Rows already saved by an earlier attempt are left unchanged.
+    """
+    get_client().rpc("finalize_lease_upload", {
+        "p_upload_id": upload_id,
+        "p_user_id": user_id,
+        "p_fields": fields,
+        "p_audit_payload": encode_audit_payload(raw_ai_response) if raw_ai_response is not None else None,
+        "p_pack_path": pack_path,
+        "p_pack_file_name": pack_file_name,
+        "p_events": events,
+    }).execute()
+
+
 # ---------------------------------------------------------------------------
 # Storage — leases bucket
 # ---------------------------------------------------------------------------
 
+def lease_file_path(user_id: str, upload_id: str, file_name: str) -> str:
+    return f"{user_id}/{upload_id}/{file_name}"
+
+
+@_instrumented
 def upload_lease_file(
     user_id: str, upload_id: str, file_name: str, file_bytes: bytes, content_type: str
 ) -> str:
     """Upload a lease file and return the storage path."""
-    path = f"{user_id}/{upload_id}/{file_name}"
+    path = lease_file_path(user_id, upload_id, file_name)
     get_client().storage.from_("leases").upload(
         path=path,
         file=file_bytes,
-        file_options={"content-type": content_type},
+        # upsert so re-uploading a file whose first upload failed part-way succeeds
+        file_options={"content-type": content_type, "upsert": "true"},
     )
     return path
 
 
+@_instrumented
 def download_lease_file(file_path: str) -> bytes:
     """Download a lease file by its storage path."""
     return get_client().storage.from_("leases").download(file_path)
@@ -180,6 +582,7 @@ def download_lease_file(file_path: str) -> bytes:
 # Storage — welcome-packs bucket
 # ---------------------------------------------------------------------------
 
+@_instrumented
 def upload_welcome_pack_file(
     user_id: str, upload_id: str, file_name: str, file_bytes: bytes
 ) -> str:
@@ -188,16 +591,22 @@ def upload_welcome_pack_file(
     get_client().storage.from_("welcome-packs").upload(
         path=path,
         file=file_bytes,
-        file_options={"content-type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document"},
+        # upsert so a resumed pipeline can overwrite a pack whose DB row was never saved
+        file_options={
+            "content-type": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            "upsert": "true",
+        },
     )
     return path
 
 
+@_instrumented
 def download_welcome_pack_file(file_path: str) -> bytes:
     """Download a welcome pack .docx by its storage path."""
     return get_client().storage.from_("welcome-packs").download(file_path)
 
 
+@_instrumented
 def get_welcome_pack_download_url(file_path: str, expires_in: int = 300) -> str:
     """Generate a signed download URL for a welcome pack (default 5 min expiry)."""
     result = get_client().storage.from_("welcome-packs").create_signed_url(
@@ -2,17 +2,46 @@
 Unified text extraction service for lease files (DOCX + PDF).
 
 Extracts all text locally — no external API calls needed.
-- DOCX: walks the raw XML body in document order (paragraphs + tables interleaved)
-- PDF: extracts text page-by-page using PyMuPDF
+- DOCX: walks the body in document order (paragraphs + tables interleaved)
+  with python-docx; when the main document part is large, streams it out of
+  the zip instead so memory stays flat (slower per byte than one parse)
+- PDF: extracts text page-by-page using PyMuPDF; large PDFs are split into
+  page ranges extracted in parallel worker processes
 """
 
 import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
 
 import fitz  # PyMuPDF
 from docx import Document
 from docx.oxml.ns import qn
+from lxml import etree
 
+from app.config import settings
+from app.services import profiling, tracing
 
+logger = logging.getLogger(__name__)
+
+# Clark-notation tags, resolved once instead of calling qn() in inner loops
+_W_BODY = qn("w:body")
+_W_P = qn("w:p")
+_W_TBL = qn("w:tbl")
+_W_TR = qn("w:tr")
+_W_TC = qn("w:tc")
+_W_T = qn("w:t")
+
+_OFFICE_DOCUMENT_REL = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+
+
+@tracing.traced("text_extraction.extract_text")
+@profiling.profiled
 def extract_text(file_bytes: bytes, file_type: str) -> str:
     """
     Extract raw text from a PDF or DOCX file.
@@ -25,6 +54,11 @@ def extract_text(file_bytes: bytes, file_type: str) -> str:
         Clean text string suitable for sending to an AI model.
     """
     if file_type == "docx":
+        try:
+            if _document_part_size(file_bytes) >= settings.docx_streaming_min_mb * 1024 * 1024:
+                return _extract_docx_streaming(file_bytes)
+        except (zipfile.BadZipFile, KeyError, etree.XMLSyntaxError) as e:
+            logger.warning("Streaming DOCX extraction failed, using python-docx: %s", e)
         return _extract_docx(file_bytes)
     elif file_type == "pdf":
         return _extract_pdf(file_bytes)
@@ -66,15 +100,225 @@ def _extract_docx(file_bytes: bytes) -> str:
     return "\n".join(chunks)
 
 
+def _main_document_part(zf: zipfile.ZipFile) -> str:
+    """Resolve the main document part from the package relationships."""
+    try:
+        rels = etree.fromstring(zf.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels:
+        if rel.get("Type") == _OFFICE_DOCUMENT_REL:
+            return rel.get("Target", "word/document.xml").lstrip("/")
+    return "word/document.xml"
+
+
+def _document_part_size(file_bytes: bytes) -> int:
+    """Uncompressed size of the main document part, from the zip directory."""
+    with zipfile.ZipFile(io.BytesIO(file_bytes)) as zf:
+        return zf.getinfo(_main_document_part(zf)).file_size
+
+
+def _block_text(block) -> str:
+    return "".join(node.text for node in block.iter(_W_T) if node.text)
+
+
+def _extract_docx_streaming(file_bytes: bytes) -> str:
+    """
+    Same output as _extract_docx without building a python-docx Document.
+
+    Opens the zip directly and iterparses only the main document part,
+    handling each top-level paragraph/table as its end tag arrives and then
+    discarding it, so memory is bounded by the largest single block rather
+    than the whole document. Styles, numbering and other parts are never read.
+    iterparse costs more CPU than one tree build (~1.5x on large bodies), so
+    extract_text only uses this above DOCX_STREAMING_MIN_MB.
+    """
+    chunks: list[str] = []
+
+    with zipfile.ZipFile(io.BytesIO(file_bytes)) as zf, zf.open(_main_document_part(zf)) as xml:
+        # Same parser options python-docx uses, so whitespace handling matches
+        for _, block in etree.iterparse(
+            xml,
+            events=("end",),
+            tag=(_W_P, _W_TBL),
+            remove_blank_text=True,
+            resolve_entities=False,
+        ):
+            parent = block.getparent()
+            if parent is None or parent.tag != _W_BODY:
+                continue  # nested paragraph/table — handled with its top-level block
+
+            # Paragraph
+            if block.tag == _W_P:
+                text = _block_text(block).strip()
+                if text:
+                    chunks.append(text)
+
+            # Table — read row by row, cell by cell
+            else:
+                for row in block.iter(_W_TR):
+                    row_cells = [
+                        cell_text for cell_text in (_block_text(cell).strip() for cell in row.iter(_W_TC))
+                        if cell_text
+                    ]
+                    if row_cells:
+                        chunks.append(" | ".join(row_cells))
+
+            # Drop the finished block and any earlier siblings
+            block.clear(keep_tail=False)
+            while block.getprevious() is not None:
+                del parent[0]
+
+    return "\n".join(chunks)
+
+
+# ---------------------------------------------------------------------------
+# PDF
+# ---------------------------------------------------------------------------
+
+# RAM-backed when available, so workers map the file without touching disk
+_SHARED_TMP_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _pdf_workers() -> int:
+    return settings.pdf_extraction_workers or os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn, not fork — the server process has live threads and sockets
+        _pool = ProcessPoolExecutor(
+            max_workers=_pdf_workers(),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the PDF worker processes (called on app shutdown)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+def _format_page(index: int, text: str) -> str | None:
+    text = text.strip()
+    return f"--- Page {index + 1} ---\n{text}" if text else None
+
+
 def _extract_pdf(file_bytes: bytes) -> str:
     """
     Extract text page-by-page using PyMuPDF.
     'text' mode preserves reading order.
+
+    PDFs with at least settings.pdf_parallel_min_pages pages are handed to
+    _extract_pdf_parallel; the output is identical either way.
     """
     doc = fitz.open(stream=file_bytes, filetype="pdf")
+    if doc.page_count >= settings.pdf_parallel_min_pages and _pdf_workers() > 1:
+        page_count = doc.page_count
+        doc.close()
+        return _extract_pdf_parallel(file_bytes, page_count)
+
     pages: list[str] = []
     for i, page in enumerate(doc):
-        text = page.get_text("text")
-        if text.strip():
-            pages.append(f"--- Page {i + 1} ---\n{text.strip()}")
+        formatted = _format_page(i, page.get_text("text"))
+        if formatted:
+            pages.append(formatted)
+    return "\n\n".join(pages)
+
+
+def iter_pdf_windows(file_bytes: bytes, window_pages: int):
+    """
+    Yield (text, pages_read, page_count) for successive windows of pages.
+
+    Joining the non-empty window texts with blank lines reproduces
+    _extract_pdf exactly, so a caller can stop early and still hold a
+    prefix of the full extraction. PDFs with at least
+    settings.pdf_parallel_min_pages pages are read by _iter_pdf_windows_parallel.
+    """
+    doc = fitz.open(stream=file_bytes, filetype="pdf")
+    page_count = doc.page_count
+    if page_count >= settings.pdf_parallel_min_pages and _pdf_workers() > 1:
+        doc.close()
+        yield from _iter_pdf_windows_parallel(file_bytes, page_count, window_pages)
+        return
+
+    with doc:
+        for start in range(0, page_count, window_pages):
+            stop = min(start + window_pages, page_count)
+            pages = [
+                formatted for i in range(start, stop)
+                if (formatted := _format_page(i, doc[i].get_text("text")))
+            ]
+            yield "\n\n".join(pages), stop, page_count
+
+
+def _page_ranges(page_count: int, parts: int) -> list[tuple[int, int]]:
+    """Split [0, page_count) into `parts` contiguous, near-equal ranges."""
+    parts = max(1, min(parts, page_count))
+    size, extra = divmod(page_count, parts)
+    ranges = []
+    start = 0
+    for i in range(parts):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _extract_pdf_range(path: str, start: int, stop: int) -> list[str]:
+    """Worker: extract formatted pages [start, stop) from the shared file."""
+    with fitz.open(path, filetype="pdf") as doc:
+        pages = []
+        for i in range(start, stop):
+            formatted = _format_page(i, doc[i].get_text("text"))
+            if formatted:
+                pages.append(formatted)
+    return pages
+
+
+def _extract_pdf_parallel(file_bytes: bytes, page_count: int) -> str:
+    """
+    Extract page ranges in worker processes and reassemble them in order.
+
+    The PDF is written once to a temp file (on /dev/shm when available) that
+    every worker opens by path — MuPDF maps it through the shared page cache,
+    so the bytes are never pickled across the process boundary.
+    """
+    ranges = _page_ranges(page_count, _pdf_workers())
+    with tempfile.NamedTemporaryFile(suffix=".pdf", dir=_SHARED_TMP_DIR) as tmp:
+        tmp.write(file_bytes)
+        tmp.flush()
+        pool = _get_pool()
+        futures = [pool.submit(_extract_pdf_range, tmp.name, start, stop) for start, stop in ranges]
+        pages = [page for future in futures for page in future.result()]
     return "\n\n".join(pages)
+
+
+def _iter_pdf_windows_parallel(file_bytes: bytes, page_count: int, window_pages: int):
+    """
+    iter_pdf_windows for large PDFs: windows are extracted a batch at a time,
+    one window per worker process, and yielded in order. A reader that stops
+    early wastes at most the rest of one batch; the unstarted windows of that
+    batch are cancelled.
+    """
+    windows = [(start, min(start + window_pages, page_count)) for start in range(0, page_count, window_pages)]
+    batch_size = _pdf_workers()
+    with tempfile.NamedTemporaryFile(suffix=".pdf", dir=_SHARED_TMP_DIR) as tmp:
+        tmp.write(file_bytes)
+        tmp.flush()
+        pool = _get_pool()
+        for i in range(0, len(windows), batch_size):
+            batch = windows[i:i + batch_size]
+            futures = [pool.submit(_extract_pdf_range, tmp.name, start, stop) for start, stop in batch]
+            try:
+                for (_, stop), future in zip(batch, futures):
+                    yield "\n\n".join(future.result()), stop, page_count
+            finally:
+                for future in futures:
+                    future.cancel()
@@ -0,0 +1,249 @@
+"""
+Request tracing — spans across the router, pipeline stages, Gemini and
+Supabase calls, exported in Zipkin v2 JSON.
+
+Every HTTP request gets a trace id (taken from an incoming X-Trace-Id
+header, or generated), returned in the X-Trace-Id response header and
+added to every log record as %(trace_id)s. When the trace is sampled and
+an exporter is configured, spans are recorded with contextvars — so they
+nest across awaits, tasks and asyncio.to_thread — and finished spans are
+written by a background thread to:
+  - TRACE_EXPORT_PATH: a JSON-lines file (one span per line), readable
+    offline with scripts/trace_waterfall.py, or
+  - TRACE_COLLECTOR_URL: a Zipkin-compatible collector
+    (e.g. http://localhost:9411/api/v2/spans; Jaeger accepts it too).
+
+With no exporter configured, only the trace id is kept: span() and
+traced() are a context-variable lookup and nothing else.
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "acme-lease-processor"
+EXPORT_BATCH_SIZE = 100
+EXPORT_INTERVAL = 1.0  # seconds between writes while spans are queued
+TRACE_ID_PATTERN = re.compile(r"[0-9a-f]{16}|[0-9a-f]{32}")
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start: float
+    sampled: bool
+    kind: str | None = None
+    duration: float | None = None
+    tags: dict[str, str] = field(default_factory=dict)
+
+    def set_tag(self, key: str, value) -> None:
+        self.tags[key] = str(value)
+
+    def to_zipkin(self) -> dict:
+        data = {
+            "traceId": self.trace_id,
+            "id": self.span_id,
+            "name": self.name,
+            "timestamp": int(self.start * 1_000_000),
+            "duration": max(1, int((self.duration or 0) * 1_000_000)),
+            "localEndpoint": {"serviceName": SERVICE_NAME},
+            "tags": self.tags,
+        }
+        if self.parent_id:
+            data["parentId"] = self.parent_id
+        if self.kind:
+            data["kind"] = self.kind
+        return data
+
+
+_current: contextvars.ContextVar[Span | None] = contextvars.ContextVar("current_span", default=None)
+
+
+def _exporting() -> bool:
+    return bool(settings.trace_export_path or settings.trace_collector_url)
+
+
+def current_trace_id() -> str | None:
+    span = _current.get()
+    return span.trace_id if span else None
+
+
+# ---------------------------------------------------------------------------
+# Spans
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def start_trace(name: str, trace_id: str | None = None, **tags):
+    """Root span of a request. Reuses `trace_id` if it's a valid hex trace id."""
+    trace_id = (trace_id or "").lower()
+    if not TRACE_ID_PATTERN.fullmatch(trace_id):
+        trace_id = secrets.token_hex(16)
+    sampled = _exporting() and random.random() < settings.trace_sample_rate
+    root = Span(trace_id, secrets.token_hex(8), None, name, time.time(), sampled, kind="SERVER")
+    for key, value in tags.items():
+        root.set_tag(key, value)
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.set_tag("error", type(e).__name__)
+        raise
+    finally:
+        _current.reset(token)
+        _finish(root)
+
+
+@contextmanager
+def span(name: str, **tags):
+    """Child span of the current one; a no-op outside a sampled trace."""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        yield None
+        return
+    child = Span(parent.trace_id, secrets.token_hex(8), parent.span_id, name, time.time(), True)
+    for key, value in tags.items():
+        child.set_tag(key, value)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.set_tag("error", f"{type(e).__name__}: {e}"[:200])
+        raise
+    finally:
+        _current.reset(token)
+        _finish(child)
+
+
+def set_tags(**tags) -> None:
+    """Tag the current span (no-op outside a sampled trace)."""
+    current = _current.get()
+    if current is not None and current.sampled:
+        for key, value in tags.items():
+            current.set_tag(key, value)
+
+
+def record(name: str, duration_s: float, error: str | None = None, **tags) -> None:
+    """Record an already-finished child span that ended now (e.g. a pipeline stage)."""
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return
+    done = Span(parent.trace_id, secrets.token_hex(8), parent.span_id, name, time.time() - duration_s, True)
+    done.duration = duration_s
+    for key, value in tags.items():
+        done.set_tag(key, value)
+    if error:
+        done.set_tag("error", error[:200])
+    _export(done)
+
+
+def traced(name: str | None = None):
+    """Decorator: run each call of a sync or async function in a span."""
+    def decorator(fn):
+        span_name = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _finish(done: Span) -> None:
+    done.duration = time.time() - done.start
+    if done.sampled:
+        _export(done)
+
+
+# ---------------------------------------------------------------------------
+# Logging
+# ---------------------------------------------------------------------------
+
+class TraceIdFilter(logging.Filter):
+    """Adds record.trace_id ("-" outside a request) for %(trace_id)s in log formats."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id() or "-"
+        return True
+
+
+# ---------------------------------------------------------------------------
+# Exporter — background thread, off the event loop
+# ---------------------------------------------------------------------------
+_queue: queue.SimpleQueue = queue.SimpleQueue()
+_wakeup = threading.Event()
+_write_lock = threading.Lock()
+_worker: threading.Thread | None = None
+_worker_lock = threading.Lock()
+
+
+def _export(done: Span) -> None:
+    global _worker
+    _queue.put(done.to_zipkin())
+    _wakeup.set()
+    if _worker is None:
+        with _worker_lock:
+            if _worker is None:
+                _worker = threading.Thread(target=_export_forever, name="trace-exporter", daemon=True)
+                _worker.start()
+
+
+def _drain() -> list[dict]:
+    batch = []
+    while len(batch) < EXPORT_BATCH_SIZE:
+        try:
+            batch.append(_queue.get_nowait())
+        except queue.Empty:
+            break
+    return batch
+
+
+def _write(batch: list[dict]) -> None:
+    if settings.trace_export_path:
+        with open(settings.trace_export_path, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(item, separators=(",", ":")) + "\n" for item in batch)
+    if settings.trace_collector_url:
+        httpx.post(settings.trace_collector_url, json=batch, timeout=5.0).raise_for_status()
+
+
+def flush() -> None:
+    """Write every queued span now (also called on shutdown)."""
+    with _write_lock:
+        while batch := _drain():
+            try:
+                _write(batch)
+            except Exception as e:
+                logger.warning("Trace export failed, dropped %d spans: %s", len(batch), e)
+
+
+def _export_forever() -> None:
+    while True:
+        _wakeup.wait()
+        time.sleep(EXPORT_INTERVAL)  # let the rest of the trace finish
+        _wakeup.clear()
+        flush()
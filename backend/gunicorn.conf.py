@@ -0,0 +1,78 @@
+"""
+gunicorn configuration — production server mode with several API workers.
+
+Usage (from backend/, which is where gunicorn looks for this file):
+    gunicorn app.main:app
+
+The app is imported once in the master (preload_app) and WEB_CONCURRENCY
+uvicorn workers are forked from it, sharing settings, imports and the
+Welcome Pack template copy-on-write; app/prefork.py resets the per-process
+clients and buffers in each worker. Metrics are aggregated across workers
+through METRICS_MULTIPROC_DIR, and startup fails if more than one worker
+would each keep their own in-memory rate limits. See
+docs/deployment-sizing.md for how to pick the worker count.
+
+Signals: HUP replaces the workers gracefully (in-flight requests get
+GRACEFUL_TIMEOUT seconds to finish) — new code or a new template needs a
+redeploy, since preloaded state lives in the master. TERM is a graceful
+shutdown.
+"""
+
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+# Workers write their metric values here so /metrics reports all of them.
+# Set before the app (and app.config) is imported
+if not os.getenv("METRICS_MULTIPROC_DIR"):
+    os.environ["METRICS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="lease-metrics-")
+
+# An upload (text extraction + Gemini + docgen) can take a couple of minutes;
+# let it finish on reload/shutdown rather than cutting it off
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "120"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "180"))
+keepalive = 5
+
+# Recycle workers after this many requests (0 = never), jittered so they
+# don't all restart together
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = max_requests // 10
+
+
+def on_starting(server):
+    """Master, app imported, before the listening socket is opened."""
+    from app.config import settings
+
+    # In-memory buckets are per worker — each user would get N× the limits
+    if server.cfg.workers > 1 and settings.rate_limit_enabled and settings.rate_limit_backend == "memory":
+        server.log.error(
+            "RATE_LIMIT_BACKEND=memory cannot enforce rate limits across %d workers — "
+            "set RATE_LIMIT_BACKEND=supabase, WEB_CONCURRENCY=1 or RATE_LIMIT_ENABLED=false",
+            server.cfg.workers,
+        )
+        raise SystemExit(1)
+
+
+def when_ready(server):
+    """Master, before the first fork."""
+    from app import prefork
+    from app.services import metrics
+
+    metrics.clear_multiproc_dir()
+    prefork.preload()
+
+
+def post_fork(server, worker):
+    from app import prefork
+
+    prefork.after_fork()
+
+
+def child_exit(server, worker):
+    from app.services import metrics
+
+    metrics.mark_process_dead(worker.pid)
@@ -0,0 +1,39 @@
+-- ============================================================
+-- Acme Lease Processor — Stored lease text for renewals
+-- Migration: 002_lease_texts.sql
+-- ============================================================
+
+-- ============================================================
+-- Table: lease_texts
+-- Extracted text of each upload plus per-paragraph fingerprints,
+-- used to detect renewals/amendments of a previously processed
+-- lease and re-extract only the changed sections
+-- ============================================================
+CREATE TABLE IF NOT EXISTS lease_texts (
+    lease_upload_id UUID PRIMARY KEY REFERENCES lease_uploads(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    text_hash TEXT NOT NULL,
+    content TEXT NOT NULL,
+    paragraph_hashes TEXT[] NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- ============================================================
+-- Indexes
+-- ============================================================
+CREATE INDEX IF NOT EXISTS idx_lease_texts_user_id ON lease_texts(user_id);
+-- GIN index backs the overlap (&&) lookup for prior leases
+CREATE INDEX IF NOT EXISTS idx_lease_texts_paragraph_hashes ON lease_texts USING GIN (paragraph_hashes);
+
+-- ============================================================
+-- Row Level Security (RLS)
+-- ============================================================
+ALTER TABLE lease_texts ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own lease texts"
+    ON lease_texts FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can insert own lease texts"
+    ON lease_texts FOR INSERT
+    WITH CHECK (auth.uid() = user_id);
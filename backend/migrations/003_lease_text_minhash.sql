@@ -0,0 +1,9 @@
+-- ============================================================
+-- Acme Lease Processor — MinHash signatures for near-duplicates
+-- Migration: 003_lease_text_minhash.sql
+-- ============================================================
+
+-- MinHash signature (64 values) of the normalised lease text. Loaded into
+-- the in-memory LSH index on startup to flag re-uploads of the same lease
+-- in another format (PDF vs DOCX) or re-scanned copies.
+ALTER TABLE lease_texts ADD COLUMN IF NOT EXISTS minhash INTEGER[];
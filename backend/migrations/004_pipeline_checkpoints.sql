@@ -0,0 +1,21 @@
+-- ============================================================
+-- Acme Lease Processor — Resumable pipeline
+-- Migration: 004_pipeline_checkpoints.sql
+-- ============================================================
+
+-- Stage outputs are already checkpointed in their own tables
+-- (file_path, lease_texts, extracted_data, welcome_packs). These columns
+-- record where a run failed and how often it has been retried, so
+-- POST /api/lease/{id}/retry and the automatic retry worker can resume
+-- from the first incomplete stage.
+ALTER TABLE lease_uploads ADD COLUMN IF NOT EXISTS failed_stage TEXT;
+ALTER TABLE lease_uploads ADD COLUMN IF NOT EXISTS retry_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE lease_uploads ADD COLUMN IF NOT EXISTS last_retry_at TIMESTAMPTZ;
+
+-- ============================================================
+-- Indexes
+-- ============================================================
+-- Backs the retry worker's scan for failed uploads
+CREATE INDEX IF NOT EXISTS idx_lease_uploads_failed
+    ON lease_uploads(updated_at)
+    WHERE status = 'failed';
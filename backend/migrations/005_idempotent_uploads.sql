@@ -0,0 +1,25 @@
+-- ============================================================
+-- Acme Lease Processor — Idempotent uploads
+-- Migration: 005_idempotent_uploads.sql
+-- ============================================================
+
+-- content_hash: SHA-256 of the uploaded file bytes
+-- idempotency_key: optional Idempotency-Key header sent by the client
+--
+-- A repeated POST /api/lease/upload (same key, or same file for the same
+-- user) attaches to the existing upload instead of creating a new row,
+-- storage object and Gemini call. The unique indexes make the check safe
+-- across processes.
+ALTER TABLE lease_uploads ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE lease_uploads ADD COLUMN IF NOT EXISTS idempotency_key TEXT;
+
+-- ============================================================
+-- Indexes
+-- ============================================================
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lease_uploads_user_content_hash
+    ON lease_uploads(user_id, content_hash)
+    WHERE content_hash IS NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_lease_uploads_user_idempotency_key
+    ON lease_uploads(user_id, idempotency_key)
+    WHERE idempotency_key IS NOT NULL;
@@ -0,0 +1,84 @@
+-- ============================================================
+-- Acme Lease Processor — Pipeline stage events
+-- Migration: 006_lease_events.sql
+-- ============================================================
+
+-- ============================================================
+-- Table: lease_events
+-- Append-only log of pipeline stages: one row per completed (or
+-- failed) stage with its duration. The backend buffers events and
+-- inserts them in batches; lease_uploads.status is derived from the
+-- latest event by the trigger below, so the pipeline never writes
+-- the status column itself.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS lease_events (
+    id BIGSERIAL PRIMARY KEY,
+    lease_upload_id UUID NOT NULL REFERENCES lease_uploads(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL CHECK (status IN ('uploaded', 'extracting', 'extracted', 'generating', 'complete', 'failed')),
+    duration_ms INTEGER,
+    error_message TEXT,
+    occurred_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- ============================================================
+-- Indexes
+-- ============================================================
+CREATE INDEX IF NOT EXISTS idx_lease_events_lease_upload_id ON lease_events(lease_upload_id, id);
+CREATE INDEX IF NOT EXISTS idx_lease_events_stage_occurred_at ON lease_events(stage, occurred_at DESC);
+
+-- ============================================================
+-- Status trigger
+-- One UPDATE per upload per batch: only the latest event of each
+-- upload in the inserted batch is applied, so adjacent transitions
+-- flushed together collapse into a single write.
+-- ============================================================
+CREATE OR REPLACE FUNCTION apply_lease_events()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE lease_uploads AS u
+    SET status = e.status,
+        error_message = CASE WHEN e.status = 'failed' THEN e.error_message ELSE u.error_message END,
+        failed_stage = CASE WHEN e.status = 'failed' THEN e.stage ELSE u.failed_stage END
+    FROM (
+        SELECT DISTINCT ON (lease_upload_id) lease_upload_id, stage, status, error_message
+        FROM new_events
+        ORDER BY lease_upload_id, id DESC
+    ) AS e
+    WHERE u.id = e.lease_upload_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trigger_lease_events_status
+    AFTER INSERT ON lease_events
+    REFERENCING NEW TABLE AS new_events
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_lease_events();
+
+-- ============================================================
+-- View: per-stage latency by day
+-- ============================================================
+CREATE OR REPLACE VIEW lease_stage_latency
+WITH (security_invoker = true) AS
+SELECT
+    stage,
+    date_trunc('day', occurred_at) AS day,
+    COUNT(*) AS runs,
+    COUNT(*) FILTER (WHERE status = 'failed') AS failures,
+    percentile_cont(0.5) WITHIN GROUP (ORDER BY duration_ms) AS p50_ms,
+    percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms) AS p95_ms,
+    MAX(duration_ms) AS max_ms
+FROM lease_events
+WHERE duration_ms IS NOT NULL
+GROUP BY stage, date_trunc('day', occurred_at);
+
+-- ============================================================
+-- Row Level Security (RLS)
+-- ============================================================
+ALTER TABLE lease_events ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own lease events"
+    ON lease_events FOR SELECT
+    USING (auth.uid() = user_id);
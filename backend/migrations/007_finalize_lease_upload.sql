@@ -0,0 +1,91 @@
+-- ============================================================
+-- Acme Lease Processor — Atomic pipeline finalisation
+-- Migration: 007_finalize_lease_upload.sql
+-- ============================================================
+
+-- ============================================================
+-- lease_events: informational events
+-- Stages that run alongside others (the lease file upload runs
+-- concurrently with extraction) record their duration without a
+-- resulting status, so finishing late never moves an upload back
+-- to an earlier status.
+-- ============================================================
+ALTER TABLE lease_events ALTER COLUMN status DROP NOT NULL;
+
+CREATE OR REPLACE FUNCTION apply_lease_events()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE lease_uploads AS u
+    SET status = e.status,
+        error_message = CASE WHEN e.status = 'failed' THEN e.error_message ELSE u.error_message END,
+        failed_stage = CASE WHEN e.status = 'failed' THEN e.stage ELSE u.failed_stage END
+    FROM (
+        SELECT DISTINCT ON (lease_upload_id) lease_upload_id, stage, status, error_message
+        FROM new_events
+        WHERE status IS NOT NULL
+        ORDER BY lease_upload_id, id DESC
+    ) AS e
+    WHERE u.id = e.lease_upload_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- Function: finalize_lease_upload
+-- Writes everything the pipeline produces after the Gemini call in
+-- one transaction: the parsed fields (extracted_data), the Welcome
+-- Pack row (welcome_packs) and the upload's pending stage events,
+-- ending with its 'complete' event — the status trigger above sets
+-- lease_uploads.status in the same transaction. Either all rows are
+-- written or none are.
+--
+-- Rows already saved by an earlier attempt (a resumed upload) are
+-- kept as they are.
+-- ============================================================
+CREATE OR REPLACE FUNCTION finalize_lease_upload(
+    p_upload_id UUID,
+    p_user_id UUID,
+    p_fields JSONB,
+    p_raw_ai_response JSONB,
+    p_pack_path TEXT,
+    p_pack_file_name TEXT,
+    p_events JSONB
+)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM 1 FROM lease_uploads WHERE id = p_upload_id AND user_id = p_user_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Lease upload % not found', p_upload_id USING ERRCODE = 'no_data_found';
+    END IF;
+
+    INSERT INTO extracted_data (
+        lease_upload_id, tenant_name, property_address, lease_start_date, lease_end_date,
+        rent_amount, bond_amount, num_occupants, pet_permission, parking, special_conditions,
+        landlord_name, property_manager_name, property_manager_email, property_manager_phone,
+        raw_ai_response
+    )
+    SELECT
+        p_upload_id, f.tenant_name, f.property_address, f.lease_start_date, f.lease_end_date,
+        f.rent_amount, f.bond_amount, f.num_occupants, f.pet_permission, f.parking, f.special_conditions,
+        f.landlord_name, f.property_manager_name, f.property_manager_email, f.property_manager_phone,
+        p_raw_ai_response
+    FROM jsonb_to_record(p_fields) AS f(
+        tenant_name TEXT, property_address TEXT, lease_start_date TEXT, lease_end_date TEXT,
+        rent_amount TEXT, bond_amount TEXT, num_occupants TEXT, pet_permission TEXT, parking TEXT,
+        special_conditions TEXT, landlord_name TEXT, property_manager_name TEXT,
+        property_manager_email TEXT, property_manager_phone TEXT
+    )
+    ON CONFLICT (lease_upload_id) DO NOTHING;
+
+    INSERT INTO welcome_packs (lease_upload_id, file_path, file_name)
+    VALUES (p_upload_id, p_pack_path, p_pack_file_name)
+    ON CONFLICT (lease_upload_id) DO NOTHING;
+
+    -- One statement, so the status trigger applies the last event ('complete') once
+    INSERT INTO lease_events (lease_upload_id, user_id, stage, status, duration_ms, error_message, occurred_at)
+    SELECT p_upload_id, p_user_id, e.stage, e.status, e.duration_ms, e.error_message, e.occurred_at
+    FROM jsonb_to_recordset(p_events) AS e(
+        stage TEXT, status TEXT, duration_ms INTEGER, error_message TEXT, occurred_at TIMESTAMPTZ
+    );
+END;
+$$ LANGUAGE plpgsql;
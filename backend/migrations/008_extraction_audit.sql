@@ -0,0 +1,92 @@
+-- ============================================================
+-- Acme Lease Processor — Compressed extraction audit payloads
+-- Migration: 008_extraction_audit.sql
+-- ============================================================
+
+-- ============================================================
+-- Table: extraction_audit
+-- The raw Gemini response and extraction metadata for each upload,
+-- moved out of extracted_data so the rows read by the history and
+-- detail queries stay narrow. Payloads are gzip-compressed JSON,
+-- base64-encoded (see app/services/supabase.py), and are only read
+-- by GET /api/lease/{id}/audit.
+--
+-- Existing extracted_data.raw_ai_response values are moved here by
+-- backend/scripts/backfill_extraction_audit.py, in batches; the
+-- column can be dropped once it reports nothing left to move.
+-- ============================================================
+CREATE TABLE IF NOT EXISTS extraction_audit (
+    lease_upload_id UUID PRIMARY KEY REFERENCES lease_uploads(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    encoding TEXT NOT NULL DEFAULT 'gzip+base64',
+    payload TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- ============================================================
+-- Function: finalize_lease_upload
+-- Same as 007, but the audit payload goes to extraction_audit
+-- instead of extracted_data.raw_ai_response.
+-- ============================================================
+DROP FUNCTION IF EXISTS finalize_lease_upload(UUID, UUID, JSONB, JSONB, TEXT, TEXT, JSONB);
+
+CREATE OR REPLACE FUNCTION finalize_lease_upload(
+    p_upload_id UUID,
+    p_user_id UUID,
+    p_fields JSONB,
+    p_audit_payload TEXT,
+    p_pack_path TEXT,
+    p_pack_file_name TEXT,
+    p_events JSONB
+)
+RETURNS VOID AS $$
+BEGIN
+    PERFORM 1 FROM lease_uploads WHERE id = p_upload_id AND user_id = p_user_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Lease upload % not found', p_upload_id USING ERRCODE = 'no_data_found';
+    END IF;
+
+    INSERT INTO extracted_data (
+        lease_upload_id, tenant_name, property_address, lease_start_date, lease_end_date,
+        rent_amount, bond_amount, num_occupants, pet_permission, parking, special_conditions,
+        landlord_name, property_manager_name, property_manager_email, property_manager_phone
+    )
+    SELECT
+        p_upload_id, f.tenant_name, f.property_address, f.lease_start_date, f.lease_end_date,
+        f.rent_amount, f.bond_amount, f.num_occupants, f.pet_permission, f.parking, f.special_conditions,
+        f.landlord_name, f.property_manager_name, f.property_manager_email, f.property_manager_phone
+    FROM jsonb_to_record(p_fields) AS f(
+        tenant_name TEXT, property_address TEXT, lease_start_date TEXT, lease_end_date TEXT,
+        rent_amount TEXT, bond_amount TEXT, num_occupants TEXT, pet_permission TEXT, parking TEXT,
+        special_conditions TEXT, landlord_name TEXT, property_manager_name TEXT,
+        property_manager_email TEXT, property_manager_phone TEXT
+    )
+    ON CONFLICT (lease_upload_id) DO NOTHING;
+
+    IF p_audit_payload IS NOT NULL THEN
+        INSERT INTO extraction_audit (lease_upload_id, user_id, payload)
+        VALUES (p_upload_id, p_user_id, p_audit_payload)
+        ON CONFLICT (lease_upload_id) DO NOTHING;
+    END IF;
+
+    INSERT INTO welcome_packs (lease_upload_id, file_path, file_name)
+    VALUES (p_upload_id, p_pack_path, p_pack_file_name)
+    ON CONFLICT (lease_upload_id) DO NOTHING;
+
+    -- One statement, so the status trigger applies the last event ('complete') once
+    INSERT INTO lease_events (lease_upload_id, user_id, stage, status, duration_ms, error_message, occurred_at)
+    SELECT p_upload_id, p_user_id, e.stage, e.status, e.duration_ms, e.error_message, e.occurred_at
+    FROM jsonb_to_recordset(p_events) AS e(
+        stage TEXT, status TEXT, duration_ms INTEGER, error_message TEXT, occurred_at TIMESTAMPTZ
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- Row Level Security (RLS)
+-- ============================================================
+ALTER TABLE extraction_audit ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own extraction audit"
+    ON extraction_audit FOR SELECT
+    USING (auth.uid() = user_id);
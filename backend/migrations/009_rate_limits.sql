@@ -0,0 +1,53 @@
+-- ============================================================
+-- Acme Lease Processor — Shared rate limit buckets
+-- Migration: 009_rate_limits.sql
+-- Only needed with RATE_LIMIT_BACKEND=supabase
+-- ============================================================
+
+-- ============================================================
+-- Table: rate_limit_buckets
+-- One token bucket per "<user_id>:<endpoint class>", shared by
+-- every backend worker. Written only by take_rate_limit_token().
+-- ============================================================
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    key TEXT PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- ============================================================
+-- Function: take_rate_limit_token
+-- Refills the bucket for the time since its last use (p_rate tokens
+-- per second, up to p_burst) and takes one token. Returns 0 when the
+-- request is allowed, otherwise the seconds until a token is free.
+-- The upsert locks the row, so concurrent callers are serialised.
+-- ============================================================
+CREATE OR REPLACE FUNCTION take_rate_limit_token(
+    p_key TEXT,
+    p_rate DOUBLE PRECISION,
+    p_burst DOUBLE PRECISION
+)
+RETURNS DOUBLE PRECISION AS $$
+DECLARE
+    v_tokens DOUBLE PRECISION;
+BEGIN
+    INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+    VALUES (p_key, p_burst, clock_timestamp())
+    ON CONFLICT (key) DO UPDATE
+    SET tokens = LEAST(p_burst, b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at) * p_rate),
+        updated_at = clock_timestamp()
+    RETURNING tokens INTO v_tokens;
+
+    IF v_tokens >= 1 THEN
+        UPDATE rate_limit_buckets SET tokens = tokens - 1 WHERE key = p_key;
+        RETURN 0;
+    END IF;
+    RETURN (1 - v_tokens) / p_rate;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================================
+-- Row Level Security (RLS)
+-- No policies: only the service role (the backend) can use it.
+-- ============================================================
+ALTER TABLE rate_limit_buckets ENABLE ROW LEVEL SECURITY;
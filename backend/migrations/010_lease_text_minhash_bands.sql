@@ -0,0 +1,18 @@
+-- ============================================================
+-- Acme Lease Processor — Shared near-duplicate index
+-- Migration: 010_lease_text_minhash_bands.sql
+-- Run scripts/backfill_minhash_bands.py afterwards to key texts
+-- stored before this migration
+-- ============================================================
+
+-- One key per LSH band of the MinHash signature (see
+-- app/services/near_duplicates.py). Texts sharing a band key are
+-- near-duplicate candidates, so every worker looks them up here
+-- instead of in a per-process index.
+ALTER TABLE lease_texts ADD COLUMN IF NOT EXISTS minhash_bands BIGINT[];
+
+-- ============================================================
+-- Indexes
+-- ============================================================
+-- GIN index backs the overlap (&&) lookup for near-duplicates
+CREATE INDEX IF NOT EXISTS idx_lease_texts_minhash_bands ON lease_texts USING GIN (minhash_bands);
@@ -0,0 +1,81 @@
+"""
+Move extracted_data.raw_ai_response into extraction_audit (migration 008).
+
+Usage:
+    python scripts/backfill_extraction_audit.py [--batch-size 200] [--dry-run]
+
+Works in batches: each batch is compressed, inserted into extraction_audit
+(rows already there are kept) and only then cleared from extracted_data, so
+the script can be stopped and re-run at any point without losing payloads.
+Uses the SUPABASE_* settings from backend/.env.
+
+Exit code 0 = nothing left to move, 1 = a batch failed.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from app.services import supabase as db  # noqa: E402
+
+
+def _arg(name: str, default: str) -> str:
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def run_backfill():
+    batch_size = int(_arg("--batch-size", "200"))
+    dry_run = "--dry-run" in sys.argv
+
+    print("=" * 70)
+    print("EXTRACTION AUDIT BACKFILL" + (" (dry run)" if dry_run else ""))
+    print(f"Batch size: {batch_size}")
+    print("=" * 70)
+
+    moved = raw_total = packed_total = batches = 0
+    while True:
+        rows = db.list_unmoved_ai_responses(batch_size)
+        if not rows:
+            break
+        audits = []
+        for row in rows:
+            payload = db.encode_audit_payload(row["raw_ai_response"])
+            raw_total += len(json.dumps(row["raw_ai_response"], separators=(",", ":")))
+            packed_total += len(payload)
+            audits.append({
+                "lease_upload_id": row["lease_upload_id"],
+                "user_id": row["lease_uploads"]["user_id"],
+                "payload": payload,
+            })
+        batches += 1
+
+        if dry_run:
+            moved += len(rows)
+            break  # the same rows would be listed again
+        try:
+            db.save_extraction_audits(audits)
+            db.clear_raw_ai_responses([audit["lease_upload_id"] for audit in audits])
+        except Exception as e:
+            print(f"  ✗ Batch {batches} failed after {moved} rows: {e}")
+            return 1
+        moved += len(rows)
+        print(f"  Batch {batches}: {len(rows)} rows ({moved} total)")
+
+    print()
+    if raw_total:
+        print(f"  Payload size: {raw_total // 1024} KB → {packed_total // 1024} KB ({packed_total / raw_total:.0%})")
+    if dry_run:
+        print(f"  ✓ Dry run — first batch of {moved} rows compressed, nothing written")
+    else:
+        print(f"  ✓ Moved {moved} audit payloads — nothing left in extracted_data.raw_ai_response")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_backfill())
@@ -0,0 +1,72 @@
+"""
+Key stored lease texts for the shared near-duplicate index (migration 010).
+
+Usage:
+    python scripts/backfill_minhash_bands.py [--batch-size 1000] [--dry-run]
+
+Computes the LSH band keys of every stored MinHash signature and writes them
+to lease_texts.minhash_bands, skipping rows whose keys are already current.
+Run it once after migration 010 and again after changing
+NEAR_DUPLICATE_THRESHOLD, which changes the band layout. Safe to stop and
+re-run at any point. Uses the SUPABASE_* settings from backend/.env.
+
+Exit code 0 = every text keyed, 1 = an update failed.
+"""
+
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from app.services import near_duplicates as nd  # noqa: E402
+from app.services import supabase as db  # noqa: E402
+
+
+def _arg(name: str, default: str) -> str:
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def run_backfill():
+    batch_size = int(_arg("--batch-size", "1000"))
+    dry_run = "--dry-run" in sys.argv
+
+    print("=" * 70)
+    print("MINHASH BAND BACKFILL" + (" (dry run)" if dry_run else ""))
+    print(f"Batch size: {batch_size} | Bands: {nd.BANDS} x {nd.ROWS} rows")
+    print("=" * 70)
+
+    after = None
+    scanned = updated = 0
+    while True:
+        rows = db.list_lease_signatures(after, batch_size)
+        for row in rows:
+            if len(row["minhash"]) != nd.NUM_PERM:
+                continue
+            keys = nd.band_keys(row["minhash"])
+            if row.get("minhash_bands") == keys:
+                continue
+            if not dry_run:
+                try:
+                    db.set_minhash_bands(row["lease_upload_id"], keys)
+                except Exception as e:
+                    print(f"  ✗ {row['lease_upload_id']} failed after {updated} updates: {e}")
+                    return 1
+            updated += 1
+        scanned += len(rows)
+        if len(rows) < batch_size:
+            break
+        after = rows[-1]["lease_upload_id"]
+        print(f"  {scanned} texts scanned ({updated} re-keyed)")
+
+    print()
+    verb = "would be re-keyed" if dry_run else "re-keyed"
+    print(f"  ✓ {scanned} texts scanned — {updated} {verb}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_backfill())
@@ -0,0 +1,406 @@
+"""
+Shadow-evaluate a candidate prompt or model ladder against production leases.
+
+Usage:
+    python scripts/shadow_eval.py [--models gemini-2.5-flash] [--prompt candidate_prompt.txt]
+        [--limit 200] [--sample 0] [--since 2026-01-01] [--seed 1]
+        [--concurrency 8] [--rpm 600] [--min-agreement 0] [--out report.json]
+
+Replays the stored text of the most recent --limit completed uploads
+(lease_texts.content; --sample N picks N of them at random) through
+extract_fields with the candidate configuration, and diffs each field
+against the stored extracted_data. --models replaces GEMINI_MODEL_LADDER and
+--prompt replaces EXTRACTION_PROMPT (the file must keep the {lease_text}
+placeholder after "LEASE AGREEMENT TEXT:", and double any literal braces).
+
+Reads from Supabase only — nothing is written back, so production rows are
+never touched. Leases run --concurrency at a time; Gemini calls are paced to
+--rpm requests per minute (0 = unpaced), retried with backoff on 429/5xx, and
+the pace is halved on every 429.
+
+Reports per-field agreement with production, and candidate vs production
+latency, tokens, cost and escalation rate (production side from the
+extraction_audit attempts). --out writes every lease's diff as JSON. Works
+with GEMINI_CASSETTE_MODE (app/services/gemini_cassette.py) for repeat runs.
+
+Exit code 0 = every lease evaluated and agreement >= --min-agreement,
+1 = extraction errors, no leases, or agreement below the threshold.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+SCRIPT_DIR = Path(__file__).parent
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from google.genai import errors  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.middleware.rate_limit import TokenBucket  # noqa: E402
+from app.models.lease import ExtractedLeaseData  # noqa: E402
+from app.services import gemini  # noqa: E402
+from app.services import supabase as db  # noqa: E402
+
+FIELDS = list(ExtractedLeaseData.model_fields)
+PAGE_SIZE = 100
+RETRY_CODES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+MIN_RPM = 6
+
+# List prices, USD per 1M tokens (input, output); cached input is billed at
+# CACHED_INPUT_SHARE of the input price. Models not listed get no cost.
+PRICES_PER_MILLION = {
+    "gemini-2.5-flash-lite": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+CACHED_INPUT_SHARE = 0.25
+
+
+def _arg(name: str, default: str) -> str:
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+# ---------------------------------------------------------------------------
+# Rate-limit aware client
+# ---------------------------------------------------------------------------
+
+class PacedClient:
+    """
+    Wraps the Gemini client so generate_content waits for a token from a
+    shared bucket (rpm requests per minute) and retries 429/5xx with
+    exponential backoff. Each 429 halves the rate. Time spent waiting is
+    tracked per thread so it can be taken out of the measured latency.
+    """
+
+    def __init__(self, inner, rpm: float):
+        self.inner = inner
+        self.bucket = TokenBucket(rpm / 60, max(1.0, rpm / 60)) if rpm > 0 else None
+        self.retries: Counter = Counter()
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._rng = random.Random()
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)  # caches, batches
+
+    @property
+    def rpm(self) -> float:
+        return self.bucket.rate * 60 if self.bucket else 0.0
+
+    def waited(self) -> float:
+        """Seconds this thread has spent waiting since the last reset_waited()."""
+        return getattr(self._local, "waited", 0.0)
+
+    def reset_waited(self) -> None:
+        self._local.waited = 0.0
+
+    def _sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+        self._local.waited = self.waited() + seconds
+
+    def _take(self) -> None:
+        while self.bucket:
+            with self._lock:
+                wait = self.bucket.take(time.monotonic())
+            if not wait:
+                return
+            self._sleep(wait)
+
+    def generate_content(self, **kwargs):
+        for attempt in range(MAX_RETRIES + 1):
+            self._take()
+            try:
+                return self.inner.models.generate_content(**kwargs)
+            except errors.APIError as e:
+                if e.code not in RETRY_CODES or attempt == MAX_RETRIES:
+                    raise
+                with self._lock:
+                    self.retries[e.code] += 1
+                    if e.code == 429 and self.bucket:
+                        self.bucket.rate = max(self.bucket.rate / 2, MIN_RPM / 60)
+                self._sleep(min(60.0, 2.0 * 2 ** attempt) * (0.5 + self._rng.random()))
+
+
+# ---------------------------------------------------------------------------
+# Samples
+# ---------------------------------------------------------------------------
+
+def _decode_audit(row: dict) -> dict:
+    audit = row.get("extraction_audit")
+    if not audit:
+        return {}
+    try:
+        return db.decode_audit_payload(audit["payload"])
+    except Exception:
+        return {}
+
+
+def load_samples(limit: int, since: str | None, sample: int, seed: int) -> tuple[list[dict], int]:
+    """Completed leases with stored text and fields. Returns (samples, skipped without text)."""
+    samples: list[dict] = []
+    skipped = offset = 0
+    while offset < limit:
+        rows = db.list_completed_leases(offset, min(PAGE_SIZE, limit - offset), since)
+        for row in rows:
+            if not row.get("lease_texts") or not row.get("extracted_data"):
+                skipped += 1
+                continue
+            samples.append({
+                "id": row["id"],
+                "file_name": row.get("file_name"),
+                "text": row["lease_texts"]["content"],
+                "fields": row["extracted_data"],
+                "audit": _decode_audit(row),
+            })
+        if len(rows) < PAGE_SIZE:
+            break
+        offset += len(rows)
+    if sample and sample < len(samples):
+        samples = random.Random(seed).sample(samples, sample)
+    return samples, skipped
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+def _normalize(value) -> str | None:
+    if value is None:
+        return None
+    return " ".join(str(value).split()).casefold()
+
+
+def _attempt_stats(audit: dict) -> dict | None:
+    """Latency, tokens, cost and escalation of one extraction, from its raw_ai_response."""
+    attempts = audit.get("attempts")
+    if not attempts:
+        return None
+    latency = sum(a.get("latency_s", 0) + a.get("retry_latency_s", 0) for a in attempts)
+    prompt = cached = output = 0
+    cost = 0.0
+    for a in attempts:
+        usage = a.get("usage") or {}
+        a_prompt, a_cached, a_output = (usage.get(k) or 0 for k in ("prompt_tokens", "cached_tokens", "output_tokens"))
+        prompt, cached, output = prompt + a_prompt, cached + a_cached, output + a_output
+        price = PRICES_PER_MILLION.get(a.get("model"))
+        if price is None or cost is None:
+            cost = None
+            continue
+        cost += ((a_prompt - a_cached) * price[0] + a_cached * price[0] * CACHED_INPUT_SHARE + a_output * price[1]) / 1e6
+    return {
+        "latency_s": latency,
+        "prompt_tokens": prompt,
+        "cached_tokens": cached,
+        "output_tokens": output,
+        "cost_usd": cost if prompt or output else None,
+        "escalated": bool(audit.get("escalated")),
+        "model": audit.get("model"),
+    }
+
+
+def evaluate(sample: dict, client: PacedClient) -> dict:
+    """Run one stored lease through the candidate configuration and diff it."""
+    client.reset_waited()
+    start = time.perf_counter()
+    try:
+        extracted = asyncio.run(gemini.extract_fields(sample["text"]))
+    except Exception as e:
+        return {"id": sample["id"], "error": f"{type(e).__name__}: {str(e)[:200]}"}
+    wall = time.perf_counter() - start - client.waited()
+
+    raw = extracted.pop("raw_ai_response", {})
+    diffs = {
+        field: {"production": sample["fields"].get(field), "candidate": extracted.get(field)}
+        for field in FIELDS
+        if _normalize(sample["fields"].get(field)) != _normalize(extracted.get(field))
+    }
+    candidate = _attempt_stats(raw) or {}
+    if candidate:
+        candidate["latency_s"] = max(0.0, candidate["latency_s"] - client.waited())
+    candidate["wall_s"] = round(wall, 3)
+    return {
+        "id": sample["id"],
+        "file_name": sample["file_name"],
+        "diffs": diffs,
+        "candidate": candidate,
+        "production": _attempt_stats(sample["audit"]),
+    }
+
+
+def run_shadow(samples: list[dict], concurrency: int, rpm: float) -> tuple[list[dict], PacedClient, float]:
+    """Evaluate every sample. Returns (results, paced client, wall seconds)."""
+    client = PacedClient(gemini._get_client(), rpm)
+    gemini.use_client(client)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda sample: evaluate(sample, client), samples))
+    gemini.use_client(client.inner)
+    return results, client, time.perf_counter() - start
+
+
+def use_candidate_prompt(path: str) -> str:
+    """Swap in a candidate EXTRACTION_PROMPT. Returns its short hash."""
+    prompt = Path(path).read_text(encoding="utf-8")
+    if "LEASE AGREEMENT TEXT:" not in prompt or "{lease_text}" not in prompt:
+        raise ValueError(f'{path} must end with "LEASE AGREEMENT TEXT:" and the {{lease_text}} placeholder')
+    prompt.format(lease_text="")  # fails fast on unescaped braces
+    gemini.EXTRACTION_PROMPT = prompt
+    gemini.EXTRACTION_INSTRUCTIONS = prompt.split("LEASE AGREEMENT TEXT:")[0].format()
+    return hashlib.sha256(prompt.encode()).hexdigest()[:12]
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def _row(label: str, production: list, candidate: list, fmt: str, pct: float | None = None) -> None:
+    def stat(values):
+        if not values:
+            return None
+        return percentile(values, pct) if pct else sum(values) / len(values)
+
+    prod, cand = stat(production), stat(candidate)
+    cells = [format(v, fmt) if v is not None else "n/a" for v in (prod, cand)]
+    delta = f"{(cand - prod) / prod:+.0%}" if prod and cand is not None else ""
+    print(f"  {label:<24} {cells[0]:>12} {cells[1]:>12} {delta:>8}")
+
+
+def print_report(results: list[dict], client: PacedClient, wall: float) -> tuple[int, int]:
+    """Print the comparison. Returns (agreeing fields, compared fields)."""
+    done = [r for r in results if "error" not in r]
+    errored = [r for r in results if "error" in r]
+    print(f"\n  Evaluated: {len(done)}/{len(results)} in {wall:.1f}s ({len(done) / wall * 60 if wall else 0:.0f} leases/min)")
+
+    field_diffs = Counter(field for r in done for field in r["diffs"])
+    compared = len(done) * len(FIELDS)
+    agreeing = compared - sum(field_diffs.values())
+    print(f"  Field agreement: {agreeing}/{compared} ({agreeing / compared if compared else 0:.1%})")
+    print(f"  Leases agreeing on every field: {sum(1 for r in done if not r['diffs'])}/{len(done)}")
+
+    print(f"\n  {'Field':<24} {'Agree':>8} {'Rate':>8}")
+    for field in FIELDS:
+        agree = len(done) - field_diffs[field]
+        print(f"  {field:<24} {agree:>8} {agree / len(done) if done else 0:>8.1%}")
+
+    # Leases with production stats on both sides are compared like for like
+    paired = [r for r in done if r["production"] and r["candidate"]]
+    prod = [r["production"] for r in paired]
+    cand = [r["candidate"] for r in paired]
+    print(f"\n  {'Per lease (' + str(len(paired)) + ' with audit)':<24} {'Production':>12} {'Candidate':>12} {'Delta':>8}")
+    _row("Gemini latency p50 s", [p["latency_s"] for p in prod], [c["latency_s"] for c in cand], ".2f", 50)
+    _row("Gemini latency p95 s", [p["latency_s"] for p in prod], [c["latency_s"] for c in cand], ".2f", 95)
+    for kind in ("prompt", "cached", "output"):
+        _row(
+            f"{kind.capitalize()} tokens (mean)",
+            [p[f"{kind}_tokens"] for p in prod if p["prompt_tokens"]],
+            [c[f"{kind}_tokens"] for c in cand if c["prompt_tokens"]],
+            ",.0f",
+        )
+    _row(
+        "Cost per 1k leases $",
+        [p["cost_usd"] * 1000 for p in prod if p["cost_usd"] is not None],
+        [c["cost_usd"] * 1000 for c in cand if c["cost_usd"] is not None],
+        ".3f",
+    )
+    _row("Escalation rate", [float(p["escalated"]) for p in prod], [float(c["escalated"]) for c in cand], ".1%")
+
+    models = Counter(r["candidate"].get("model") for r in done)
+    print(f"\n  Candidate final model: {', '.join(f'{m} ×{n}' for m, n in models.most_common())}")
+    if client.retries:
+        retried = ", ".join(f"{code} ×{n}" for code, n in sorted(client.retries.items()))
+        print(f"  Rate limiting: retried {retried}; pace ended at {client.rpm:.0f} req/min")
+
+    by_field: dict[str, list] = defaultdict(list)
+    for r in done:
+        for field, diff in r["diffs"].items():
+            by_field[field].append((r["id"], diff))
+    if by_field:
+        print("\n  Disagreements (up to 3 per field):")
+        for field in FIELDS:
+            for upload_id, diff in by_field[field][:3]:
+                print(f"    {upload_id[:8]} {field}: {str(diff['production'])[:50]!r} → {str(diff['candidate'])[:50]!r}")
+
+    if errored:
+        print(f"\n  Extraction errors ({len(errored)}):")
+        for r in errored[:10]:
+            print(f"    ✗ {r['id'][:8]} {r['error']}")
+    return agreeing, compared
+
+
+def run_eval():
+    models = _arg("--models", "")
+    prompt_path = _arg("--prompt", "")
+    limit = int(_arg("--limit", "200"))
+    sample = int(_arg("--sample", "0"))
+    since = _arg("--since", "") or None
+    seed = int(_arg("--seed", "1"))
+    concurrency = int(_arg("--concurrency", "8"))
+    rpm = float(_arg("--rpm", "600"))
+    min_agreement = float(_arg("--min-agreement", "0"))
+    out_path = _arg("--out", "")
+
+    if models:
+        settings.gemini_model_ladder = models
+    prompt_label = f"{prompt_path} ({use_candidate_prompt(prompt_path)})" if prompt_path else "current EXTRACTION_PROMPT"
+
+    print("=" * 70)
+    print("SHADOW EVALUATION — candidate extraction vs production")
+    print(f"Models: {', '.join(settings.gemini_models)}")
+    print(f"Prompt: {prompt_label}")
+    print(f"Concurrency: {concurrency} | Pace: {f'{rpm:.0f} req/min' if rpm > 0 else 'unpaced'}")
+    print("=" * 70)
+
+    samples, skipped = load_samples(limit, since, sample, seed)
+    print(f"\n  Leases: {len(samples)} (of the {limit} most recent completed" + (f" since {since}" if since else "") + ")")
+    if skipped:
+        print(f"  Skipped {skipped} without stored text or fields")
+    if not samples:
+        print("\n  ✗ No leases to evaluate")
+        return 1
+
+    results, client, wall = run_shadow(samples, concurrency, rpm)
+    agreeing, compared = print_report(results, client, wall)
+
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            json.dump({"models": settings.gemini_models, "prompt": prompt_label, "results": results}, f, indent=2)
+        print(f"\n  Per-lease results written to {out_path}")
+
+    errors_count = sum(1 for r in results if "error" in r)
+    agreement = agreeing / compared if compared else 0.0
+    print()
+    if errors_count:
+        print(f"  ✗ FAIL — {errors_count} lease(s) failed to extract")
+        return 1
+    if agreement < min_agreement:
+        print(f"  ✗ FAIL — agreement {agreement:.1%} below {min_agreement:.1%}")
+        return 1
+    print(f"  ✓ {len(results)} leases evaluated — {agreement:.1%} field agreement with production")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_eval())
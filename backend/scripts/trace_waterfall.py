@@ -0,0 +1,108 @@
+"""
+Print a request trace from a TRACE_EXPORT_PATH file as a waterfall.
+
+Usage:
+    python scripts/trace_waterfall.py traces.jsonl [--trace <trace id>] [--slowest 5]
+
+With --trace, prints that trace (the id is in the X-Trace-Id response
+header and in every log line of the request). Without it, lists the
+slowest requests in the file and prints the slowest one. Spans are
+nested under their parent and drawn on a shared time axis, so it's
+visible at a glance whether Storage, Gemini or docgen held a request up.
+
+Exit code 0 = trace printed, 1 = no matching trace.
+"""
+
+import json
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+BAR_WIDTH = 40
+
+
+def _arg(name: str, default: str | None) -> str | None:
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def load_traces(path: Path) -> dict[str, list[dict]]:
+    traces: dict[str, list[dict]] = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces[span["traceId"]].append(span)
+    return traces
+
+
+def _root(spans: list[dict]) -> dict:
+    roots = [span for span in spans if not span.get("parentId")]
+    return max(roots or spans, key=lambda span: span["duration"])
+
+
+def print_waterfall(spans: list[dict]) -> None:
+    start = min(span["timestamp"] for span in spans)
+    end = max(span["timestamp"] + span["duration"] for span in spans)
+    total = max(1, end - start)
+
+    children: dict[str | None, list[dict]] = defaultdict(list)
+    ids = {span["id"] for span in spans}
+    for span in spans:
+        # Spans whose parent wasn't exported hang off the top level
+        parent = span.get("parentId") if span.get("parentId") in ids else None
+        children[parent].append(span)
+
+    root = _root(spans)
+    print("=" * 70)
+    print(f"TRACE {root['traceId']} — {root['name']} — {root['duration'] / 1000:.1f}ms")
+    print("=" * 70)
+
+    def walk(parent: str | None, depth: int) -> None:
+        for span in sorted(children[parent], key=lambda s: s["timestamp"]):
+            offset = round((span["timestamp"] - start) / total * BAR_WIDTH)
+            width = max(1, round(span["duration"] / total * BAR_WIDTH))
+            bar = " " * offset + "█" * min(width, BAR_WIDTH - offset)
+            marker = "✗" if "error" in span.get("tags", {}) else " "
+            label = ("  " * depth + span["name"])[:34]
+            print(f"{marker} {label:<34} {bar:<{BAR_WIDTH}} {span['duration'] / 1000:>9.1f}ms")
+            walk(span["id"], depth + 1)
+
+    walk(None, 0)
+
+    errors = [span for span in spans if "error" in span.get("tags", {})]
+    for span in errors:
+        print(f"✗ {span['name']}: {span['tags']['error']}")
+
+
+def run():
+    if len(sys.argv) < 2 or sys.argv[1].startswith("--"):
+        print(__doc__)
+        sys.exit(1)
+
+    traces = load_traces(Path(sys.argv[1]))
+    trace_id = _arg("--trace", None)
+    if trace_id:
+        spans = traces.get(trace_id.lower())
+        if not spans:
+            print(f"✗ Trace {trace_id} not found in {sys.argv[1]}")
+            sys.exit(1)
+        print_waterfall(spans)
+        return
+
+    if not traces:
+        print(f"✗ No spans in {sys.argv[1]}")
+        sys.exit(1)
+    slowest = sorted(traces.values(), key=lambda spans: _root(spans)["duration"], reverse=True)
+    count = int(_arg("--slowest", "5"))
+    print(f"Slowest {min(count, len(slowest))} of {len(traces)} traces:")
+    for spans in slowest[:count]:
+        root = _root(spans)
+        print(f"  {root['traceId']}  {root['duration'] / 1000:>9.1f}ms  {root['name']}")
+    print()
+    print_waterfall(slowest[0])
+
+
+if __name__ == "__main__":
+    run()
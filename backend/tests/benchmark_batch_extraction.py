@@ -0,0 +1,168 @@
+"""
+Batch extraction benchmark — runs the sample leases through
+gemini.extract_fields_batch and compares results to ground_truth.json.
+
+Usage:
+    python tests/benchmark_batch_extraction.py                 # local stand-in, no network
+    python tests/benchmark_batch_extraction.py --live          # real Gemini (GEMINI_API_KEY)
+    python tests/benchmark_batch_extraction.py --copies 40     # repeat the 5 leases 40x
+    python tests/benchmark_batch_extraction.py --null 3        # malformed items in a valid batch
+
+The stand-in answers packed prompts from ground_truth.json, so it exercises
+packing, demultiplexing, validation and single-lease fallback end to end
+without an API key. Use --corrupt N to make the stand-in return a bad email
+for every Nth lease, or --null N to return "rent_amount": null for every Nth
+lease, and exercise the fallback path (only those leases should fall back).
+
+Exit code 0 = all leases extracted and matched, 1 = failures detected.
+"""
+
+import asyncio
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+SCRIPT_DIR = Path(__file__).parent
+GROUND_TRUTH_PATH = SCRIPT_DIR / "ground_truth.json"
+TEMPLATE_DIR = SCRIPT_DIR.parent.parent / "template"
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from app.services import gemini  # noqa: E402
+from app.services.text_extraction import extract_text  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# Local stand-in for the Gemini client
+# ---------------------------------------------------------------------------
+
+class GroundTruthStandIn:
+    """
+    Fake Gemini client that answers from ground_truth.json.
+
+    Each lease in a prompt is identified by the tenant name it contains.
+    Packed prompts get a JSON array; single-lease prompts get one object.
+    """
+
+    def __init__(self, ground_truth: dict, corrupt_every: int = 0, null_every: int = 0):
+        self.ground_truth = list(ground_truth.values())
+        self.corrupt_every = corrupt_every
+        self.null_every = null_every
+        self.calls = 0
+        self.answered = 0
+        self.models = SimpleNamespace(generate_content=self.generate_content)
+
+    def _answer_for(self, lease_text: str) -> dict:
+        haystack = " ".join(lease_text.split())
+        for fields in self.ground_truth:
+            if fields["tenant_name"].split(" & ")[0] in haystack:
+                return dict(fields)
+        raise ValueError("stand-in could not identify lease")
+
+    def generate_content(self, model: str, contents: str):
+        self.calls += 1
+        sections = re.split(r"^=== LEASE (\d+) ===$", contents, flags=re.MULTILINE)
+        if len(sections) > 1:
+            answers = []
+            for index, text in zip(sections[1::2], sections[2::2]):
+                answer = self._answer_for(text)
+                answer["lease_index"] = int(index)
+                self.answered += 1
+                if self.corrupt_every and self.answered % self.corrupt_every == 0:
+                    answer["property_manager_email"] = "unknown@example.com"
+                if self.null_every and self.answered % self.null_every == 0:
+                    answer["rent_amount"] = None
+                answers.append(answer)
+            return SimpleNamespace(text=json.dumps(answers))
+        lease_text = contents.split("LEASE AGREEMENT TEXT:")[-1]
+        return SimpleNamespace(text=json.dumps(self._answer_for(lease_text)))
+
+
+# ---------------------------------------------------------------------------
+# Main benchmark
+# ---------------------------------------------------------------------------
+
+def _arg(name: str, default: int) -> int:
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def run_benchmark():
+    live = "--live" in sys.argv
+    copies = _arg("--copies", 1)
+    corrupt_every = _arg("--corrupt", 0)
+    null_every = _arg("--null", 0)
+
+    with open(GROUND_TRUTH_PATH) as f:
+        ground_truth = json.load(f)
+
+    stand_in = None
+    if not live:
+        stand_in = GroundTruthStandIn(ground_truth, corrupt_every, null_every)
+        gemini.use_client(stand_in)
+
+    names: list[str] = []
+    texts: list[str] = []
+    for file_name in ground_truth:
+        file_path = TEMPLATE_DIR / file_name
+        if not file_path.exists():
+            print(f"SKIPPED: {file_name} — file not found")
+            continue
+        text = extract_text(file_path.read_bytes(), "docx")
+        names.extend([file_name] * copies)
+        texts.extend([text] * copies)
+
+    print("=" * 70)
+    print("BATCH EXTRACTION BENCHMARK")
+    print(f"Mode: {'live Gemini' if live else 'local stand-in'}")
+    print(f"Leases: {len(texts)} | Batch size: {gemini.settings.gemini_batch_size}")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    results = asyncio.run(gemini.extract_fields_batch(texts))
+    elapsed = time.perf_counter() - start
+
+    batched = 0
+    fallback = 0
+    failures: list[str] = []
+    for file_name, result in zip(names, results):
+        if result is None:
+            failures.append(f"{file_name}: extraction failed")
+            continue
+        raw = result.pop("raw_ai_response", {})
+        if "batch" in raw:
+            batched += 1
+        else:
+            fallback += 1
+        for field, expected in ground_truth[file_name].items():
+            if field in ("rent_amount", "pet_permission", "parking", "special_conditions") and live:
+                continue  # paraphrased fields are scored by benchmark_extraction.py
+            if result.get(field) != expected:
+                failures.append(f"{file_name} → {field}: expected {expected!r}, got {result.get(field)!r}")
+
+    print(f"\n  Total time: {elapsed:.2f}s ({len(texts) / elapsed:.1f} leases/s)")
+    print(f"  Served from batch: {batched} | Single-lease fallback: {fallback}")
+    if stand_in is not None:
+        bad = stand_in.answered // stand_in.null_every if stand_in.null_every else 0
+        bad += stand_in.answered // stand_in.corrupt_every if stand_in.corrupt_every else 0
+        if bad and fallback != bad:
+            failures.append(f"{fallback} lease(s) fell back, expected exactly the {bad} malformed one(s)")
+    if stand_in is not None:
+        print(f"  Model calls: {stand_in.calls} (vs {len(texts)} unbatched)")
+
+    if failures:
+        print(f"\n  FAILURES ({len(failures)}):")
+        for fail in failures:
+            print(f"    ✗ {fail}")
+        return 1
+
+    print("\n  ✓ ALL LEASES EXTRACTED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_benchmark())
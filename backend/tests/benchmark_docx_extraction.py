@@ -0,0 +1,165 @@
+"""
+DOCX text extraction micro-benchmark — python-docx walker vs streaming
+extractor.
+
+Usage:
+    python tests/benchmark_docx_extraction.py [--scales 1,10,50,200] [--repeat 5]
+
+Checks, fully offline:
+  1. Output parity: the streaming extractor reproduces _extract_docx exactly
+     for all 5 sample leases (and the scaled documents below)
+  2. Speed: mean time per extraction at each document scale
+  3. Memory: peak RSS growth per extraction (Linux VmHWM), measured in a
+     fresh subprocess for each (extractor, scale). The streaming extractor
+     should stay near-flat as documents grow; the python-docx walker grows
+     with document size. The extractor extract_text picks at each scale
+     (DOCX_STREAMING_MIN_MB) is marked with *.
+
+Scaled documents repeat the body of a sample lease N times.
+
+Exit code 0 = parity holds everywhere, 1 = any mismatch.
+"""
+
+import io
+import json
+import subprocess
+import sys
+import time
+from copy import deepcopy
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+GROUND_TRUTH_PATH = SCRIPT_DIR / "ground_truth.json"
+TEMPLATE_DIR = SCRIPT_DIR.parent.parent / "template"
+SCALE_SOURCE = TEMPLATE_DIR / "Lease Agreement - Raj Patel.docx"
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from docx import Document  # noqa: E402
+from docx.oxml.ns import qn  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.services import text_extraction  # noqa: E402
+
+EXTRACTORS = {
+    "python-docx": text_extraction._extract_docx,
+    "streaming": text_extraction._extract_docx_streaming,
+}
+
+
+def scaled_docx(source: bytes, scale: int) -> bytes:
+    """Repeat the body content of a DOCX `scale` times."""
+    doc = Document(io.BytesIO(source))
+    body = doc.element.body
+    blocks = [el for el in body if el.tag != qn("w:sectPr")]
+    sect_pr = body.find(qn("w:sectPr"))
+    for _ in range(scale - 1):
+        for block in blocks:
+            if sect_pr is not None:
+                sect_pr.addprevious(deepcopy(block))
+            else:
+                body.append(deepcopy(block))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def _peak_rss_kb() -> int:
+    """VmHWM of this process (unlike ru_maxrss, not inherited across exec)."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1])
+    return 0
+
+
+def measure_rss(extractor: str, path: str) -> None:
+    """Subprocess entry point: print peak RSS growth (KB) for one extraction."""
+    file_bytes = Path(path).read_bytes()
+    fn = EXTRACTORS[extractor]
+    fn(SCALE_SOURCE.read_bytes())  # warm imports and parser state
+    before = _peak_rss_kb()
+    fn(file_bytes)
+    print(_peak_rss_kb() - before)
+
+
+def _arg(name: str, default: str) -> str:
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def run_benchmark():
+    scales = [int(s) for s in _arg("--scales", "1,10,50,200").split(",")]
+    repeat = int(_arg("--repeat", "5"))
+    failures: list[str] = []
+
+    with open(GROUND_TRUTH_PATH) as f:
+        lease_files = list(json.load(f))
+
+    print("=" * 70)
+    print("DOCX EXTRACTION BENCHMARK — python-docx vs streaming")
+    print("=" * 70)
+
+    # 1. Parity on the sample leases
+    print("\nParity (sample leases):")
+    for file_name in lease_files:
+        file_path = TEMPLATE_DIR / file_name
+        if not file_path.exists():
+            print(f"  SKIPPED: {file_name} — file not found")
+            continue
+        file_bytes = file_path.read_bytes()
+        same = text_extraction._extract_docx(file_bytes) == text_extraction._extract_docx_streaming(file_bytes)
+        print(f"  {'✓' if same else '✗'} {file_name}")
+        if not same:
+            failures.append(f"{file_name}: output differs")
+
+    # 2 + 3. Speed and memory at each scale
+    print(f"\n  * = used by extract_text (streaming from {settings.docx_streaming_min_mb} MB of document XML)")
+    print(f"\n  {'Scale':>5} {'Size KB':>8} {'Extractor':<12} {'Mean ms':>9} {'Peak RSS +KB':>13}")
+    tmp_dir = SCRIPT_DIR / ".bench_tmp"
+    tmp_dir.mkdir(exist_ok=True)
+    source = SCALE_SOURCE.read_bytes()
+    for scale in scales:
+        file_bytes = scaled_docx(source, scale)
+        tmp_path = tmp_dir / f"scaled_{scale}.docx"
+        tmp_path.write_bytes(file_bytes)
+
+        streamed = (
+            text_extraction._document_part_size(file_bytes)
+            >= settings.docx_streaming_min_mb * 1024 * 1024
+        )
+        outputs = {}
+        for name, fn in EXTRACTORS.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                outputs[name] = fn(file_bytes)
+            mean_ms = (time.perf_counter() - start) / repeat * 1000
+
+            rss = subprocess.run(
+                [sys.executable, __file__, "--measure-rss", name, str(tmp_path)],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+            used = "*" if (name == "streaming") == streamed else " "
+            print(f"  {scale:>5} {len(file_bytes) // 1024:>8} {used}{name:<11} {mean_ms:>9.1f} {rss:>13}")
+
+        if outputs["python-docx"] != outputs["streaming"]:
+            failures.append(f"scale {scale}: output differs")
+        tmp_path.unlink()
+    tmp_dir.rmdir()
+
+    print()
+    if failures:
+        print(f"  ✗ FAILURES ({len(failures)}):")
+        for fail in failures:
+            print(f"    ✗ {fail}")
+        return 1
+    print("  ✓ Streaming output identical at every scale")
+    return 0
+
+
+if __name__ == "__main__":
+    if "--measure-rss" in sys.argv:
+        i = sys.argv.index("--measure-rss")
+        measure_rss(sys.argv[i + 1], sys.argv[i + 2])
+        sys.exit(0)
+    sys.exit(run_benchmark())
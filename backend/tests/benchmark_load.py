@@ -0,0 +1,360 @@
+"""
+Load generator — concurrent uploads mixed with history/detail/download reads.
+
+Usage:
+    python tests/benchmark_load.py [--offline] [--mode closed|open]
+        [--concurrency 4] [--rate 2] [--duration 30]
+        [--mix upload=1,history=4,detail=4,download=1]
+        [--ramp] [--ramp-factor 2] [--max-level 256]
+        [--max-error-rate 0.01] [--p99-target 1.0] [--upload-p99-target 60]
+        [--users 8] [--report load_report.json] [--files 200] [--no-rate-limit]
+        [--corpus DIR] [--url URL]
+
+Modes:
+    closed  --concurrency virtual users, each sending its next request as
+            soon as the previous one returns (throughput follows latency)
+    open    requests arrive at --rate per second (Poisson), whether or not
+            earlier ones have finished — queueing shows up as latency; at
+            most --max-outstanding are in flight, the rest count as dropped.
+            Requests are spread over --users virtual users.
+
+Targets:
+    default    the running API at API_URL, authenticated as the test user
+               (same env/.env settings as benchmark_extraction.py)
+    --offline  the app in-process with the tests/fakes.py stand-ins; each
+               virtual user is a separate account (--gemini-latency,
+               --db-latency and --storage-latency as in benchmark_offline.py;
+               --no-rate-limit turns off the per-user limits to find raw capacity)
+    --offline --url URL
+               a server running tests/offline_server.py (e.g. under gunicorn
+               with several workers), with the same per-user tokens
+
+Uploads are drawn from the 5 sample leases, or from a generated corpus
+(tests/generate_corpus.py) with --corpus DIR.
+
+Each step runs for --duration seconds. With --ramp the level (concurrency
+or rate) is multiplied by --ramp-factor after every step until the error
+rate exceeds --max-error-rate, read p99 exceeds --p99-target or upload
+p99 exceeds --upload-p99-target (seconds), or --max-level is reached.
+Errors are 5xx, unexpected 4xx, timeouts and dropped requests; 429s are
+reported separately as rate-limited.
+
+Writes a JSON report (config, per-step throughput, error counts and
+per-operation p50/p95/p99) for diffing across releases, and prints a
+summary table.
+
+Exit code 0 = no step breached the targets, 1 = a target was breached.
+"""
+
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+SCRIPT_DIR = Path(__file__).parent
+GROUND_TRUTH_PATH = SCRIPT_DIR / "ground_truth.json"
+if "--corpus" in sys.argv:
+    GROUND_TRUTH_PATH = Path(sys.argv[sys.argv.index("--corpus") + 1]) / "ground_truth.json"
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+import benchmark_extraction  # noqa: E402
+from benchmark_offline import _arg, build_uploads, make_token, percentile, setup_offline  # noqa: E402
+from fakes import Latency  # noqa: E402
+
+OPERATIONS = ("upload", "history", "detail", "download")
+REQUEST_TIMEOUT = 300  # seconds
+DRAIN_TIMEOUT = 300  # seconds to wait for in-flight requests after a step
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        op, _, weight = part.partition("=")
+        if op.strip() not in OPERATIONS:
+            raise ValueError(f"Unknown operation {op!r} — expected one of {OPERATIONS}")
+        mix[op.strip()] = float(weight or 1)
+    return mix
+
+
+class LoadState:
+    """Lease files to upload and the upload ids each user can read back."""
+
+    def __init__(self, uploads: list[tuple], tokens: dict[str, str], mix: dict[str, float], seed: int):
+        self.uploads = uploads
+        self.next_upload = 0
+        self.tokens = tokens  # virtual user → bearer token
+        self.upload_ids: dict[str, list[str]] = defaultdict(list)  # per token (the owning account)
+        self.rng = random.Random(seed)
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+
+    def pick_operation(self) -> str:
+        return self.rng.choices(self.operations, self.weights)[0]
+
+    def take_upload(self) -> tuple[str, bytes]:
+        name, data, _ = self.uploads[self.next_upload % len(self.uploads)]
+        self.next_upload += 1
+        return name, data
+
+
+async def send(client: httpx.AsyncClient, state: LoadState, user: str, op: str) -> dict:
+    """Send one request. Returns {"op", "status", "latency"} (status 0 = transport error)."""
+    token = state.tokens[user]
+    headers = {"Authorization": f"Bearer {token}"}
+    owned = state.upload_ids[token]
+    if op in ("detail", "download") and not owned:
+        op = "history"  # nothing of this user's to read yet
+
+    start = time.perf_counter()
+    try:
+        if op == "upload":
+            name, data = state.take_upload()
+            resp = await client.post(
+                "/api/lease/upload", headers=headers,
+                files={"file": (name, data, "application/octet-stream")},
+            )
+            if resp.status_code == 200:
+                owned.append(resp.json()["upload_id"])
+        elif op == "history":
+            resp = await client.get("/api/lease/history", headers=headers)
+        elif op == "detail":
+            resp = await client.get(f"/api/lease/{state.rng.choice(owned)}", headers=headers)
+        else:
+            resp = await client.get(f"/api/welcome-pack/download/{state.rng.choice(owned)}", headers=headers)
+        status = resp.status_code
+    except httpx.HTTPError:
+        status = 0
+    return {"op": op, "status": status, "latency": time.perf_counter() - start}
+
+
+async def run_closed(client, state: LoadState, users: list[str], duration: float) -> list[dict]:
+    results: list[dict] = []
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user(user: str) -> None:
+        while time.perf_counter() < deadline:
+            results.append(await send(client, state, user, state.pick_operation()))
+
+    await asyncio.gather(*(virtual_user(user) for user in users))
+    return results
+
+
+async def run_open(
+    client, state: LoadState, users: list[str], rate: float, duration: float, max_outstanding: int,
+) -> list[dict]:
+    results: list[dict] = []
+    in_flight: set[asyncio.Task] = set()
+    deadline = time.perf_counter() + duration
+
+    async def request(user: str, op: str) -> None:
+        results.append(await send(client, state, user, op))
+
+    while time.perf_counter() < deadline:
+        await asyncio.sleep(state.rng.expovariate(rate))
+        op = state.pick_operation()
+        if len(in_flight) >= max_outstanding:
+            results.append({"op": op, "status": -1, "latency": 0.0})  # dropped
+            continue
+        task = asyncio.create_task(request(state.rng.choice(users), op))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.wait(in_flight, timeout=DRAIN_TIMEOUT)
+    return results
+
+
+def summarize_step(level: float, duration: float, results: list[dict], targets: dict) -> dict:
+    errors = [r for r in results if r["status"] <= 0 or r["status"] >= 500 or (400 <= r["status"] < 500 and r["status"] != 429)]
+    rate_limited = sum(1 for r in results if r["status"] == 429)
+    ok = [r for r in results if 200 <= r["status"] < 300]
+
+    operations = {}
+    for op in OPERATIONS:
+        op_results = [r for r in results if r["op"] == op]
+        if not op_results:
+            continue
+        latencies = [r["latency"] for r in op_results if 200 <= r["status"] < 300]
+        operations[op] = {
+            "count": len(op_results),
+            "errors": sum(1 for r in op_results if r in errors),
+            "rate_limited": sum(1 for r in op_results if r["status"] == 429),
+            "p50_s": round(percentile(latencies, 50), 4),
+            "p95_s": round(percentile(latencies, 95), 4),
+            "p99_s": round(percentile(latencies, 99), 4),
+            "max_s": round(max(latencies, default=0), 4),
+        }
+
+    error_rate = len(errors) / len(results) if results else 0.0
+    status_counts: dict[str, int] = defaultdict(int)
+    for r in results:
+        status_counts[{0: "transport_error", -1: "dropped"}.get(r["status"], str(r["status"]))] += 1
+
+    breach = None
+    read_p99 = max((stats["p99_s"] for op, stats in operations.items() if op != "upload"), default=0)
+    upload_p99 = operations.get("upload", {}).get("p99_s", 0)
+    if error_rate > targets["max_error_rate"]:
+        breach = f"error rate {error_rate:.1%} > {targets['max_error_rate']:.1%}"
+    elif read_p99 > targets["p99_target"]:
+        breach = f"read p99 {read_p99:.2f}s > {targets['p99_target']}s"
+    elif upload_p99 > targets["upload_p99_target"]:
+        breach = f"upload p99 {upload_p99:.2f}s > {targets['upload_p99_target']}s"
+
+    return {
+        "level": level,
+        "duration_s": round(duration, 2),
+        "requests": len(results),
+        "throughput_rps": round(len(ok) / duration, 3) if duration else 0.0,
+        "error_rate": round(error_rate, 4),
+        "rate_limited": rate_limited,
+        "status_counts": dict(sorted(status_counts.items())),
+        "operations": operations,
+        "breach": breach,
+    }
+
+
+def print_summary(report: dict) -> None:
+    unit = "users" if report["config"]["mode"] == "closed" else "req/s"
+    print(f"\n{'=' * 70}")
+    print("SUMMARY")
+    print(f"{'=' * 70}")
+    print(f"  {'Level':>8} {'Reqs':>6} {'OK/s':>7} {'Err%':>6} {'429':>5}  {'Op':<9} {'p50 s':>7} {'p95 s':>7} {'p99 s':>7}")
+    for step in report["steps"]:
+        first = True
+        for op, stats in step["operations"].items():
+            prefix = (
+                f"  {step['level']:>8g} {step['requests']:>6} {step['throughput_rps']:>7.2f} "
+                f"{step['error_rate'] * 100:>6.1f} {step['rate_limited']:>5}"
+            ) if first else " " * 38
+            print(f"{prefix}  {op:<9} {stats['p50_s']:>7.3f} {stats['p95_s']:>7.3f} {stats['p99_s']:>7.3f}")
+            first = False
+        if step["breach"]:
+            print(f"  {'':>8} ✗ {step['breach']}")
+    print()
+    if report["max_sustained_level"] is not None:
+        print(f"  Highest level within targets: {report['max_sustained_level']:g} {unit}")
+    else:
+        print("  No level stayed within targets")
+
+
+def run_load_test():
+    offline = "--offline" in sys.argv
+    offline_url = _arg("--url", "") if offline else ""
+    mode = _arg("--mode", "closed")
+    if mode not in ("closed", "open"):
+        print(f"✗ Unknown --mode {mode!r} — expected closed or open")
+        return 1
+    level = float(_arg("--concurrency", "4") if mode == "closed" else _arg("--rate", "2"))
+    duration = float(_arg("--duration", "30"))
+    mix = parse_mix(_arg("--mix", "upload=1,history=4,detail=4,download=1"))
+    ramp = "--ramp" in sys.argv
+    ramp_factor = float(_arg("--ramp-factor", "2"))
+    max_level = float(_arg("--max-level", "256"))
+    max_outstanding = int(_arg("--max-outstanding", "256"))
+    open_users = int(_arg("--users", "8"))
+    seed = int(_arg("--seed", "1"))
+    report_path = Path(_arg("--report", "load_report.json"))
+    targets = {
+        "max_error_rate": float(_arg("--max-error-rate", "0.01")),
+        "p99_target": float(_arg("--p99-target", "1.0")),
+        "upload_p99_target": float(_arg("--upload-p99-target", "60")),
+    }
+
+    with open(GROUND_TRUTH_PATH) as f:
+        ground_truth = json.load(f)
+    # Enough distinct files that no upload repeats within a run
+    uploads = build_uploads(ground_truth, 1, int(_arg("--files", "200")), random.Random(seed))
+
+    print("=" * 70)
+    target = (f"{offline_url} (offline server)" if offline_url else "offline (in-process fakes)") if offline else benchmark_extraction.API_URL
+    print(f"LOAD TEST — {mode}-loop, {target}")
+    print(f"Mix: {mix} | Step: {duration:g}s | Start level: {level:g}" + (f" ×{ramp_factor:g} up to {max_level:g}" if ramp else ""))
+    print(f"Targets: error rate ≤ {targets['max_error_rate']:.1%}, read p99 ≤ {targets['p99_target']}s, upload p99 ≤ {targets['upload_p99_target']}s")
+    print("=" * 70)
+
+    if offline_url:
+        client_args = {"base_url": offline_url}
+        shared_token = None
+    elif offline:
+        app, _, _ = setup_offline(
+            ground_truth,
+            Latency.parse(_arg("--gemini-latency", "1.2,3.0")),
+            Latency.parse(_arg("--db-latency", "0.02,0.06")),
+            Latency.parse(_arg("--storage-latency", "0.05,0.15")),
+            _arg("--recordings", ""),
+            seed,
+        )
+        if "--no-rate-limit" in sys.argv:
+            from app.config import settings
+            settings.rate_limit_enabled = False
+        client_args = {"transport": httpx.ASGITransport(app=app), "base_url": "http://offline"}
+        shared_token = None
+    else:
+        benchmark_extraction.load_env()
+        print("\nAuthenticating...", end=" ")
+        shared_token = benchmark_extraction.get_jwt_token()
+        print("OK")
+        client_args = {"base_url": benchmark_extraction.API_URL}
+
+    async def main() -> list[dict]:
+        steps = []
+        current = level
+        async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT, **client_args) as client:
+            while True:
+                user_count = int(current) if mode == "closed" else open_users
+                users = [f"load-user-{n}" for n in range(user_count)]
+                state.tokens = {user: shared_token or make_token(user) for user in users}
+                print(f"\n  Step: {current:g} {'users' if mode == 'closed' else 'req/s'} for {duration:g}s...", flush=True)
+                start = time.perf_counter()
+                if mode == "closed":
+                    results = await run_closed(client, state, users, duration)
+                else:
+                    results = await run_open(client, state, users, current, duration, max_outstanding)
+                step = summarize_step(current, time.perf_counter() - start, results, targets)
+                steps.append(step)
+                print(
+                    f"    {step['requests']} requests, {step['throughput_rps']:.2f} ok/s, "
+                    f"{step['error_rate']:.1%} errors, {step['rate_limited']} rate-limited"
+                    + (f" — ✗ {step['breach']}" if step["breach"] else "")
+                )
+                next_level = current * ramp_factor
+                if not ramp or step["breach"] or next_level > max_level:
+                    return steps
+                current = next_level if mode == "open" else max(current + 1, round(next_level))
+
+    state = LoadState(uploads, {}, mix, seed)
+    steps = asyncio.run(main())
+
+    sustained = [step["level"] for step in steps if not step["breach"]]
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "target": target,
+        "config": {
+            "mode": mode,
+            "start_level": level,
+            "step_duration_s": duration,
+            "mix": mix,
+            "ramp": ramp,
+            "ramp_factor": ramp_factor,
+            "max_level": max_level,
+            "targets": targets,
+        },
+        "steps": steps,
+        "max_sustained_level": max(sustained) if sustained else None,
+        "breach": next((step["breach"] for step in steps if step["breach"]), None),
+    }
+    report_path.write_text(json.dumps(report, indent=2))
+    print_summary(report)
+    print(f"  Report written to {report_path}")
+    return 1 if report["breach"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_load_test())
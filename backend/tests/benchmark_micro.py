@@ -0,0 +1,338 @@
+"""
+Micro-benchmarks for the pipeline's hot paths, checked against stored baselines.
+
+Usage:
+    python tests/benchmark_micro.py [--cases docgen,gemini] [--tolerance 0.25]
+        [--alloc-tolerance 0.10] [--rss-tolerance 0.25] [--min-time 0.5]
+        [--update-baselines]
+
+Fully offline. Each case calls one function on a fixed input (the Raj Patel
+sample lease, its ground truth, and leases from tests/generate_corpus.py with
+a fixed seed) and measures:
+  1. Speed: ops/sec, and relative speed — calls per call of a fixed
+     reference workload timed alongside, which cancels out CPU frequency
+     changes and noisy neighbours
+  2. Allocations: peak bytes allocated by one call (tracemalloc)
+  3. Memory: peak RSS growth over 20 calls (Linux VmHWM), in a fresh
+     subprocess per case
+
+Results are compared with tests/micro_baselines.json. A case regresses when
+relative speed drops by more than --tolerance, allocations grow by more
+than --alloc-tolerance, or RSS growth exceeds the baseline by more than
+--rss-tolerance (plus 2 MB of slack for allocator noise). Relative speed
+still shifts somewhat between CPUs and Python versions, so re-record the
+baselines when the reference machine changes.
+
+--update-baselines records the current results for the cases run (do this in
+the same commit as an intentional performance change). --cases filters by
+substring.
+
+Exit code 0 = no regressions, 1 = a case regressed.
+"""
+
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+GROUND_TRUTH_PATH = SCRIPT_DIR / "ground_truth.json"
+TEMPLATE_DIR = SCRIPT_DIR.parent.parent / "template"
+BASELINES_PATH = SCRIPT_DIR / "micro_baselines.json"
+SAMPLE_LEASE = "Lease Agreement - Raj Patel.docx"
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from docx import Document  # noqa: E402
+from docx.text.paragraph import Paragraph  # noqa: E402
+
+from app.services import docgen, gemini, text_extraction  # noqa: E402
+from generate_corpus import NamePool, build_lease_file, make_lease, make_staff  # noqa: E402
+
+logging.disable(logging.INFO)
+
+RSS_CALLS = 20
+RSS_SLACK_KB = 2048
+ROUNDS = 7
+REFERENCE_DATA = {f"key{n}": [n, str(n) * 3, {"value": n / 3}] for n in range(200)}
+
+
+def _arg(name: str, default: str) -> str:
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+# ---------------------------------------------------------------------------
+# Cases — each builds its input once and returns the function to time
+# ---------------------------------------------------------------------------
+
+def _sample_fields() -> dict:
+    with open(GROUND_TRUTH_PATH) as f:
+        return json.load(f)[SAMPLE_LEASE]
+
+
+def _corpus_lease(file_type: str, pages: int, table_rows: int) -> bytes:
+    rng = random.Random(47)
+    names = NamePool(rng)
+    lease = make_lease(names, make_staff(names, rng), rng)
+    return build_lease_file(lease, "particulars", file_type, pages, table_rows, rng)[0]
+
+
+def _case_extract_docx_sample():
+    file_bytes = (TEMPLATE_DIR / SAMPLE_LEASE).read_bytes()
+    return lambda: text_extraction._extract_docx(file_bytes)
+
+
+def _case_extract_docx_large():
+    file_bytes = _corpus_lease("docx", 40, 400)
+    return lambda: text_extraction._extract_docx(file_bytes)
+
+
+def _case_extract_pdf():
+    file_bytes = _corpus_lease("pdf", 30, 200)
+    return lambda: text_extraction._extract_pdf(file_bytes)
+
+
+def _case_generate_welcome_pack():
+    fields = _sample_fields()
+    return lambda: docgen.generate_welcome_pack(fields)
+
+
+def _case_replace_split_placeholder():
+    # "{{tenant_name}}" split over three runs, as Word saves edited placeholders
+    doc = Document()
+    paragraph = doc.add_paragraph("Dear ")
+    for part in ("{{tenant", "_na", "me}}", ", welcome to your new home."):
+        paragraph.add_run(part)
+    element, parent = paragraph._element, paragraph._parent
+    return lambda: docgen._replace_in_paragraph(Paragraph(deepcopy(element), parent), "{{tenant_name}}", "Raj Patel")
+
+
+def _case_replace_scan_template():
+    # Every placeholder against every template paragraph, without replacing —
+    # the no-match fast path that most calls in generate_welcome_pack take
+    paragraphs = Document(str(docgen.TEMPLATE_PATH)).paragraphs
+    placeholders = [f"{{{{missing_{n}}}}}" for n in range(len(docgen.PLACEHOLDER_MAP))]
+
+    def scan():
+        for placeholder in placeholders:
+            for paragraph in paragraphs:
+                docgen._replace_in_paragraph(paragraph, placeholder, "")
+
+    return scan
+
+
+def _case_normalize_rent():
+    return lambda: docgen._normalize_rent("$1,150.00 AUD per fortnight")
+
+
+def _case_parse_llm_response():
+    raw = "```json\n" + json.dumps(_sample_fields(), indent=2) + "\n```"
+    return lambda: gemini._parse_llm_response(raw)
+
+
+def _case_validate_fields():
+    fields = _sample_fields()
+    return lambda: gemini._validate_fields(fields)
+
+
+CASES = {
+    "text_extraction._extract_docx[sample]": _case_extract_docx_sample,
+    "text_extraction._extract_docx[400-row tables]": _case_extract_docx_large,
+    "text_extraction._extract_pdf[30 pages]": _case_extract_pdf,
+    "docgen.generate_welcome_pack": _case_generate_welcome_pack,
+    "docgen._replace_in_paragraph[split runs]": _case_replace_split_placeholder,
+    "docgen._replace_in_paragraph[template scan]": _case_replace_scan_template,
+    "docgen._normalize_rent": _case_normalize_rent,
+    "gemini._parse_llm_response": _case_parse_llm_response,
+    "gemini._validate_fields": _case_validate_fields,
+}
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def _reference() -> None:
+    """Fixed pure-Python workload timed alongside every case."""
+    json.loads(json.dumps(REFERENCE_DATA))
+    sorted(str(n) for n in range(300))
+
+
+def _time_per_call(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls
+
+
+def _calls_for(fn, seconds: float) -> int:
+    calls = 1
+    while _time_per_call(fn, calls) * calls < seconds:
+        calls *= 2
+    return calls
+
+
+def measure_speed(fn, min_time: float) -> tuple[float, float]:
+    """
+    (ops/sec, relative speed). Relative speed is case calls per reference
+    call, the median over ROUNDS rounds that time the reference right before
+    the case — CPU frequency changes and noisy neighbours slow both alike,
+    so it is far steadier than ops/sec on shared machines.
+    """
+    fn()
+    budget = min_time / ROUNDS / 2
+    calls, reference_calls = _calls_for(fn, budget), _calls_for(_reference, budget)
+    ratios, timings = [], []
+    for _ in range(ROUNDS):
+        reference_time = _time_per_call(_reference, reference_calls)
+        case_time = _time_per_call(fn, calls)
+        ratios.append(reference_time / case_time)
+        timings.append(case_time)
+    return 1 / statistics.median(timings), statistics.median(ratios)
+
+
+def measure_alloc_kb(fn) -> float:
+    """Peak bytes allocated during one call, in KB."""
+    fn()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (peak - before) / 1024
+
+
+def _peak_rss_kb() -> int:
+    """VmHWM of this process (unlike ru_maxrss, not inherited across exec)."""
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1])
+    return 0
+
+
+def measure_rss(case: str) -> None:
+    """Subprocess entry point: print peak RSS growth (KB) over RSS_CALLS calls."""
+    fn = CASES[case]()
+    fn()  # warm imports, caches and parser state
+    before = _peak_rss_kb()
+    for _ in range(RSS_CALLS):
+        fn()
+    print(_peak_rss_kb() - before)
+
+
+def machine_fingerprint() -> str:
+    return f"{platform.machine()}/{os.cpu_count()} cpu/Python {platform.python_version()}"
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def check_regressions(result: dict, baseline: dict, tolerances: dict) -> list[str]:
+    """Human-readable regressions of `result` against `baseline`."""
+    regressions = []
+    if result["relative_speed"] < baseline["relative_speed"] * (1 - tolerances["speed"]):
+        regressions.append(
+            f"relative speed {result['relative_speed'] / baseline['relative_speed'] - 1:+.0%} "
+            f"({result['ops_per_sec']:,.0f} ops/sec, baseline {baseline['ops_per_sec']:,.0f})"
+        )
+    if result["alloc_kb"] > baseline["alloc_kb"] * (1 + tolerances["alloc"]) + 1:
+        regressions.append(f"alloc {result['alloc_kb']:,.1f} KB vs {baseline['alloc_kb']:,.1f} KB")
+    if result["rss_kb"] > baseline["rss_kb"] * (1 + tolerances["rss"]) + RSS_SLACK_KB:
+        regressions.append(f"peak RSS +{result['rss_kb']:,} KB vs +{baseline['rss_kb']:,} KB")
+    return regressions
+
+
+def run_benchmark():
+    selected = _arg("--cases", "")
+    min_time = float(_arg("--min-time", "0.5"))
+    tolerances = {
+        "speed": float(_arg("--tolerance", "0.25")),
+        "alloc": float(_arg("--alloc-tolerance", "0.10")),
+        "rss": float(_arg("--rss-tolerance", "0.25")),
+    }
+    update = "--update-baselines" in sys.argv
+
+    baselines = {"machine": None, "cases": {}}
+    if BASELINES_PATH.exists():
+        with open(BASELINES_PATH) as f:
+            baselines = json.load(f)
+    machine = machine_fingerprint()
+
+    cases = [name for name in CASES if any(s in name for s in selected.split(","))]
+
+    print("=" * 70)
+    print("MICRO-BENCHMARKS — hot paths vs tests/micro_baselines.json")
+    print(f"Cases: {len(cases)} | Tolerance: speed -{tolerances['speed']:.0%}, "
+          f"alloc +{tolerances['alloc']:.0%}, RSS +{tolerances['rss']:.0%}")
+    print(f"Machine: {machine}")
+    if baselines.get("machine") not in (None, machine):
+        print(f"  Baselines recorded on {baselines['machine']} — relative speed may shift across machines")
+    print("=" * 70)
+
+    print(f"\n  {'Case':<46} {'ops/sec':>10} {'Δ speed':>8} {'alloc KB':>9} {'RSS +KB':>8}")
+    results: dict[str, dict] = {}
+    failures: list[str] = []
+    for name in cases:
+        fn = CASES[name]()
+        rss = subprocess.run(
+            [sys.executable, __file__, "--measure-rss", name],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        ops_per_sec, relative_speed = measure_speed(fn, min_time)
+        result = {
+            "ops_per_sec": round(ops_per_sec, 1),
+            "relative_speed": round(relative_speed, 4),
+            "alloc_kb": round(measure_alloc_kb(fn), 1),
+            "rss_kb": int(rss),
+        }
+        results[name] = result
+
+        baseline = baselines["cases"].get(name)
+        delta = f"{result['relative_speed'] / baseline['relative_speed'] - 1:+.0%}" if baseline else "new"
+        regressions = check_regressions(result, baseline, tolerances) if baseline else []
+        print(
+            f"  {'✗' if regressions else '✓'} {name:<44} {result['ops_per_sec']:>10,.0f} {delta:>8} "
+            f"{result['alloc_kb']:>9,.1f} {result['rss_kb']:>8,}"
+        )
+        failures.extend(f"{name}: {regression}" for regression in regressions)
+
+    if update:
+        baselines["machine"] = machine
+        baselines["recorded_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        baselines["cases"].update(results)
+        with open(BASELINES_PATH, "w") as f:
+            json.dump(baselines, f, indent=2)
+            f.write("\n")
+        print(f"\n  Baselines updated for {len(results)} case(s): {BASELINES_PATH}")
+        return 0
+
+    print()
+    if failures:
+        print(f"  ✗ REGRESSIONS ({len(failures)}):")
+        for failure in failures:
+            print(f"    ✗ {failure}")
+        return 1
+    print("  ✓ No hot path regressed beyond tolerance")
+    return 0
+
+
+if __name__ == "__main__":
+    if "--measure-rss" in sys.argv:
+        measure_rss(sys.argv[sys.argv.index("--measure-rss") + 1])
+        sys.exit(0)
+    sys.exit(run_benchmark())
@@ -0,0 +1,130 @@
+"""
+Near-duplicate index benchmark — measures MinHash/LSH lookup latency as the
+corpus grows, and checks that each sample lease is found again after a
+format round-trip (DOCX text → PDF → extracted PDF text).
+
+Usage:
+    python tests/benchmark_near_duplicates.py [--corpus 100000] [--users 200]
+
+Runs fully offline against FakeSupabase, whose band-key map stands in for
+the GIN index on lease_texts.minhash_bands, so the lookup time is this
+process's share (band keys, candidate scoring) without the round trip.
+Synthetic corpus entries are random signatures spread across --users users;
+the 5 sample leases are stored for one user.
+
+Exit code 0 = every sample found and p99 lookup < 1 ms, 1 = otherwise.
+"""
+
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+SCRIPT_DIR = Path(__file__).parent
+GROUND_TRUTH_PATH = SCRIPT_DIR / "ground_truth.json"
+TEMPLATE_DIR = SCRIPT_DIR.parent.parent / "template"
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from app.services import near_duplicates as nd  # noqa: E402
+from app.services.text_extraction import extract_text  # noqa: E402
+from fakes import FakeSupabase  # noqa: E402
+
+
+def _arg(name: str, default: int) -> int:
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def to_pdf_text(text: str) -> str:
+    """Render text into a multi-page PDF and extract it again."""
+    doc = fitz.open()
+    lines = text.splitlines()
+    for start in range(0, len(lines), 60):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 560, 806), "\n".join(lines[start:start + 60]), fontsize=7)
+    return extract_text(doc.tobytes(), "pdf")
+
+
+def run_benchmark():
+    corpus = _arg("--corpus", 100_000)
+    users = _arg("--users", 200)
+    rng = random.Random(7)
+
+    with open(GROUND_TRUTH_PATH) as f:
+        lease_files = list(json.load(f))
+
+    print("=" * 70)
+    print("NEAR-DUPLICATE INDEX BENCHMARK")
+    print(f"Corpus: {corpus} | Users: {users} | Bands: {nd.BANDS} x {nd.ROWS} rows")
+    print(f"Threshold: {nd.settings.near_duplicate_threshold}")
+    print("=" * 70)
+
+    fake_db = FakeSupabase()
+    fake_db.install()
+
+    def store(user_id: str, upload_id: str, sig: list[int]) -> None:
+        fake_db.save_lease_text(upload_id, user_id, "", "", [], sig, nd.band_keys(sig))
+
+    start = time.perf_counter()
+    for i in range(corpus):
+        sig = [rng.randrange(nd._PRIME) for _ in range(nd.NUM_PERM)]
+        store(f"user-{i % users}", f"synthetic-{i}", sig)
+    print(f"\n  Indexed {corpus} synthetic signatures in {time.perf_counter() - start:.1f}s")
+
+    texts = {}
+    for file_name in lease_files:
+        file_path = TEMPLATE_DIR / file_name
+        if file_path.exists():
+            texts[file_name] = extract_text(file_path.read_bytes(), "docx")
+
+    sig_times = []
+    for file_name, text in texts.items():
+        start = time.perf_counter()
+        sig = nd.signature(text)
+        sig_times.append(time.perf_counter() - start)
+        store("user-0", file_name, sig)
+
+    failures: list[str] = []
+    lookups: list[float] = []
+    for file_name, text in texts.items():
+        sig = nd.signature(to_pdf_text(text))
+        for _ in range(200):
+            start = time.perf_counter()
+            matches = nd.find("user-0", sig, "new-upload")
+            lookups.append(time.perf_counter() - start)
+        top = matches[0] if matches else None
+        if not top or top[0] != file_name:
+            failures.append(f"{file_name}: PDF round-trip not matched (got {top})")
+            print(f"  ✗ {file_name}: {top}")
+        else:
+            print(f"  ✓ {file_name}: similarity {top[1]:.2f}")
+
+    lookups.sort()
+    p50 = statistics.median(lookups) * 1000
+    p99 = lookups[int(len(lookups) * 0.99) - 1] * 1000
+
+    print(f"\n{'=' * 70}")
+    print("SUMMARY")
+    print(f"{'=' * 70}")
+    print(f"  Signature: {statistics.mean(sig_times) * 1000:.1f} ms avg per lease")
+    print(f"  Lookup:    p50 {p50:.3f} ms | p99 {p99:.3f} ms ({len(lookups)} queries)")
+
+    if p99 >= 1.0:
+        failures.append(f"p99 lookup {p99:.3f} ms >= 1 ms")
+    if failures:
+        print(f"\n  FAILURES ({len(failures)}):")
+        for fail in failures:
+            print(f"    ✗ {fail}")
+        return 1
+    print("\n  ✓ ALL CHECKS PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_benchmark())
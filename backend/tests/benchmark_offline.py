@@ -0,0 +1,272 @@
+"""
+Offline end-to-end benchmark — the full POST /api/lease/upload pipeline
+in-process, with local stand-ins for Supabase and Gemini (tests/fakes.py).
+
+Usage:
+    python tests/benchmark_offline.py [--iterations 4] [--synthetic 10] [--concurrency 4]
+        [--gemini-latency 1.2,3.0] [--db-latency 0.02,0.06] [--storage-latency 0.05,0.15]
+        [--recordings recordings.json] [--seed 1] [--corpus DIR]
+
+Needs no network, Supabase project, test account or API key. The FastAPI
+app is driven through httpx's ASGI transport with real HS256 tokens, so
+auth, rate limiting, LeaseService, text extraction and docgen all run for
+real; only the Supabase functions and the Gemini client are replaced.
+Latencies are "median,p95" in seconds (log-normal), or one fixed value.
+
+Uploads: each of the 5 sample leases --iterations times, plus --synthetic
+extra leases; --corpus DIR draws them from a generated corpus
+(tests/generate_corpus.py) instead. Every upload is made unique (a reference paragraph is added)
+so none is answered from the idempotency check. Gemini replies replay
+--recordings ({marker: response text}) or, by default, the ground truth.
+
+Reports throughput, request and per-stage p50/p95/p99 latency (from the
+stage events the pipeline records), event-loop stalls and field accuracy.
+
+Exit code 0 = every upload completed with correct fields, 1 = failures.
+"""
+
+import asyncio
+import io
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import fitz
+import httpx
+import jwt
+from docx import Document
+
+SCRIPT_DIR = Path(__file__).parent
+GROUND_TRUTH_PATH = SCRIPT_DIR / "ground_truth.json"
+TEMPLATE_DIR = SCRIPT_DIR.parent.parent / "template"
+
+# --corpus DIR runs against a generated corpus (tests/generate_corpus.py) instead of template/
+if "--corpus" in sys.argv:
+    TEMPLATE_DIR = Path(sys.argv[sys.argv.index("--corpus") + 1])
+    GROUND_TRUTH_PATH = TEMPLATE_DIR / "ground_truth.json"
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+from app.config import settings  # noqa: E402
+from benchmark_extraction import compare_field  # noqa: E402
+from fakes import FakeGemini, FakeSupabase, Latency  # noqa: E402
+
+JWT_SECRET = "offline-benchmark-secret"
+LOOP_PROBE_INTERVAL = 0.01  # seconds
+
+
+def _arg(name: str, default: str) -> str:
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, round(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def make_token(user_id: str) -> str:
+    return jwt.encode(
+        {"sub": user_id, "aud": "authenticated", "exp": int(time.time()) + 3600},
+        JWT_SECRET,
+        algorithm="HS256",
+    )
+
+
+def unique_variant(file_bytes: bytes, n: int, file_type: str = "docx") -> bytes:
+    """The same lease with a reference paragraph (PDFs: a page) appended, so its hash is new."""
+    if file_type == "pdf":
+        pdf = fitz.open(stream=file_bytes, filetype="pdf")
+        pdf.new_page().insert_text((72, 72), f"Schedule reference: OFFLINE-{n:05d}")
+        return pdf.tobytes()
+    doc = Document(io.BytesIO(file_bytes))
+    doc.add_paragraph(f"Schedule reference: OFFLINE-{n:05d}")
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def setup_offline(
+    ground_truth: dict,
+    gemini_latency: Latency,
+    db_latency: Latency,
+    storage_latency: Latency,
+    recordings_path: str = "",
+    seed: int = 1,
+):
+    """Configure the app for offline use and install the fakes. Returns (app, fake_db, fake_gemini)."""
+    settings.supabase_url = ""
+    settings.supabase_jwt_secret = JWT_SECRET
+    settings.gemini_prompt_cache = False
+    settings.pipeline_auto_retry = False
+
+    fake_db = FakeSupabase(db_latency, storage_latency, seed=seed)
+    fake_db.install()
+    if recordings_path:
+        with open(recordings_path) as f:
+            fake_gemini = FakeGemini(json.load(f), latency=gemini_latency, seed=seed)
+    else:
+        fake_gemini = FakeGemini.from_ground_truth(ground_truth, latency=gemini_latency, seed=seed)
+
+    from app.main import app
+    from app.services import gemini
+
+    gemini.use_client(fake_gemini)
+    return app, fake_db, fake_gemini
+
+
+def build_uploads(ground_truth: dict, iterations: int, synthetic: int, rng: random.Random) -> list[tuple]:
+    """(file name, file bytes, expected fields) per upload."""
+    samples = [
+        (name, (TEMPLATE_DIR / name).read_bytes(), fields)
+        for name, fields in ground_truth.items()
+        if (TEMPLATE_DIR / name).exists()
+    ]
+    uploads = []
+    for _ in range(iterations):
+        uploads.extend(samples)
+    for _ in range(synthetic):
+        uploads.append(rng.choice(samples))
+    return [
+        (name, unique_variant(data, n, Path(name).suffix.lstrip(".").lower()), fields)
+        for n, (name, data, fields) in enumerate(uploads)
+    ]
+
+
+async def probe_event_loop(lags: list[float], stop: asyncio.Event) -> None:
+    """Record how late each short sleep wakes up — time the loop was blocked."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(LOOP_PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - LOOP_PROBE_INTERVAL)
+
+
+async def run_uploads(app, uploads: list[tuple], concurrency: int) -> list[dict]:
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://offline", timeout=600) as client:
+        async def upload(n: int, name: str, data: bytes, expected: dict) -> dict:
+            async with semaphore:
+                start = time.perf_counter()
+                resp = await client.post(
+                    "/api/lease/upload",
+                    headers={"Authorization": f"Bearer {make_token(f'bench-user-{n}')}"},
+                    files={"file": (name, data, "application/octet-stream")},
+                )
+                return {
+                    "file_name": name,
+                    "expected": expected,
+                    "status_code": resp.status_code,
+                    "body": resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {},
+                    "latency": time.perf_counter() - start,
+                }
+
+        return await asyncio.gather(*(upload(n, *item) for n, item in enumerate(uploads)))
+
+
+def run_benchmark():
+    iterations = int(_arg("--iterations", "4"))
+    synthetic = int(_arg("--synthetic", "10"))
+    concurrency = int(_arg("--concurrency", "4"))
+    seed = int(_arg("--seed", "1"))
+    gemini_latency = Latency.parse(_arg("--gemini-latency", "1.2,3.0"))
+    db_latency = Latency.parse(_arg("--db-latency", "0.02,0.06"))
+    storage_latency = Latency.parse(_arg("--storage-latency", "0.05,0.15"))
+    recordings_path = _arg("--recordings", "")
+
+    with open(GROUND_TRUTH_PATH) as f:
+        ground_truth = json.load(f)
+
+    app, fake_db, fake_gemini = setup_offline(
+        ground_truth, gemini_latency, db_latency, storage_latency, recordings_path, seed,
+    )
+    from app.services import lease_events
+
+    uploads = build_uploads(ground_truth, iterations, synthetic, random.Random(seed))
+
+    print("=" * 70)
+    print("OFFLINE BENCHMARK — Full pipeline, in-process fakes")
+    print(
+        f"Uploads: {len(uploads)} ({iterations}× {len(ground_truth)} leases + {synthetic} synthetic) | "
+        f"Concurrency: {concurrency}"
+    )
+    print(f"Gemini latency:  {gemini_latency}")
+    print(f"DB latency:      {db_latency}")
+    print(f"Storage latency: {storage_latency}")
+    print("=" * 70)
+
+    async def main():
+        lags: list[float] = []
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_event_loop(lags, stop))
+        start = time.perf_counter()
+        results = await run_uploads(app, uploads, concurrency)
+        wall = time.perf_counter() - start
+        stop.set()
+        await probe
+        await lease_events.flush()
+        return results, wall, lags
+
+    results, wall, lags = asyncio.run(main())
+
+    # Per-stage durations from the recorded stage events
+    stages: dict[str, list[float]] = defaultdict(list)
+    for event in fake_db.lease_events:
+        if event["duration_ms"] is not None and event["status"] != "failed":
+            stages[event["stage"]].append(event["duration_ms"] / 1000)
+    stages["request"] = [r["latency"] for r in results]
+
+    completed = [r for r in results if r["status_code"] == 200]
+    print(f"\n  Completed: {len(completed)}/{len(results)} in {wall:.1f}s")
+    print(f"  Throughput: {len(completed) / wall:.2f} uploads/s ({len(completed) / wall * 60:.0f}/min)")
+    print(f"  Gemini calls: {len(fake_gemini.calls)}")
+
+    print(f"\n  {'Stage':<18} {'Count':>6} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'Max s':>8}")
+    order = ["request", "complete", "storage", "text_extraction", "ai_extraction", "docgen", "pack_storage"]
+    for stage in order + sorted(set(stages) - set(order)):
+        values = stages.get(stage)
+        if not values:
+            continue
+        print(
+            f"  {stage:<18} {len(values):>6} {percentile(values, 50):>8.3f} {percentile(values, 95):>8.3f} "
+            f"{percentile(values, 99):>8.3f} {max(values):>8.3f}"
+        )
+
+    blocked = sum(lag for lag in lags if lag > LOOP_PROBE_INTERVAL)
+    print(
+        f"\n  Event loop lag: p50 {percentile(lags, 50) * 1000:.1f}ms, p99 {percentile(lags, 99) * 1000:.1f}ms, "
+        f"max {max(lags, default=0) * 1000:.0f}ms ({blocked / wall * 100:.0f}% of wall time in stalls >10ms)"
+    )
+
+    failures = []
+    for r in results:
+        if r["status_code"] != 200:
+            failures.append(f"{r['file_name']}: HTTP {r['status_code']} — {str(r['body'])[:120]}")
+            continue
+        actual = r["body"].get("extracted_data", {})
+        for field, expected in r["expected"].items():
+            passed, detail = compare_field(field, expected, actual.get(field, "__MISSING__"), r["file_name"])
+            if not passed:
+                failures.append(f"{r['file_name']} → {field}: {detail}")
+
+    print()
+    if failures:
+        print(f"  ✗ FAIL — {len(failures)} failure(s):")
+        for failure in failures[:20]:
+            print(f"    ✗ {failure}")
+        return 1
+    print(f"  ✓ PASS — {len(completed)} uploads completed with correct fields")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_benchmark())
@@ -0,0 +1,126 @@
+"""
+PDF text extraction benchmark — serial vs parallel page-range extraction.
+
+Usage:
+    python tests/benchmark_pdf_extraction.py [--pages 50,100,200,300] [--workers 2,4] [--repeat 3]
+
+Fully offline. Builds synthetic leases of each page count with PyMuPDF
+(clauses taken from the sample leases, ~2.5k chars per page) and checks:
+  1. Output parity: the parallel path reproduces the serial output exactly
+     (same text, same --- Page N --- markers, same order)
+  2. Speed: mean time per extraction, serial vs each worker count
+
+The worker pool is started before timing, as it is in the running app.
+Speedup is bounded by the CPU count of the machine running the benchmark.
+
+Exit code 0 = parity holds everywhere, 1 = any mismatch.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+GROUND_TRUTH_PATH = SCRIPT_DIR / "ground_truth.json"
+TEMPLATE_DIR = SCRIPT_DIR.parent.parent / "template"
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+import fitz  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.services import text_extraction  # noqa: E402
+
+PAGE_RECT = fitz.Rect(50, 50, 545, 792)
+
+
+def sample_clauses() -> list[str]:
+    """Paragraphs from the sample leases, used as synthetic page content."""
+    with open(GROUND_TRUTH_PATH) as f:
+        lease_files = list(json.load(f))
+    clauses: list[str] = []
+    for file_name in lease_files:
+        file_path = TEMPLATE_DIR / file_name
+        if file_path.exists():
+            text = text_extraction.extract_text(file_path.read_bytes(), "docx")
+            clauses.extend(line for line in text.splitlines() if len(line) > 40)
+    return clauses or ["The Tenant agrees to pay the rent on time and keep the premises clean."]
+
+
+def synthetic_lease(clauses: list[str], pages: int) -> bytes:
+    """A `pages`-page PDF of lease clauses, a couple of pages left blank."""
+    doc = fitz.open()
+    cursor = 0
+    for n in range(pages):
+        page = doc.new_page()
+        if n % 37 == 36:
+            continue  # blank page — must be skipped identically by both paths
+        body: list[str] = []
+        while sum(len(c) for c in body) < 2500:
+            body.append(clauses[cursor % len(clauses)])
+            cursor += 1
+        page.insert_textbox(PAGE_RECT, f"Clause {n + 1}\n" + "\n".join(body), fontsize=8)
+    return doc.tobytes()
+
+
+def time_extraction(file_bytes: bytes, repeat: int) -> tuple[float, str]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        output = text_extraction._extract_pdf(file_bytes)
+    return (time.perf_counter() - start) / repeat * 1000, output
+
+
+def _arg(name: str, default: str) -> str:
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def run_benchmark():
+    page_counts = [int(p) for p in _arg("--pages", "50,100,200,300").split(",")]
+    worker_counts = [int(w) for w in _arg("--workers", "2,4").split(",")]
+    repeat = int(_arg("--repeat", "3"))
+    failures: list[str] = []
+
+    print("=" * 70)
+    print("PDF EXTRACTION BENCHMARK — serial vs parallel page ranges")
+    print(f"CPUs: {os.cpu_count()} | Workers: {worker_counts} | Repeat: {repeat}")
+    print("=" * 70)
+
+    clauses = sample_clauses()
+    leases = {pages: synthetic_lease(clauses, pages) for pages in page_counts}
+
+    print(f"\n  {'Pages':>5} {'Size KB':>8} {'Mode':<12} {'Mean ms':>9} {'Speedup':>8}")
+    for pages, file_bytes in leases.items():
+        settings.pdf_parallel_min_pages = pages + 1  # force serial
+        serial_ms, expected = time_extraction(file_bytes, repeat)
+        print(f"  {pages:>5} {len(file_bytes) // 1024:>8} {'serial':<12} {serial_ms:>9.1f} {'':>8}")
+
+        settings.pdf_parallel_min_pages = 1
+        for workers in worker_counts:
+            settings.pdf_extraction_workers = workers
+            text_extraction.shutdown_pool()
+            text_extraction._extract_pdf(file_bytes)  # start the pool outside the timing
+            parallel_ms, output = time_extraction(file_bytes, repeat)
+            label = f"{workers} workers"
+            speedup = serial_ms / parallel_ms if parallel_ms else 0.0
+            print(f"  {pages:>5} {'':>8} {label:<12} {parallel_ms:>9.1f} {speedup:>7.2f}x")
+            if output != expected:
+                failures.append(f"{pages} pages, {workers} workers: output differs")
+
+    text_extraction.shutdown_pool()
+
+    print()
+    if failures:
+        print(f"  ✗ FAILURES ({len(failures)}):")
+        for fail in failures:
+            print(f"    ✗ {fail}")
+        return 1
+    print("  ✓ Parallel output identical to serial at every size")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_benchmark())
@@ -0,0 +1,128 @@
+"""
+Prompt cache benchmark — compares extraction requests with and without the
+cached instruction prefix for each of the 5 sample leases.
+
+Usage:
+    python tests/benchmark_prompt_cache.py [--model gemini-2.5-flash] [--runs 3]
+
+Requires:
+    - GEMINI_API_KEY in environment or backend/.env
+    - All 5 sample lease files in ../template/
+
+Reports time-to-first-token (streamed), total latency and prompt / cached
+token counts per mode. If Gemini refuses to create the cache (the prefix is
+below the model's minimum cacheable size) only the inline numbers are shown.
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+GROUND_TRUTH_PATH = SCRIPT_DIR / "ground_truth.json"
+TEMPLATE_DIR = SCRIPT_DIR.parent.parent / "template"
+
+sys.path.insert(0, str(SCRIPT_DIR.parent))
+
+
+def load_env():
+    """Load env vars from backend/.env if not already set."""
+    env_path = SCRIPT_DIR.parent / ".env"
+    if env_path.exists():
+        for line in env_path.read_text().splitlines():
+            line = line.strip()
+            if line and not line.startswith("#") and "=" in line:
+                key, _, value = line.partition("=")
+                os.environ.setdefault(key.strip(), value.strip())
+
+
+def stream_once(client, model: str, contents: str, cached_content: str | None) -> dict:
+    """Stream one extraction and return TTFT, total latency and token usage."""
+    kwargs = {"config": {"cached_content": cached_content}} if cached_content else {}
+    start = time.perf_counter()
+    ttft = None
+    usage = None
+    for chunk in client.models.generate_content_stream(model=model, contents=contents, **kwargs):
+        if ttft is None and chunk.text:
+            ttft = time.perf_counter() - start
+        if chunk.usage_metadata is not None:
+            usage = chunk.usage_metadata
+    total = time.perf_counter() - start
+    return {
+        "ttft": ttft if ttft is not None else total,
+        "total": total,
+        "prompt_tokens": (usage.prompt_token_count or 0) if usage else 0,
+        "cached_tokens": (usage.cached_content_token_count or 0) if usage else 0,
+    }
+
+
+def summarise(label: str, runs: list[dict]) -> None:
+    if not runs:
+        print(f"  {label:<8} — no data")
+        return
+    print(
+        f"  {label:<8} TTFT p50 {statistics.median(r['ttft'] for r in runs):6.2f}s | "
+        f"total p50 {statistics.median(r['total'] for r in runs):6.2f}s | "
+        f"prompt tok avg {statistics.mean(r['prompt_tokens'] for r in runs):7.0f} | "
+        f"cached tok avg {statistics.mean(r['cached_tokens'] for r in runs):7.0f}"
+    )
+
+
+def run_benchmark():
+    load_env()
+
+    from app.config import settings
+    from app.services import gemini, prompt_cache
+    from app.services.text_extraction import extract_text
+
+    model = sys.argv[sys.argv.index("--model") + 1] if "--model" in sys.argv else settings.gemini_models[0]
+    runs = int(sys.argv[sys.argv.index("--runs") + 1]) if "--runs" in sys.argv else 1
+
+    with open(GROUND_TRUTH_PATH) as f:
+        lease_files = list(json.load(f))
+
+    client = gemini._get_client()
+
+    print("=" * 70)
+    print("PROMPT CACHE BENCHMARK")
+    print(f"Model: {model} | Runs per lease: {runs}")
+    print(f"Instruction prefix: {len(gemini.EXTRACTION_INSTRUCTIONS)} chars "
+          f"(hash {prompt_cache.prompt_hash(gemini.EXTRACTION_INSTRUCTIONS)})")
+    print("=" * 70)
+
+    prompt_cache.warm(client, [model], gemini.EXTRACTION_INSTRUCTIONS)
+    cached_content = prompt_cache.get_cached_content(model, gemini.EXTRACTION_INSTRUCTIONS)
+    print(f"\n  Cache: {cached_content or 'unavailable — inline only'}")
+
+    inline_runs: list[dict] = []
+    cached_runs: list[dict] = []
+    for file_name in lease_files:
+        file_path = TEMPLATE_DIR / file_name
+        if not file_path.exists():
+            print(f"  SKIPPED: {file_name} — file not found")
+            continue
+        lease_text = extract_text(file_path.read_bytes(), "docx")
+
+        for _ in range(runs):
+            inline_runs.append(stream_once(
+                client, model, gemini.EXTRACTION_PROMPT.format(lease_text=lease_text), None,
+            ))
+            if cached_content:
+                cached_runs.append(stream_once(
+                    client, model, gemini.LEASE_TEXT_PROMPT.format(lease_text=lease_text), cached_content,
+                ))
+        print(f"  ✓ {file_name}")
+
+    print(f"\n{'=' * 70}")
+    print("SUMMARY")
+    print(f"{'=' * 70}")
+    summarise("inline", inline_runs)
+    summarise("cached", cached_runs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_benchmark())
@@ -4,7 +4,10 @@ downloads each generated Welcome Pack, runs automated checks, and saves the
 .docx files for manual review.
 
 Usage:
-    python tests/benchmark_welcome_packs.py
+    python tests/benchmark_welcome_packs.py [--corpus DIR]
+
+--corpus DIR runs every lease of a generated corpus (tests/generate_corpus.py)
+instead of the 5 samples.
 
 Requires:
     - Backend running at http://localhost:8000
@@ -31,6 +34,11 @@ TEMPLATE_DIR = SCRIPT_DIR.parent.parent / "template"
 TEST_RESULTS_DIR = SCRIPT_DIR.parent.parent / "docs" / "test_results"
 GROUND_TRUTH_PATH = SCRIPT_DIR / "ground_truth.json"
 
+# --corpus DIR runs against a generated corpus (tests/generate_corpus.py) instead of template/
+if "--corpus" in sys.argv:
+    TEMPLATE_DIR = Path(sys.argv[sys.argv.index("--corpus") + 1])
+    GROUND_TRUTH_PATH = TEMPLATE_DIR / "ground_truth.json"
+
 # Leases where special_conditions is null — section must be removed
 NULL_SPECIAL_CONDITIONS = {
     "Lease Agreement - David Okafor.docx",
@@ -222,12 +230,13 @@ def run_benchmark():
     with open(GROUND_TRUTH_PATH) as f:
         ground_truth = json.load(f)
 
+    lease_files = list(ground_truth) if "--corpus" in sys.argv else LEASE_FILES
     TEST_RESULTS_DIR.mkdir(parents=True, exist_ok=True)
 
     print("=" * 70)
     print("WELCOME PACK BENCHMARK — Full Pipeline Test")
     print(f"API: {API_URL}")
-    print(f"Leases: {len(LEASE_FILES)}")
+    print(f"Leases: {len(lease_files)}")
     print(f"Output: {TEST_RESULTS_DIR}")
     print("=" * 70)
 
@@ -242,7 +251,7 @@ def run_benchmark():
     failures: list[str] = []
     latencies: list[float] = []
 
-    for file_name in LEASE_FILES:
+    for file_name in lease_files:
         file_path = TEMPLATE_DIR / file_name
         if not file_path.exists():
             print(f"\nSKIPPED: {file_name} — file not found")
@@ -318,9 +327,9 @@ def run_benchmark():
         checks.append(("property_address x4", check_property_address_occurrences(doc, property_address)))
 
         # 4. Special conditions
-        if file_name in NULL_SPECIAL_CONDITIONS:
+        if file_name in NULL_SPECIAL_CONDITIONS or expected.get("special_conditions", "") is None:
             checks.append(("special_conditions removed", check_special_conditions_removed(doc)))
-        elif file_name in HAS_SPECIAL_CONDITIONS:
+        elif file_name in HAS_SPECIAL_CONDITIONS or expected.get("special_conditions"):
             checks.append(("special_conditions present", check_special_conditions_present(doc)))
 
         # 5. Lease-specific checks
@@ -0,0 +1,495 @@
+"""
+In-process stand-ins for Supabase and Gemini, for offline benchmarks.
+
+FakeSupabase keeps tables and storage buckets in dicts and replaces the
+functions of app.services.supabase (install()), wrapped in the same
+metrics/tracing decorator, so routers and LeaseService run unchanged.
+The status trigger on lease_events and the finalize_lease_upload RPC are
+reproduced in Python.
+
+FakeGemini is a google-genai client stand-in (install with
+gemini.use_client) that replays recorded responses: the first recording
+whose marker (e.g. the tenant's name) appears in the prompt is returned.
+
+Each call sleeps for a latency drawn from a Latency distribution, so a
+benchmark can model a slow database, storage or model without a network.
+"""
+
+import json
+import math
+import random
+import threading
+import time
+import types
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from postgrest.exceptions import APIError
+
+from app.services import supabase as db
+
+P95_Z = 1.645  # standard normal quantile of the 95th percentile
+
+
+@dataclass
+class Latency:
+    """Log-normal latency with the given median and 95th percentile (seconds)."""
+
+    median_s: float = 0.0
+    p95_s: float = 0.0
+
+    @classmethod
+    def parse(cls, value: str) -> "Latency":
+        """"median,p95" or "median" (fixed) — e.g. "0.02,0.08"."""
+        parts = [float(part) for part in value.split(",")]
+        return cls(parts[0], parts[1] if len(parts) > 1 else parts[0])
+
+    def sample(self, rng: random.Random) -> float:
+        if self.median_s <= 0:
+            return 0.0
+        if self.p95_s <= self.median_s:
+            return self.median_s
+        sigma = math.log(self.p95_s / self.median_s) / P95_Z
+        return rng.lognormvariate(math.log(self.median_s), sigma)
+
+    def __str__(self) -> str:
+        return f"median {self.median_s * 1000:.0f}ms / p95 {self.p95_s * 1000:.0f}ms"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ---------------------------------------------------------------------------
+# Supabase
+# ---------------------------------------------------------------------------
+
+class FakeSupabase:
+    """Tables and storage buckets of one Supabase project, in memory."""
+
+    def __init__(
+        self,
+        db_latency: Latency | None = None,
+        storage_latency: Latency | None = None,
+        seed: int = 0,
+    ):
+        self.db_latency = db_latency or Latency()
+        self.storage_latency = storage_latency or Latency()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.lease_uploads: dict[str, dict] = {}
+        self.extracted_data: dict[str, dict] = {}
+        self.extraction_audit: dict[str, dict] = {}
+        self.lease_texts: dict[str, dict] = {}
+        self._band_index: dict[int, set[str]] = {}
+        self.welcome_packs: dict[str, dict] = {}
+        self.lease_events: list[dict] = []
+        self.storage: dict[str, dict[str, bytes]] = {"leases": {}, "welcome-packs": {}}
+
+    def install(self) -> None:
+        """Route app.services.supabase to this fake. get_client() then raises."""
+        for name in FAKED_FUNCTIONS:
+            setattr(db, name, db._instrumented(getattr(self, name)))
+
+        def get_client():
+            raise RuntimeError("FakeSupabase is installed — this function has no fake")
+        db.get_client = get_client
+
+    def _db(self) -> None:
+        time.sleep(self.db_latency.sample(self._rng))
+
+    def _storage(self) -> None:
+        time.sleep(self.storage_latency.sample(self._rng))
+
+    # lease_uploads -----------------------------------------------------------
+
+    def create_lease_upload(
+        self, user_id, file_name, file_type, file_path, file_size,
+        content_hash=None, idempotency_key=None, upload_id=None,
+    ) -> dict:
+        self._db()
+        row = {
+            "id": upload_id or str(uuid4()),
+            "user_id": user_id,
+            "file_name": file_name,
+            "file_type": file_type,
+            "file_path": file_path,
+            "file_size": file_size,
+            "status": "uploaded",
+            "content_hash": content_hash,
+            "idempotency_key": idempotency_key,
+            "error_message": None,
+            "failed_stage": None,
+            "retry_count": 0,
+            "created_at": _now(),
+            "updated_at": _now(),
+        }
+        with self._lock:
+            for other in self.lease_uploads.values():
+                if other["user_id"] == user_id and (
+                    other["content_hash"] == content_hash
+                    or (idempotency_key and other["idempotency_key"] == idempotency_key)
+                ):
+                    raise APIError({"code": "23505", "message": "duplicate key value violates unique constraint"})
+            self.lease_uploads[row["id"]] = row
+        return dict(row)
+
+    def find_lease_upload(self, user_id, content_hash, idempotency_key=None) -> dict | None:
+        self._db()
+        with self._lock:
+            rows = [
+                row for row in self.lease_uploads.values()
+                if row["user_id"] == user_id and (
+                    row["content_hash"] == content_hash
+                    or (idempotency_key and row["idempotency_key"] == idempotency_key)
+                )
+            ]
+        if not rows:
+            return None
+        return dict(next((row for row in rows if idempotency_key and row["idempotency_key"] == idempotency_key), rows[0]))
+
+    def get_lease_upload(self, upload_id, user_id) -> dict | None:
+        self._db()
+        row = self.lease_uploads.get(upload_id)
+        return dict(row) if row and row["user_id"] == user_id else None
+
+    def list_lease_uploads(self, user_id) -> list[dict]:
+        self._db()
+        rows = [row for row in self.lease_uploads.values() if row["user_id"] == user_id]
+        result = []
+        for row in sorted(rows, key=lambda r: r["created_at"], reverse=True):
+            fields = self.extracted_data.get(row["id"])
+            pack = self.welcome_packs.get(row["id"])
+            # One-to-one embeds come back as a dict or None
+            result.append({
+                **row,
+                "extracted_data": {
+                    "tenant_name": fields.get("tenant_name"),
+                    "property_address": fields.get("property_address"),
+                } if fields else None,
+                "welcome_packs": {"id": pack["id"]} if pack else None,
+            })
+        return result
+
+    def list_completed_leases(self, offset, limit=100, since=None) -> list[dict]:
+        self._db()
+        rows = [
+            row for row in self.lease_uploads.values()
+            if row["status"] == "complete" and (not since or row["created_at"] >= since)
+        ]
+        result = []
+        for row in sorted(rows, key=lambda r: r["created_at"], reverse=True)[offset:offset + limit]:
+            text = self.lease_texts.get(row["id"])
+            fields = self.extracted_data.get(row["id"])
+            audit = self.extraction_audit.get(row["id"])
+            result.append({
+                "id": row["id"],
+                "file_name": row["file_name"],
+                "created_at": row["created_at"],
+                "lease_texts": {"content": text["content"]} if text else None,
+                "extracted_data": dict(fields) if fields else None,
+                "extraction_audit": {"payload": audit["payload"]} if audit else None,
+            })
+        return result
+
+    def claim_failed_upload(self, upload_id, user_id, retry_count) -> bool:
+        self._db()
+        with self._lock:
+            row = self.lease_uploads.get(upload_id)
+            if not row or row["user_id"] != user_id or row["status"] != "failed" or row["retry_count"] != retry_count:
+                return False
+            row.update(
+                status="uploaded", error_message=None, failed_stage=None,
+                retry_count=retry_count + 1, last_retry_at=_now(), updated_at=_now(),
+            )
+            return True
+
+    def list_retryable_uploads(self, max_retries, limit=20) -> list[dict]:
+        self._db()
+        rows = [
+            row for row in self.lease_uploads.values()
+            if row["status"] == "failed" and row["retry_count"] < max_retries
+            and row["failed_stage"] not in (None, "validation", "storage")
+            and "/pending/" not in row["file_path"]
+        ]
+        return [dict(row) for row in sorted(rows, key=lambda r: r["updated_at"])[:limit]]
+
+    # lease_events ------------------------------------------------------------
+
+    def _apply_events(self, events: list[dict]) -> None:
+        """The lease_events status trigger: the latest event with a status wins."""
+        for event in events:
+            self.lease_events.append(dict(event))
+            row = self.lease_uploads.get(event["lease_upload_id"])
+            if row is None or event["status"] is None:
+                continue
+            row.update(status=event["status"], updated_at=_now())
+            if event["status"] == "failed":
+                row.update(error_message=event["error_message"], failed_stage=event["stage"])
+
+    def insert_lease_events(self, events) -> None:
+        self._db()
+        with self._lock:
+            # The foreign key to lease_uploads: one bad row fails the whole insert
+            if any(event["lease_upload_id"] not in self.lease_uploads for event in events):
+                raise APIError({"code": "23503", "message": "insert or update on table \"lease_events\" violates foreign key constraint"})
+            self._apply_events(events)
+
+    def take_rate_limit_token(self, key, rate, burst) -> float:
+        self._db()
+        return 0.0
+
+    # extracted_data / extraction_audit ---------------------------------------
+
+    def save_extracted_data(self, lease_upload_id, fields) -> dict:
+        self._db()
+        row = {"lease_upload_id": lease_upload_id, **{k: v for k, v in fields.items() if k != "raw_ai_response"}}
+        with self._lock:
+            self.extracted_data.setdefault(lease_upload_id, row)
+        return dict(row)
+
+    def get_extracted_data(self, lease_upload_id) -> dict | None:
+        self._db()
+        row = self.extracted_data.get(lease_upload_id)
+        return dict(row) if row else None
+
+    def save_extraction_audits(self, rows) -> None:
+        self._db()
+        with self._lock:
+            for row in rows:
+                self.extraction_audit.setdefault(row["lease_upload_id"], {**row, "created_at": _now()})
+
+    def get_extraction_audit(self, lease_upload_id) -> dict | None:
+        self._db()
+        row = self.extraction_audit.get(lease_upload_id)
+        if not row:
+            return None
+        return {"raw_ai_response": db.decode_audit_payload(row["payload"]), "created_at": row["created_at"]}
+
+    # lease_texts -------------------------------------------------------------
+
+    def save_lease_text(
+        self, lease_upload_id, user_id, content, text_hash, paragraph_hashes, minhash=None, minhash_bands=None,
+    ) -> dict:
+        self._db()
+        row = {
+            "lease_upload_id": lease_upload_id,
+            "user_id": user_id,
+            "content": content,
+            "text_hash": text_hash,
+            "paragraph_hashes": paragraph_hashes,
+            "minhash": minhash,
+            "minhash_bands": minhash_bands,
+            "created_at": _now(),
+        }
+        with self._lock:
+            self.lease_texts[lease_upload_id] = row
+            self._index_bands(lease_upload_id, (), minhash_bands)
+        return dict(row)
+
+    def update_lease_text(
+        self, lease_upload_id, content, text_hash, paragraph_hashes, minhash=None, minhash_bands=None,
+    ) -> None:
+        self._db()
+        with self._lock:
+            row = self.lease_texts.get(lease_upload_id)
+            if row:
+                self._index_bands(lease_upload_id, row["minhash_bands"], minhash_bands)
+                row.update(
+                    content=content, text_hash=text_hash, paragraph_hashes=paragraph_hashes,
+                    minhash=minhash, minhash_bands=minhash_bands,
+                )
+
+    def set_minhash_bands(self, lease_upload_id, minhash_bands) -> None:
+        self._db()
+        with self._lock:
+            row = self.lease_texts.get(lease_upload_id)
+            if row:
+                self._index_bands(lease_upload_id, row["minhash_bands"], minhash_bands)
+                row["minhash_bands"] = minhash_bands
+
+    def _index_bands(self, lease_upload_id, old_bands, new_bands) -> None:
+        """Maintain band key → upload ids, standing in for the GIN index on minhash_bands."""
+        for band_key in old_bands or ():
+            self._band_index.get(band_key, set()).discard(lease_upload_id)
+        for band_key in new_bands or ():
+            self._band_index.setdefault(band_key, set()).add(lease_upload_id)
+
+    def get_lease_text(self, lease_upload_id) -> dict | None:
+        self._db()
+        row = self.lease_texts.get(lease_upload_id)
+        return dict(row) if row else None
+
+    def find_prior_lease_texts(self, user_id, paragraph_hashes, exclude_upload_id, limit=5) -> list[dict]:
+        self._db()
+        wanted = set(paragraph_hashes)
+        rows = [
+            row for row in self.lease_texts.values()
+            if row["user_id"] == user_id and row["lease_upload_id"] != exclude_upload_id
+            and wanted.intersection(row["paragraph_hashes"])
+        ]
+        return [dict(row) for row in sorted(rows, key=lambda r: r["created_at"], reverse=True)[:limit]]
+
+    def find_lease_texts_by_bands(self, user_id, band_keys, exclude_upload_id, limit=50) -> list[dict]:
+        self._db()
+        with self._lock:
+            ids = set().union(*(self._band_index.get(key, ()) for key in band_keys))
+            rows = [
+                self.lease_texts[i] for i in ids
+                if self.lease_texts[i]["user_id"] == user_id and i != exclude_upload_id
+            ]
+        rows.sort(key=lambda r: r["created_at"], reverse=True)
+        return [{"lease_upload_id": r["lease_upload_id"], "minhash": r["minhash"]} for r in rows[:limit]]
+
+    def list_lease_signatures(self, after, limit=1000) -> list[dict]:
+        self._db()
+        rows = sorted(
+            (row for row in self.lease_texts.values()
+             if row["minhash"] is not None and (after is None or row["lease_upload_id"] > after)),
+            key=lambda r: r["lease_upload_id"],
+        )
+        return [
+            {"lease_upload_id": r["lease_upload_id"], "minhash": r["minhash"], "minhash_bands": r["minhash_bands"]}
+            for r in rows[:limit]
+        ]
+
+    # welcome_packs -----------------------------------------------------------
+
+    def save_welcome_pack(self, lease_upload_id, file_path, file_name) -> dict:
+        self._db()
+        row = {"id": str(uuid4()), "lease_upload_id": lease_upload_id, "file_path": file_path, "file_name": file_name}
+        with self._lock:
+            self.welcome_packs.setdefault(lease_upload_id, row)
+        return dict(row)
+
+    def get_welcome_pack(self, lease_upload_id) -> dict | None:
+        self._db()
+        row = self.welcome_packs.get(lease_upload_id)
+        return dict(row) if row else None
+
+    def finalize_lease_upload(
+        self, upload_id, user_id, fields, raw_ai_response, pack_path, pack_file_name, events,
+    ) -> None:
+        """The finalize_lease_upload RPC — one round trip, applied atomically."""
+        self._db()
+        payload = db.encode_audit_payload(raw_ai_response) if raw_ai_response is not None else None
+        with self._lock:
+            row = self.lease_uploads.get(upload_id)
+            if row is None or row["user_id"] != user_id:
+                raise APIError({"code": "P0001", "message": f"Lease upload {upload_id} not found for user"})
+            self.extracted_data.setdefault(upload_id, {"lease_upload_id": upload_id, **fields})
+            if payload is not None:
+                self.extraction_audit.setdefault(
+                    upload_id, {"lease_upload_id": upload_id, "user_id": user_id, "payload": payload, "created_at": _now()},
+                )
+            self.welcome_packs.setdefault(upload_id, {
+                "id": str(uuid4()), "lease_upload_id": upload_id, "file_path": pack_path, "file_name": pack_file_name,
+            })
+            self._apply_events(events)
+
+    # Storage -----------------------------------------------------------------
+
+    def upload_lease_file(self, user_id, upload_id, file_name, file_bytes, content_type) -> str:
+        self._storage()
+        path = db.lease_file_path(user_id, upload_id, file_name)
+        self.storage["leases"][path] = bytes(file_bytes)
+        return path
+
+    def download_lease_file(self, file_path) -> bytes:
+        self._storage()
+        return self.storage["leases"][file_path]
+
+    def upload_welcome_pack_file(self, user_id, upload_id, file_name, file_bytes) -> str:
+        self._storage()
+        path = f"{user_id}/{upload_id}/{file_name}"
+        self.storage["welcome-packs"][path] = bytes(file_bytes)
+        return path
+
+    def download_welcome_pack_file(self, file_path) -> bytes:
+        self._storage()
+        return self.storage["welcome-packs"][file_path]
+
+    def get_welcome_pack_download_url(self, file_path, expires_in=300) -> str:
+        self._storage()
+        return f"https://fake.supabase.local/storage/v1/object/sign/welcome-packs/{file_path}?expires_in={expires_in}"
+
+
+FAKED_FUNCTIONS = (
+    "create_lease_upload",
+    "find_lease_upload",
+    "get_lease_upload",
+    "list_lease_uploads",
+    "claim_failed_upload",
+    "list_retryable_uploads",
+    "list_completed_leases",
+    "insert_lease_events",
+    "take_rate_limit_token",
+    "save_extracted_data",
+    "get_extracted_data",
+    "save_extraction_audits",
+    "get_extraction_audit",
+    "save_lease_text",
+    "update_lease_text",
+    "get_lease_text",
+    "find_prior_lease_texts",
+    "find_lease_texts_by_bands",
+    "list_lease_signatures",
+    "set_minhash_bands",
+    "save_welcome_pack",
+    "get_welcome_pack",
+    "finalize_lease_upload",
+    "upload_lease_file",
+    "download_lease_file",
+    "upload_welcome_pack_file",
+    "download_welcome_pack_file",
+    "get_welcome_pack_download_url",
+)
+
+
+# ---------------------------------------------------------------------------
+# Gemini
+# ---------------------------------------------------------------------------
+
+class FakeGemini:
+    """
+    google-genai client stand-in. `recordings` maps a marker string to the
+    response text returned when the marker appears in the prompt; prompts
+    matching no marker get `default` (an unparseable reply if None).
+    """
+
+    def __init__(
+        self,
+        recordings: dict[str, str],
+        latency: Latency | None = None,
+        default: str | None = None,
+        seed: int = 0,
+    ):
+        self.recordings = recordings
+        self.latency = latency or Latency()
+        self.default = default
+        self.calls: list[str] = []
+        self._rng = random.Random(seed)
+        self.models = types.SimpleNamespace(generate_content=self.generate_content)
+
+    @classmethod
+    def from_ground_truth(cls, ground_truth: dict[str, dict], **kwargs) -> "FakeGemini":
+        """Recordings that answer each lease with its ground-truth fields, keyed by tenant name."""
+        recordings = {fields["tenant_name"]: json.dumps(fields, indent=2) for fields in ground_truth.values()}
+        return cls(recordings, **kwargs)
+
+    def generate_content(self, model: str, contents: str, config=None):
+        self.calls.append(model)
+        time.sleep(self.latency.sample(self._rng))
+        text = next((reply for marker, reply in self.recordings.items() if marker in contents), self.default)
+        if text is None:
+            text = "No recording matches this prompt."
+        prompt_tokens = len(contents) // 4
+        return types.SimpleNamespace(
+            text=text,
+            usage_metadata=types.SimpleNamespace(
+                prompt_token_count=prompt_tokens,
+                cached_content_token_count=0,
+                candidates_token_count=len(text) // 4,
+            ),
+        )
@@ -0,0 +1,778 @@
+"""
+Synthetic lease corpus generator — realistic DOCX/PDF leases at any scale,
+with ground truth in the tests/ground_truth.json format.
+
+Usage:
+    python tests/generate_corpus.py OUT_DIR [--count 200] [--pdf 0.5] [--pages 0-0]
+        [--table-rows 10-40] [--seed 1]
+
+Each lease draws its parties, address, dates, rent (weekly, fortnightly or
+monthly), bond, joint tenancy, occupants, pets, parking and special
+conditions at random, and is laid out in one of the three styles of the
+sample leases: a tenancy summary table, a numbered particulars table, or
+prose. Every person name is unique across the corpus, so tenant names can
+key Gemini recordings (FakeGemini.from_ground_truth).
+
+--pdf is the fraction of leases written as PDF. --pages MIN-MAX pads each
+lease with annexures (rent schedule, condition report, renting guide) to a
+page count drawn from the range — exact for PDFs, estimated for DOCX; 0-0
+leaves leases at their natural 3-6 pages. --table-rows MIN-MAX sizes the
+condition report table.
+
+Writes the leases and OUT_DIR/ground_truth.json. Run any benchmark that
+takes --corpus OUT_DIR against it.
+
+Exit code 0 = corpus written.
+"""
+
+import calendar
+import io
+import json
+import math
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import fitz
+from docx import Document
+
+# ---------------------------------------------------------------------------
+# Vocabulary
+# ---------------------------------------------------------------------------
+
+FIRST_NAMES = [
+    "Aaron", "Abigail", "Adam", "Aisha", "Alice", "Amara", "Amelia", "Andrew", "Angela", "Arjun",
+    "Ava", "Beatrice", "Benjamin", "Bianca", "Blake", "Caleb", "Camille", "Carlos", "Charlotte", "Chloe",
+    "Connor", "Daniel", "Deepa", "Diego", "Eleanor", "Elijah", "Elena", "Ethan", "Farah", "Felix",
+    "Fiona", "Gabriel", "Georgia", "Grace", "Hannah", "Harper", "Hamish", "Hiroshi", "Imogen", "Isaac",
+    "Isla", "Jack", "Jasmine", "Jonah", "Julian", "Kai", "Kavya", "Keira", "Liam", "Lily",
+    "Lucas", "Lucy", "Madeleine", "Mai", "Marco", "Maya", "Mei", "Mia", "Nathan", "Nikhil",
+    "Noah", "Olivia", "Oscar", "Patrick", "Phoebe", "Priya", "Quinn", "Rachel", "Rhys", "Rosa",
+    "Ruby", "Samuel", "Sana", "Sebastian", "Sienna", "Sofia", "Stella", "Tahlia", "Theo", "Thomas",
+    "Tomas", "Uma", "Victor", "Violet", "William", "Xavier", "Yara", "Yusuf", "Zara", "Zoe",
+]
+
+# No surname is a prefix of another ("Li"/"Lim"), so no tenant name is a
+# substring of another tenant's name.
+LAST_NAMES = [
+    "Abbott", "Ahmed", "Alvarez", "Anderson", "Bailey", "Barker", "Bennett", "Bianchi", "Brennan", "Byrne",
+    "Campbell", "Castillo", "Chowdhury", "Clarke", "Costa", "Dao", "Delaney", "Dimitriou", "Duffy", "Edwards",
+    "Ellis", "Farrell", "Fernando", "Fitzgerald", "Fraser", "Gallagher", "Georgiou", "Gupta", "Hadley", "Hartono",
+    "Hayes", "Huang", "Ibrahim", "Ivanova", "Jamieson", "Jovanovic", "Kaur", "Kennedy", "Kowalski", "Lam",
+    "Lawrence", "Lombardi", "Lowe", "MacLeod", "Malik", "Marshall", "Matsumoto", "McAllister", "Mendoza", "Murphy",
+    "Nakamura", "Nasser", "Nguyen", "Nicholls", "O'Brien", "Okonkwo", "Papadopoulos", "Park", "Petrovic", "Quinlan",
+    "Rahman", "Ramirez", "Reddy", "Romano", "Russo", "Sato", "Schmidt", "Shah", "Sharma", "Sullivan",
+    "Tanaka", "Thornton", "Tran", "Varga", "Vo", "Wagner", "Walsh", "Watanabe", "Whitmore", "Wong",
+    "Xu", "Yamamoto", "Yilmaz", "Young", "Zhang", "Zimmerman",
+]
+
+STREETS = [
+    "River Road", "King Street", "Victoria Crescent", "Harbour View Boulevard", "Chapel Street",
+    "Brunswick Street", "Smith Street", "Sydney Road", "Glenferrie Road", "Lygon Street",
+    "Acland Street", "Bridge Road", "Swan Street", "High Street", "Fitzroy Street",
+    "Station Street", "Church Street", "Park Street", "Queens Parade", "Rathdowne Street",
+]
+
+SUBURBS = [
+    ("Abbotsford", "3067"), ("Melbourne", "3000"), ("St Kilda", "3182"), ("Docklands", "3008"),
+    ("Fitzroy", "3065"), ("Collingwood", "3066"), ("Richmond", "3121"), ("Carlton", "3053"),
+    ("Brunswick", "3056"), ("South Yarra", "3141"), ("Prahran", "3181"), ("Hawthorn", "3122"),
+    ("Footscray", "3011"), ("Northcote", "3070"), ("Southbank", "3006"), ("Elwood", "3184"),
+]
+
+# (lease text, ground truth) per pet arrangement
+PETS = [
+    (
+        "Pets are not permitted at the Premises without the prior written consent of the Landlord. "
+        "Any request to keep a pet must be made in writing.",
+        "Not permitted",
+    ),
+    ("No pets of any kind are permitted at the Premises.", "Not permitted"),
+    (
+        "The Tenant has been granted permission to keep one (1) domestic cat at the Premises, provided "
+        "the cat is desexed and microchipped. The Tenant is liable for any damage caused by the cat and "
+        "must have the Premises professionally flea treated at the end of the tenancy. The Landlord may "
+        "withdraw permission if these conditions are not met.",
+        "domestic cat desexed microchipped damage professionally flea treated withdraw permission",
+    ),
+    (
+        "The Tenant may keep one (1) small dog under 10 kg at the Premises. The dog must be registered "
+        "with the local council and must not be left in the courtyard overnight. The Tenant is liable "
+        "for any damage caused by the dog.",
+        "small dog registered council courtyard overnight damage",
+    ),
+    (
+        "The Tenant may keep caged birds or fish in an aquarium at the Premises. No other animals are "
+        "permitted.",
+        "caged birds fish aquarium",
+    ),
+]
+
+PARKING_NOT_INCLUDED = (
+    "Parking is not included as part of this tenancy agreement. The Tenant(s) shall make their own "
+    "arrangements for vehicle parking.",
+    "Not included",
+)
+
+SPECIAL_CONDITIONS = [
+    (
+        "The Tenant must not sublet the Premises or list them on any short-term rental platform.",
+        "sublet short-term rental platform",
+    ),
+    (
+        "The Tenant is responsible for the cost of replacing lost building access fobs, at a fee of $75 per fob.",
+        "fobs $75 fob",
+    ),
+    (
+        "Garbage and recycling must be placed in the bin room on the ground floor, not left in corridors.",
+        "bin room ground floor corridors",
+    ),
+    (
+        "The Tenant must comply with the Owners Corporation rules, a copy of which has been provided.",
+        "Owners Corporation rules",
+    ),
+    (
+        "The garden, including lawn mowing and weeding, is to be maintained by the Tenant.",
+        "garden lawn mowing weeding",
+    ),
+    (
+        "The Tenant must have the carpets professionally steam cleaned at the end of the tenancy.",
+        "carpets professionally steam cleaned",
+    ),
+    (
+        "Smoking is not permitted anywhere inside the Premises or on the balcony.",
+        "smoking balcony",
+    ),
+    (
+        "The Tenant may use the building gym and swimming pool in accordance with the Owners Corporation hours.",
+        "gym swimming pool",
+    ),
+    (
+        "Picture hooks may only be installed using removable adhesive strips.",
+        "picture hooks removable adhesive strips",
+    ),
+]
+
+NO_SPECIAL_CONDITIONS = [
+    "No special conditions apply to this tenancy.",
+    "Nil.",
+    "Nil. No special conditions apply.",
+]
+
+ROOMS = ["Entry", "Lounge", "Kitchen", "Bedroom 1", "Bedroom 2", "Bathroom", "Laundry", "Balcony"]
+ROOM_ITEMS = [
+    "Walls", "Ceiling", "Floor coverings", "Windows", "Window coverings", "Light fittings",
+    "Power points", "Doors", "Skirting boards", "Cupboards", "Benchtops", "Smoke alarm",
+]
+ITEM_CONDITIONS = [
+    ("Clean", "Undamaged", "Working"),
+    ("Clean", "Minor scuff marks", "Working"),
+    ("Marked", "Small chip near edge", "Working"),
+    ("Clean", "Faded", "N/A"),
+]
+
+RENTING_GUIDE = [
+    "Your landlord must make sure the property meets the rental minimum standards before you move in. "
+    "The minimum standards cover locks, bathroom and kitchen facilities, heating, lighting, ventilation, "
+    "mould and damp, structural soundness, window coverings and electrical safety.",
+    "You have the right to quiet enjoyment of the premises. Your landlord or agent may enter the premises "
+    "only for a reason allowed by law, and must give you at least 24 hours' written notice stating the "
+    "reason for entry, unless you agree otherwise.",
+    "If something needs to be repaired, tell your landlord or agent in writing as soon as possible. Urgent "
+    "repairs include a burst water service, a blocked toilet, a serious roof leak, a gas leak, a dangerous "
+    "electrical fault and failure of an essential service for hot water, water, cooking or heating.",
+    "Your bond must be lodged with the Residential Tenancies Bond Authority within 10 business days. At the "
+    "end of the tenancy you may claim the bond online. If the landlord claims part of the bond you may "
+    "dispute the claim.",
+    "The rent can only be increased once every 12 months and your landlord must give you at least 60 days' "
+    "written notice. You may ask Consumer Affairs Victoria to inspect the premises and provide a report if "
+    "you think the increase is excessive.",
+    "You must keep the premises reasonably clean, avoid damaging the premises and tell your landlord about "
+    "any damage. You must not make alterations without consent, except for minor modifications allowed by "
+    "the Act.",
+]
+
+AGENCY = "Acme Property Group"
+AGENCY_DOMAIN = "acmepg.com.au"
+NUMBER_WORDS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
+LAYOUTS = ["summary", "particulars", "narrative"]
+
+# Page estimates for padding (exact page counts come from rendering PDFs)
+PARAGRAPHS_PER_PAGE = 9
+LINES_PER_PAGE = 42
+PDF_PAGE = fitz.paper_rect("a4")
+PDF_MARGIN = 54
+PDF_FONT_SIZE = 10
+
+
+# ---------------------------------------------------------------------------
+# Lease particulars
+# ---------------------------------------------------------------------------
+
+class NamePool:
+    """Person names, each handed out at most once."""
+
+    def __init__(self, rng: random.Random):
+        self._rng = rng
+        self._free: dict[str, list[str]] = {}
+        for last in LAST_NAMES:
+            firsts = list(FIRST_NAMES)
+            rng.shuffle(firsts)
+            self._free[last] = firsts
+
+    def draw(self, last: str | None = None) -> str:
+        """A fresh 'First Last' name, from the `last` family when it has names left."""
+        if not last or not self._free.get(last):
+            remaining = [name for name, firsts in self._free.items() if firsts]
+            if not remaining:
+                raise ValueError("Name pool exhausted — generate a smaller corpus")
+            last = self._rng.choice(remaining)
+        return f"{self._free[last].pop()} {last}"
+
+
+def _money(amount: float) -> str:
+    return f"${amount:,.2f}"
+
+
+def _long_date(day: date) -> str:
+    return f"{day.day} {day:%B %Y}"
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    year = day.year + month // 12
+    month = month % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _count(n: int) -> str:
+    """'two (2)' — the form leases use for counts."""
+    return f"{NUMBER_WORDS[n]} ({n})" if n < len(NUMBER_WORDS) else str(n)
+
+
+def make_staff(names: NamePool, rng: random.Random, count: int = 6) -> list[dict]:
+    """Agency property managers, shared across the corpus."""
+    staff = []
+    for _ in range(count):
+        name = names.draw()
+        first, last = name.split(" ", 1)
+        staff.append({
+            "name": name,
+            "email": f"{first}.{last}@{AGENCY_DOMAIN}".replace("'", "").lower(),
+            "phone": f"+61 3 9555 {rng.randrange(100, 9999):04d}",
+        })
+    return staff
+
+
+def make_lease(names: NamePool, staff: list[dict], rng: random.Random) -> dict:
+    """Random particulars for one lease; `fields` is its ground truth."""
+    tenant_count = rng.choices([1, 2, 3], weights=[70, 25, 5])[0]
+    tenants = [names.draw()]
+    for _ in range(tenant_count - 1):
+        same_family = rng.random() < 0.5
+        tenants.append(names.draw(tenants[0].split(" ", 1)[1] if same_family else None))
+    landlord = names.draw()
+    manager = rng.choice(staff)
+
+    suburb, postcode = rng.choice(SUBURBS)
+    street = f"{rng.randrange(1, 400)} {rng.choice(STREETS)}"
+    unit = rng.choice(["", "", f"Unit {rng.randrange(1, 40)}", f"Flat {rng.randrange(1, 20)}{rng.choice('AB')}"])
+    address = ", ".join(filter(None, [street, unit, f"{suburb} VIC {postcode}"]))
+
+    start = date(2025, 7, 1) + timedelta(days=rng.randrange(730))
+    if rng.random() < 0.6:
+        start = start.replace(day=1)
+    term_months = rng.choice([6, 12, 12, 12, 24])
+    end = _add_months(start, term_months) - timedelta(days=1)
+
+    weekly = rng.randrange(380, 1200, 5)
+    frequency = rng.choice(["week", "fortnight", "month"])
+    if frequency == "week":
+        rent, bond, bond_basis = weekly, weekly * 4, "4 weeks rent"
+    elif frequency == "fortnight":
+        rent, bond, bond_basis = weekly * 2, weekly * 4, "4 weeks rent"
+    else:
+        rent = round(weekly * 52 / 12 / 5) * 5
+        months = rng.choice([1, 1, 2])
+        bond, bond_basis = rent * months, f"{months} month{'s' if months > 1 else ''} rent"
+
+    pets_text, pets_truth = rng.choice(PETS)
+    parking_text, parking_truth = _parking(rng)
+    conditions = rng.sample(SPECIAL_CONDITIONS, rng.choices([0, 1, 2, 3], weights=[45, 25, 20, 10])[0])
+    occupants = tenant_count + rng.choice([0, 0, 0, 1, 2])
+
+    tenant_name = " & ".join(tenants)
+    return {
+        "tenants": tenants,
+        "tenant_name": tenant_name,
+        "landlord": landlord,
+        "manager": manager,
+        "address": address,
+        "street_line": ", ".join(filter(None, [street, unit])),
+        "suburb_line": f"{suburb} VIC {postcode}",
+        "start": start,
+        "end": end,
+        "term_months": term_months,
+        "rent": rent,
+        "frequency": frequency,
+        "bond": bond,
+        "bond_basis": bond_basis,
+        "occupants": occupants,
+        "pets": pets_text,
+        "parking": parking_text,
+        "special_conditions": [text for text, _ in conditions],
+        "no_special_conditions": rng.choice(NO_SPECIAL_CONDITIONS),
+        "fields": {
+            "tenant_name": tenant_name,
+            "property_address": address,
+            "lease_start_date": _long_date(start),
+            "lease_end_date": _long_date(end),
+            "rent_amount": f"{_money(rent)} per {frequency}",
+            "bond_amount": _money(bond),
+            "num_occupants": str(occupants),
+            "pet_permission": pets_truth,
+            "parking": parking_truth,
+            "special_conditions": " ".join(truth for _, truth in conditions) or None,
+            "landlord_name": landlord,
+            "property_manager_name": manager["name"],
+            "property_manager_email": manager["email"],
+            "property_manager_phone": manager["phone"],
+        },
+    }
+
+
+def _parking(rng: random.Random) -> tuple[str, str]:
+    kind = rng.choice(["none", "none", "space", "two_spaces", "garage"])
+    if kind == "space":
+        level, space = rng.randrange(1, 4), rng.randrange(1, 120)
+        return (
+            f"The Tenant is allocated one designated car parking space, Basement Level {level}, Space #{space}, "
+            "with access via the remote-controlled gate.",
+            f"One designated car parking space Basement Level {level} Space #{space} remote-controlled gate",
+        )
+    if kind == "two_spaces":
+        space = rng.randrange(1, 120)
+        return (
+            f"Two car parking spaces are included: Spaces #{space} and #{space + 1} in the rear car park.",
+            f"Two car parking spaces #{space} #{space + 1} rear car park",
+        )
+    if kind == "garage":
+        return (
+            "A single lock-up garage accessed from the rear laneway is included with the Premises.",
+            "single lock-up garage rear laneway",
+        )
+    return PARKING_NOT_INCLUDED
+
+
+# ---------------------------------------------------------------------------
+# Layouts — a lease is a list of blocks: (kind, content) where kind is
+# "title", "heading", "para" or "table" (content = rows of cells)
+# ---------------------------------------------------------------------------
+
+def _rent_text(lease: dict) -> str:
+    frequency = "calendar month" if lease["frequency"] == "month" else lease["frequency"]
+    return f"{_money(lease['rent'])} AUD per {frequency}"
+
+
+def _contact_lines(lease: dict) -> str:
+    manager = lease["manager"]
+    return f"{AGENCY}\nContact: {manager['name']}\n{manager['email']}\n{manager['phone']}"
+
+
+def _special_condition_blocks(lease: dict) -> list[tuple]:
+    if not lease["special_conditions"]:
+        return [("para", lease["no_special_conditions"])]
+    return [
+        ("para", f"({chr(ord('a') + n)}) {text}")
+        for n, text in enumerate(lease["special_conditions"])
+    ]
+
+
+def _signature_blocks(lease: dict, heading: str) -> list[tuple]:
+    blocks = [("heading", heading), ("para", "By signing below, the parties agree to be bound by this agreement.")]
+    parties = [(lease["landlord"], "Landlord")] + [(name, "Tenant") for name in lease["tenants"]]
+    for name, role in parties:
+        blocks.append(("para", f"__________________________________\n{name} ({role})\nDate: ____/____/________"))
+    return blocks
+
+
+def _summary_layout(lease: dict) -> list[tuple]:
+    """Tenancy summary table, then numbered clauses (like the Johnson lease)."""
+    joint = len(lease["tenants"]) > 1
+    start, end = f"{lease['start']:%d/%m/%Y}", f"{lease['end']:%d/%m/%Y}"
+    blocks = [
+        ("title", "RESIDENTIAL TENANCY AGREEMENT"),
+        ("para", "Residential Tenancies Act 1997 (VIC)"),
+        ("heading", "TENANCY SUMMARY"),
+        ("table", [
+            ["Landlord", lease["landlord"]],
+            ["Tenant(s)", lease["tenant_name"] + (" (Joint Tenancy)" if joint else "")],
+            ["Premises", lease["address"]],
+            ["Term", f"{lease['term_months']} months (fixed term)"],
+            ["Commencement Date", start],
+            ["End Date", end],
+            ["Rent", _rent_text(lease)],
+            ["Bond", f"{_money(lease['bond'])} AUD"],
+            ["Managing Agent", _contact_lines(lease)],
+        ]),
+        ("heading", "TERMS AND CONDITIONS OF TENANCY"),
+        ("para", "This Residential Tenancy Agreement is entered into between the Landlord and the Tenant(s) as "
+                 "identified in the Tenancy Summary above."
+                 + (" All tenants are jointly and severally liable under this agreement." if joint else "")),
+        ("heading", "Clause 1 — The Premises"),
+        ("para", f"The Landlord agrees to let, and the Tenant(s) agree to rent, the residential premises located "
+                 f"at {lease['address']}. The Premises are to be used solely as a private residential dwelling."),
+        ("heading", "Clause 2 — Rent"),
+        ("para", f"(a) Amount: The Tenant(s) shall pay rent of {_rent_text(lease)}.\n"
+                 f"(b) Due Date: Rent is payable in advance, commencing on {start}.\n"
+                 "(c) Method of Payment: Rent shall be paid by electronic funds transfer."),
+        ("heading", "Clause 3 — Bond / Security Deposit"),
+        ("para", f"The Tenant(s) shall pay a bond of {_money(lease['bond'])} AUD (equivalent to {lease['bond_basis']}). "
+                 "The bond shall be lodged with the Residential Tenancies Bond Authority (RTBA)."),
+        ("heading", "Clause 4 — Term of Tenancy"),
+        ("para", f"The tenancy commences on {start} and expires on {end}."),
+        ("heading", "Clause 5 — Occupants"),
+        ("para", f"The maximum number of occupants permitted to reside at the Premises is {_count(lease['occupants'])}."),
+        ("heading", "Clause 6 — Pets"),
+        ("para", lease["pets"]),
+        ("heading", "Clause 7 — Parking"),
+        ("para", lease["parking"]),
+        ("heading", "Clause 8 — Special Conditions"),
+        *_special_condition_blocks(lease),
+    ]
+    return blocks + _signature_blocks(lease, "Clause 9 — Signatures")
+
+
+def _particulars_layout(lease: dict) -> list[tuple]:
+    """Numbered particulars table in Part A, terms in Part B (like the Patel lease)."""
+    frequency = {"week": "Weekly", "fortnight": "Fortnightly", "month": "Monthly"}[lease["frequency"]]
+    label = "Tenants" if len(lease["tenants"]) > 1 else "Tenant"
+    blocks = [
+        ("title", "RESIDENTIAL TENANCY AGREEMENT"),
+        ("para", f"Property Address:    {lease['address']}\nLandlord:    {lease['landlord']}\n"
+                 f"{label}:    {lease['tenant_name']}\nDate of Agreement:    {_long_date(lease['start'])}\n"
+                 f"Prepared by: {AGENCY}\nContact: {lease['manager']['name']} | {lease['manager']['email']} | "
+                 f"{lease['manager']['phone']}"),
+        ("heading", "Part A — Particulars"),
+        ("table", [
+            ["Item", "Description", "Details"],
+            ["1", "Landlord", lease["landlord"]],
+            ["2", "Property Manager", _contact_lines(lease)],
+            ["3", label, lease["tenant_name"]],
+            ["4", "Premises", f"{lease['street_line']}\n{lease['suburb_line']}"],
+            ["5", "Term", f"{_count(lease['term_months']).capitalize()} months"],
+            ["6", "Commencement Date", _long_date(lease["start"])],
+            ["7", "Expiry Date", _long_date(lease["end"])],
+            ["8", "Rent", _rent_text(lease)],
+            ["9", "Rent Payment Frequency", f"{frequency}, in advance"],
+            ["10", "Bond", f"{_money(lease['bond'])} AUD (equivalent to {lease['bond_basis']})"],
+            ["11", "Maximum Occupants", _count(lease["occupants"]).capitalize()],
+        ]),
+        ("heading", "Part B — Terms and Conditions"),
+        ("heading", "1. Pets"),
+        ("para", lease["pets"]),
+        ("heading", "2. Parking"),
+        ("para", lease["parking"]),
+        ("heading", "3. Special Conditions"),
+        *_special_condition_blocks(lease),
+    ]
+    return blocks + _signature_blocks(lease, "Part C — Execution")
+
+
+def _narrative_layout(lease: dict) -> list[tuple]:
+    """Prose agreement with all-caps section headings (like the Whitfield lease)."""
+    joint = len(lease["tenants"]) > 1
+    tenant_role = "the Tenants" if joint else "the Tenant"
+    persons = "person" if lease["occupants"] == 1 else "persons"
+    manager = lease["manager"]
+    blocks = [
+        ("title", "RESIDENTIAL TENANCY AGREEMENT"),
+        ("para", "State of Victoria, Australia"),
+        ("heading", "PARTIES"),
+        ("para", f"This Residential Tenancy Agreement is entered into between {lease['landlord']} (hereinafter "
+                 f"referred to as the Landlord) and {lease['tenant_name']} (hereinafter referred to as "
+                 f"{tenant_role}). The Landlord's property is managed by {AGENCY}."),
+        ("para", f"Property Manager Contact — {manager['name']}, {AGENCY}. Email: {manager['email']}. "
+                 f"Phone: {manager['phone']}."),
+        ("heading", "PREMISES"),
+        ("para", f"The Landlord agrees to lease to {tenant_role} the residential premises located at "
+                 f"{lease['address']} (the Premises)."),
+        ("heading", "TERM AND RENT"),
+        ("para", f"The term of this tenancy shall commence on {_long_date(lease['start'])} and shall expire on "
+                 f"{_long_date(lease['end'])}, constituting a fixed term of {lease['term_months']} months. "
+                 f"The rent is {_rent_text(lease)}, payable in advance."),
+        ("heading", "BOND"),
+        ("para", f"A bond of {_money(lease['bond'])} (equivalent to {lease['bond_basis']}) is payable on signing "
+                 "and will be lodged with the Residential Tenancies Bond Authority."),
+        ("heading", "OCCUPANCY"),
+        ("para", f"No more than {_count(lease['occupants'])} {persons} may reside at the Premises."),
+        ("heading", "PETS"),
+        ("para", lease["pets"]),
+        ("heading", "PARKING"),
+        ("para", lease["parking"]),
+        ("heading", "SPECIAL CONDITIONS"),
+        *_special_condition_blocks(lease),
+    ]
+    return blocks + _signature_blocks(lease, "SIGNATURES")
+
+
+def _annexure_blocks(lease: dict, table_rows: int, guide_paragraphs: int, rng: random.Random) -> list[tuple]:
+    """Rent schedule, condition report and renting guide — bulk after the particulars."""
+    step = {"week": timedelta(weeks=1), "fortnight": timedelta(weeks=2)}.get(lease["frequency"])
+    schedule = [["Due date", "Amount", "Period"]]
+    due, n = lease["start"], 0
+    while due <= lease["end"]:
+        schedule.append([f"{due:%d/%m/%Y}", _money(lease["rent"]), f"Payment {n + 1}"])
+        n += 1
+        due = lease["start"] + step * n if step else _add_months(lease["start"], n)
+
+    blocks = [("heading", "Annexure A — Rent Schedule"), ("table", schedule)]
+    if table_rows:
+        report = [["Room", "Item", "Clean", "Undamaged", "Working"]]
+        for n in range(table_rows):
+            room = ROOMS[n // len(ROOM_ITEMS) % len(ROOMS)]
+            report.append([room, ROOM_ITEMS[n % len(ROOM_ITEMS)], *rng.choice(ITEM_CONDITIONS)])
+        blocks += [("heading", "Annexure B — Property Condition Report"), ("table", report)]
+    if guide_paragraphs:
+        blocks.append(("heading", "Annexure C — Renting Guide"))
+        blocks += [("para", RENTING_GUIDE[n % len(RENTING_GUIDE)]) for n in range(guide_paragraphs)]
+    return blocks
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def render_docx(blocks: list[tuple]) -> bytes:
+    doc = Document()
+    for kind, content in blocks:
+        if kind == "title":
+            doc.add_heading(content, level=0)
+        elif kind == "heading":
+            doc.add_heading(content, level=2)
+        elif kind == "para":
+            doc.add_paragraph(content)
+        elif kind == "table":
+            table = doc.add_table(rows=len(content), cols=len(content[0]))
+            table.style = "Table Grid"
+            for row, values in zip(table.rows, content):
+                for cell, value in zip(row.cells, values):
+                    cell.text = value
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+class _PdfWriter:
+    """Lays blocks out line by line in base-14 Helvetica (no ligatures, so text extracts verbatim)."""
+
+    def __init__(self):
+        self.doc = fitz.open()
+        self.area = PDF_PAGE + (PDF_MARGIN, PDF_MARGIN, -PDF_MARGIN, -PDF_MARGIN)
+        self.fonts = {"helv": fitz.Font("helv"), "hebo": fitz.Font("hebo")}
+        self._widths: dict[tuple, float] = {}
+        self.page = None
+        self._new_page()
+
+    def _new_page(self) -> None:
+        self.finish()
+        self.page = self.doc.new_page(width=PDF_PAGE.width, height=PDF_PAGE.height)
+        self.writer = fitz.TextWriter(self.page.rect)
+        self.shape = self.page.new_shape()
+        self.y = self.area.y0
+
+    def finish(self) -> None:
+        """Write the current page's text and rules."""
+        if self.page is not None:
+            self.writer.write_text(self.page)
+            self.shape.finish(color=(0.6, 0.6, 0.6), width=0.5)
+            self.shape.commit()
+
+    def _width(self, word: str, font: str, size: float) -> float:
+        key = (word, font, size)
+        if key not in self._widths:
+            self._widths[key] = self.fonts[font].text_length(word, fontsize=size)
+        return self._widths[key]
+
+    def _wrap(self, text: str, width: float, font: str, size: float) -> list[str]:
+        space = self._width(" ", font, size)
+        lines = []
+        for paragraph in text.split("\n"):
+            words: list[str] = []
+            used = 0.0
+            for word in paragraph.split(" "):
+                word_width = self._width(word, font, size)
+                if words and used + space + word_width > width:
+                    lines.append(" ".join(words))
+                    words, used = [], 0.0
+                used += word_width + (space if words else 0)
+                words.append(word)
+            lines.append(" ".join(words))
+        return lines
+
+    def _reserve(self, height: float) -> None:
+        if self.y + height > self.area.y1 and self.y > self.area.y0:
+            self._new_page()
+
+    def text(self, text: str, font: str = "helv", size: float = PDF_FONT_SIZE, space_after: float = 4) -> None:
+        for line in self._wrap(text, self.area.width, font, size):
+            self._reserve(size * 1.3)
+            self.y += size * 1.3
+            self.writer.append((self.area.x0, self.y), line, font=self.fonts[font], fontsize=size)
+        self.y += space_after
+
+    def table(self, rows: list[list[str]]) -> None:
+        weights = [min(max(len(row[col]) for row in rows), 40) + 4 for col in range(len(rows[0]))]
+        widths = [self.area.width * weight / sum(weights) for weight in weights]
+        leading = PDF_FONT_SIZE * 1.3
+        for row in rows:
+            cells = [self._wrap(value, width - 6, "helv", PDF_FONT_SIZE) for value, width in zip(row, widths)]
+            height = max(len(lines) for lines in cells) * leading + 4
+            self._reserve(height)
+            x = self.area.x0
+            for lines, width in zip(cells, widths):
+                for n, line in enumerate(lines):
+                    self.writer.append(
+                        (x + 3, self.y + (n + 1) * leading), line, font=self.fonts["helv"], fontsize=PDF_FONT_SIZE,
+                    )
+                x += width
+            self.y += height
+            self.shape.draw_line((self.area.x0, self.y), (self.area.x1, self.y))
+        self.y += 6
+
+
+def render_pdf(blocks: list[tuple]) -> tuple[bytes, int]:
+    """(PDF bytes, page count)."""
+    writer = _PdfWriter()
+    for kind, content in blocks:
+        if kind == "title":
+            writer.text(content, font="hebo", size=15, space_after=8)
+        elif kind == "heading":
+            writer.text(content, font="hebo", size=11.5)
+        elif kind == "para":
+            writer.text(content)
+        elif kind == "table":
+            writer.table(content)
+    writer.finish()
+    return writer.doc.tobytes(garbage=3, deflate=True), writer.doc.page_count
+
+
+def _estimate_pages(blocks: list[tuple]) -> int:
+    lines = 0
+    for kind, content in blocks:
+        if kind == "table":
+            lines += sum(1 + max(value.count("\n") for value in row) for row in content)
+        else:
+            lines += 2 + len(content) // 90 + content.count("\n")
+    return -(-lines // LINES_PER_PAGE)
+
+
+def build_lease_file(
+    lease: dict, layout: str, file_type: str, target_pages: int, table_rows: int, rng: random.Random,
+) -> tuple[bytes, int]:
+    """Render one lease, padded towards `target_pages`. Returns (file bytes, pages — estimated for DOCX)."""
+    body = {"summary": _summary_layout, "particulars": _particulars_layout, "narrative": _narrative_layout}[layout](lease)
+    annexure_seed = rng.random()
+
+    def blocks(guide_paragraphs: int) -> list[tuple]:
+        return body + _annexure_blocks(lease, table_rows, guide_paragraphs, random.Random(annexure_seed))
+
+    if file_type == "docx":
+        estimated = _estimate_pages(blocks(0))
+        padding = max(0, target_pages - estimated) * PARAGRAPHS_PER_PAGE
+        return render_docx(blocks(padding)), max(estimated, target_pages)
+
+    padding = 0
+    data, pages = render_pdf(blocks(0))
+    natural_pages = pages
+    while pages < target_pages:
+        # Re-estimate paragraphs per page from the last render
+        per_page = padding / (pages - natural_pages) if pages > natural_pages else PARAGRAPHS_PER_PAGE
+        padding += math.ceil((target_pages - pages) * per_page)
+        data, pages = render_pdf(blocks(padding))
+    return data, pages
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def _arg(name: str, default: str) -> str:
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def _range(value: str) -> tuple[int, int]:
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+
+def generate_corpus(
+    out_dir: Path,
+    count: int,
+    pdf_fraction: float = 0.5,
+    pages: tuple[int, int] = (0, 0),
+    table_rows: tuple[int, int] = (10, 40),
+    seed: int = 1,
+) -> dict[str, dict]:
+    """Write `count` leases and ground_truth.json to `out_dir`. Returns the ground truth."""
+    rng = random.Random(seed)
+    names = NamePool(rng)
+    staff = make_staff(names, rng)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    ground_truth: dict[str, dict] = {}
+    for _ in range(count):
+        lease = make_lease(names, staff, rng)
+        file_type = "pdf" if rng.random() < pdf_fraction else "docx"
+        file_name = f"Lease Agreement - {lease['tenant_name']}.{file_type}"
+        data, _ = build_lease_file(
+            lease, rng.choice(LAYOUTS), file_type, rng.randint(*pages), rng.randint(*table_rows), rng,
+        )
+        (out_dir / file_name).write_bytes(data)
+        ground_truth[file_name] = lease["fields"]
+
+    with open(out_dir / "ground_truth.json", "w") as f:
+        json.dump(ground_truth, f, indent=2, ensure_ascii=False)
+    return ground_truth
+
+
+def run_generator():
+    if len(sys.argv) < 2 or sys.argv[1].startswith("--"):
+        print(__doc__)
+        return 1
+    out_dir = Path(sys.argv[1])
+    count = int(_arg("--count", "200"))
+    pdf_fraction = float(_arg("--pdf", "0.5"))
+    pages = _range(_arg("--pages", "0-0"))
+    table_rows = _range(_arg("--table-rows", "10-40"))
+    seed = int(_arg("--seed", "1"))
+
+    print("=" * 70)
+    print("LEASE CORPUS GENERATOR")
+    print(f"Leases: {count} | PDF: {pdf_fraction:.0%} | Pages: {pages[0]}-{pages[1]} | "
+          f"Condition report rows: {table_rows[0]}-{table_rows[1]} | Seed: {seed}")
+    print(f"Output: {out_dir}")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    ground_truth = generate_corpus(out_dir, count, pdf_fraction, pages, table_rows, seed)
+    elapsed = time.perf_counter() - start
+
+    files = [out_dir / name for name in ground_truth]
+    pdfs = sum(1 for path in files if path.suffix == ".pdf")
+    joint = sum(1 for fields in ground_truth.values() if " & " in fields["tenant_name"])
+    with_conditions = sum(1 for fields in ground_truth.values() if fields["special_conditions"])
+    size_mb = sum(path.stat().st_size for path in files) / 1_000_000
+
+    print(f"\n  ✓ {len(files)} leases ({pdfs} PDF, {len(files) - pdfs} DOCX), {size_mb:.1f} MB in {elapsed:.1f}s")
+    print(f"  Joint tenancies: {joint} | With special conditions: {with_conditions}")
+    print(f"  Ground truth: {out_dir / 'ground_truth.json'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_generator())
@@ -0,0 +1,38 @@
+"""
+The app wired to the tests/fakes.py stand-ins, as a module a real server can
+load — so the pre-fork deployment (gunicorn.conf.py) can be load-tested
+without Supabase, Gemini or an API key.
+
+Usage (from backend/):
+    WEB_CONCURRENCY=4 RATE_LIMIT_ENABLED=false gunicorn tests.offline_server:app
+    python tests/benchmark_load.py --offline --url http://localhost:8000 --mix upload=1,history=1
+
+Latencies come from OFFLINE_GEMINI_LATENCY, OFFLINE_DB_LATENCY and
+OFFLINE_STORAGE_LATENCY ("median,p95" seconds, as in benchmark_offline.py).
+Tokens are the HS256 ones benchmark_load.py --offline signs. Each worker
+gets its own copy of the fake database, forked from the master, so a
+request only sees uploads made through the same worker — keep load mixes to
+uploads and history.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from benchmark_offline import GROUND_TRUTH_PATH, setup_offline  # noqa: E402
+from fakes import Latency  # noqa: E402
+
+with open(GROUND_TRUTH_PATH) as f:
+    _ground_truth = json.load(f)
+
+app, fake_db, fake_gemini = setup_offline(
+    _ground_truth,
+    Latency.parse(os.getenv("OFFLINE_GEMINI_LATENCY", "1.2,3.0")),
+    Latency.parse(os.getenv("OFFLINE_DB_LATENCY", "0.02,0.06")),
+    Latency.parse(os.getenv("OFFLINE_STORAGE_LATENCY", "0.05,0.15")),
+)
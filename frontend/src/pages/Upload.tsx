@@ -122,6 +122,8 @@ export default function Upload() {
   const [downloaded, setDownloaded] = useState(false)
   const inputRef = useRef<HTMLInputElement>(null)
   const stageTimerRef = useRef<ReturnType<typeof setTimeout>[]>([])
+  // One key per selected file — retries of the same upload are deduplicated server-side
+  const idempotencyKeyRef = useRef<string>('')
 
   // Cleanup timers on unmount
   useEffect(() => {
@@ -146,6 +148,7 @@ export default function Upload() {
       return
     }
     setFile(f)
+    idempotencyKeyRef.current = crypto.randomUUID()
     setStage('selected')
     setError(null)
   }, [])
@@ -177,6 +180,7 @@ export default function Upload() {
 
       const res = await apiFetch('/api/lease/upload', {
         method: 'POST',
+        headers: { 'Idempotency-Key': idempotencyKeyRef.current },
         body: formData,
       })
 